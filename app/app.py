@@ -5,10 +5,11 @@ import sqlite3
 
 from flask import Flask, redirect, render_template, request, session, url_for
 
-from app.db import close_db
+from app.db import close_db, connect, db_config_from_env
 from app.repos import users as users_repo
 from app.routes.api import api_bp
 from app.routes.auth import auth_bp
+from app.services import canonical_ids as canonical_ids_service
 from app.services import recommendations as rec_service
 
 BASE_PATH = "/shelf"  # keep all web routes under /shelf
@@ -64,8 +65,7 @@ def _is_admin_user(username):
 
 def init_db(app):
     # Make sure core tables exist (web shares the same DB as the CLI)
-    db = sqlite3.connect(app.config["DATABASE"])
-    db.row_factory = sqlite3.Row
+    db = connect(app.config)
     cur = db.cursor()
 
     cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='users'")
@@ -98,6 +98,7 @@ def init_db(app):
                 canonical_id TEXT,
                 mdex_id TEXT,
                 mal_id INTEGER,
+                ids_resolved INTEGER DEFAULT 0,
                 rating REAL,
                 recommended_by_us INTEGER DEFAULT 0,
                 finished_reading INTEGER DEFAULT 0,
@@ -118,6 +119,7 @@ def init_db(app):
                 canonical_id TEXT,
                 mdex_id TEXT,
                 mal_id INTEGER,
+                ids_resolved INTEGER DEFAULT 0,
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP,
                 PRIMARY KEY (user_id, manga_id)
             )
@@ -134,6 +136,7 @@ def init_db(app):
                 canonical_id TEXT,
                 mdex_id TEXT,
                 mal_id INTEGER,
+                ids_resolved INTEGER DEFAULT 0,
                 status TEXT DEFAULT 'Plan to Read',
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP,
                 PRIMARY KEY (user_id, manga_id)
@@ -175,6 +178,51 @@ def init_db(app):
         )
     cur.execute("CREATE INDEX IF NOT EXISTS idx_user_requests_user_time ON user_requests (user_id, created_at)")
 
+    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='user_recommendation_cache'")
+    if not cur.fetchone():
+        cur.execute(
+            """
+            CREATE TABLE user_recommendation_cache (
+                user_id TEXT NOT NULL,
+                params_hash TEXT NOT NULL,
+                catalog_fingerprint TEXT NOT NULL,
+                state_version INTEGER DEFAULT 0,
+                payload TEXT NOT NULL,
+                used_current INTEGER DEFAULT 0,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (user_id, params_hash)
+            )
+            """
+        )
+
+    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='user_state'")
+    if not cur.fetchone():
+        cur.execute(
+            """
+            CREATE TABLE user_state (
+                user_id TEXT PRIMARY KEY,
+                state_version INTEGER DEFAULT 0,
+                history_version INTEGER DEFAULT 0,
+                ratings_version INTEGER DEFAULT 0,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+
+    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='user_feature_cache'")
+    if not cur.fetchone():
+        cur.execute(
+            """
+            CREATE TABLE user_feature_cache (
+                user_id TEXT PRIMARY KEY,
+                ratings_version INTEGER DEFAULT 0,
+                catalog_fingerprint TEXT,
+                payload TEXT NOT NULL,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+
     cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='manga_stats'")
     if not cur.fetchone():
         cur.execute(
@@ -327,6 +375,29 @@ def init_db(app):
     if "canonical_id" not in dnr_cols:
         cur.execute("ALTER TABLE user_dnr ADD COLUMN canonical_id TEXT")
 
+    # Add ids_resolved flag if missing (existing DB); rows start unresolved for the backfill.
+    for table in ("user_ratings", "user_dnr", "user_reading_list"):
+        cur.execute(f"PRAGMA table_info({table})")
+        if "ids_resolved" not in {row[1] for row in cur.fetchall()}:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN ids_resolved INTEGER DEFAULT 0")
+
+    # Add state_version column if missing (existing DB)
+    cur.execute("PRAGMA table_info(user_recommendation_cache)")
+    rec_cache_cols = {row[1] for row in cur.fetchall()}
+    if "state_version" not in rec_cache_cols:
+        cur.execute("ALTER TABLE user_recommendation_cache ADD COLUMN state_version INTEGER DEFAULT 0")
+
+    # Add ratings_version column if missing (existing DB)
+    cur.execute("PRAGMA table_info(user_state)")
+    user_state_cols = {row[1] for row in cur.fetchall()}
+    if "ratings_version" not in user_state_cols:
+        cur.execute("ALTER TABLE user_state ADD COLUMN ratings_version INTEGER DEFAULT 0")
+
+    # Normalize legacy mixed-case user ids once so repos can match `user_id = lower(?)` on the keys.
+    if cur.execute("PRAGMA user_version").fetchone()[0] < _USER_IDS_NORMALIZED_VERSION:
+        _normalize_user_ids(cur, app.logger)
+        cur.execute(f"PRAGMA user_version = {_USER_IDS_NORMALIZED_VERSION}")
+
     cur.execute("DROP VIEW IF EXISTS manga_merged")
     cur.execute(
         """
@@ -366,10 +437,241 @@ def init_db(app):
         LEFT JOIN manga_stats AS stats ON stats.mal_id = map.mal_id
         """
     )
+    _ensure_manga_catalog(cur)
+    _ensure_catalog_change_log(cur)
+    _ensure_manga_title_search(cur)
     db.commit()
     db.close()
 
 
+# `PRAGMA user_version` from which user ids are stored lower-cased.
+_USER_IDS_NORMALIZED_VERSION = 1
+
+
+def _normalize_user_ids(cur, logger):
+    """Lower-case legacy user ids, merging accounts whose names differ only in case."""
+    collisions = cur.execute(
+        """
+        SELECT lower(username), group_concat(username, ', ') FROM users
+        GROUP BY lower(username) HAVING COUNT(*) > 1
+        """
+    ).fetchall()
+    for username, variants in collisions:
+        logger.warning("Merging user accounts %s into %r", variants, username)
+    # The lower-case account (else the oldest variant) keeps its profile and password.
+    cur.execute(
+        """
+        DELETE FROM users WHERE username != lower(username) AND EXISTS (
+            SELECT 1 FROM users AS other
+            WHERE lower(other.username) = lower(users.username) AND other.rowid != users.rowid
+              AND (other.username = lower(other.username) OR other.rowid < users.rowid)
+        )
+        """
+    )
+    cur.execute("UPDATE users SET username = lower(username) WHERE username != lower(username)")
+    cur.execute("UPDATE user_requests SET user_id = lower(user_id) WHERE user_id != lower(user_id)")
+    for table in ("user_ratings", "user_dnr", "user_reading_list", "user_request_cache"):
+        cur.execute(f"UPDATE OR IGNORE {table} SET user_id = lower(user_id) WHERE user_id != lower(user_id)")
+        # Whatever is left collided with the merged account's row for the same key, which wins.
+        cur.execute(f"DELETE FROM {table} WHERE user_id != lower(user_id)")
+    # Derived per-user state is rebuilt on demand; drop it for every id that changed.
+    merged = [username for username, _ in collisions]
+    for table in ("user_recommendation_cache", "user_feature_cache", "user_state"):
+        cur.execute(f"DELETE FROM {table} WHERE user_id != lower(user_id)")
+        cur.executemany(f"DELETE FROM {table} WHERE user_id = ?", [(username,) for username in merged])
+
+
+# Columns of the materialised `manga_catalog` table, in `manga_merged` view order.
+_MANGA_CATALOG_COLUMNS = (
+    "mangadex_id", "link", "title_name", "english_name", "japanese_name", "synonymns", "item_type",
+    "volumes", "chapters", "status", "publishing_date", "authors", "serialization", "genres", "themes",
+    "demographic", "description", "content_rating", "original_language", "cover_url", "links",
+    "updated_at", "mal_id", "score", "scored_by", "ranked", "popularity", "members", "favorited",
+)
+
+# Trigger bodies that keep `manga_catalog` in step with the three source tables.
+# `{ids}` is a SQL expression (or subquery) naming the affected mangadex ids.
+_MANGA_CATALOG_TRIGGERS = {
+    "manga_core": {
+        "INSERT": ["REFRESH NEW.id"],
+        "UPDATE": ["DELETE OLD.id", "REFRESH NEW.id"],
+        "DELETE": ["DELETE OLD.id"],
+    },
+    "manga_map": {
+        "INSERT": ["REFRESH NEW.mangadex_id"],
+        "UPDATE": ["REFRESH OLD.mangadex_id", "REFRESH NEW.mangadex_id"],
+        "DELETE": ["REFRESH OLD.mangadex_id"],
+    },
+    "manga_stats": {
+        "INSERT": ["REFRESH_MAL NEW.mal_id"],
+        "UPDATE": ["REFRESH_MAL OLD.mal_id", "REFRESH_MAL NEW.mal_id"],
+        "DELETE": ["REFRESH_MAL OLD.mal_id"],
+    },
+}
+
+
+def _catalog_trigger_statement(action):
+    """Render one trigger action (`REFRESH x`, `REFRESH_MAL x` or `DELETE x`) as SQL."""
+    verb, ref = action.split(" ", 1)
+    columns = ", ".join(_MANGA_CATALOG_COLUMNS)
+    if verb == "DELETE":
+        return f"DELETE FROM manga_catalog WHERE mangadex_id = {ref};"
+    if verb == "REFRESH_MAL":
+        where = f"mangadex_id IN (SELECT mangadex_id FROM manga_map WHERE mal_id = {ref})"
+    else:
+        # Dropping first covers ids that no longer have a core row.
+        where = f"mangadex_id = {ref}"
+    return (
+        f"DELETE FROM manga_catalog WHERE {where}; "
+        f"INSERT OR REPLACE INTO manga_catalog ({columns}) SELECT {columns} FROM manga_merged WHERE {where};"
+    )
+
+
+def _ensure_manga_catalog(cur):
+    """Create, index and (re)fill the materialised copy of `manga_merged`."""
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS manga_catalog (
+            mangadex_id TEXT PRIMARY KEY,
+            link TEXT,
+            title_name TEXT,
+            english_name TEXT,
+            japanese_name TEXT,
+            synonymns TEXT,
+            item_type TEXT,
+            volumes TEXT,
+            chapters TEXT,
+            status TEXT,
+            publishing_date TEXT,
+            authors TEXT,
+            serialization TEXT,
+            genres TEXT,
+            themes TEXT,
+            demographic TEXT,
+            description TEXT,
+            content_rating TEXT,
+            original_language TEXT,
+            cover_url TEXT,
+            links TEXT,
+            updated_at TEXT,
+            mal_id INTEGER,
+            score REAL,
+            scored_by REAL,
+            ranked REAL,
+            popularity REAL,
+            members REAL,
+            favorited REAL
+        )
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_manga_catalog_mal_id ON manga_catalog (mal_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_manga_catalog_title ON manga_catalog (title_name)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_manga_catalog_english ON manga_catalog (english_name)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_manga_catalog_japanese ON manga_catalog (japanese_name)")
+
+    existing = dict(cur.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").fetchall())
+    triggers_changed = False
+    for table, events in _MANGA_CATALOG_TRIGGERS.items():
+        for event, actions in events.items():
+            name = f"trg_{table}_{event.lower()}_catalog"
+            body = " ".join(_catalog_trigger_statement(action) for action in actions)
+            sql = f"CREATE TRIGGER {name} AFTER {event} ON {table} BEGIN {body} END"
+            if existing.get(name) != sql:
+                # Missing or differently defined: writes so far may not have reached the catalog.
+                cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+                cur.execute(sql)
+                triggers_changed = True
+
+    # Rebuild when the triggers were just (re)created, or when rows were written
+    # without them (e.g. scripts run against a database the app has not opened).
+    core_count = cur.execute("SELECT COUNT(*) FROM manga_core").fetchone()[0]
+    catalog_count = cur.execute("SELECT COUNT(*) FROM manga_catalog").fetchone()[0]
+    if triggers_changed or core_count != catalog_count:
+        columns = ", ".join(_MANGA_CATALOG_COLUMNS)
+        cur.execute("DELETE FROM manga_catalog")
+        cur.execute(f"INSERT INTO manga_catalog ({columns}) SELECT {columns} FROM manga_merged")
+
+
+# Change-log rows kept for cache refreshes; older watermarks fall back to a rebuild.
+_CATALOG_CHANGE_LOG_KEEP = 100000
+
+
+def _ensure_catalog_change_log(cur):
+    """Log every `manga_catalog` row change (and `manga_stats` edits) for delta cache refreshes."""
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS manga_catalog_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            mangadex_id TEXT
+        )
+        """
+    )
+    # Catalog refreshes delete before re-inserting, so each touched id is logged.
+    for event, ref in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        cur.execute(
+            f"CREATE TRIGGER IF NOT EXISTS trg_manga_catalog_{event.lower()}_changes "
+            f"AFTER {event} ON manga_catalog BEGIN "
+            f"INSERT INTO manga_catalog_changes (mangadex_id) VALUES ({ref}.mangadex_id); END"
+        )
+    # Stats rows without a mapped title leave the catalog alone but still feed name lookups.
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cur.execute(
+            f"CREATE TRIGGER IF NOT EXISTS trg_manga_stats_{event.lower()}_changes "
+            f"AFTER {event} ON manga_stats BEGIN "
+            "INSERT INTO manga_catalog_changes (mangadex_id) VALUES (NULL); END"
+        )
+    cur.execute(
+        "DELETE FROM manga_catalog_changes WHERE seq <= (SELECT MAX(seq) FROM manga_catalog_changes) - ?",
+        (_CATALOG_CHANGE_LOG_KEEP,),
+    )
+
+
+# Title fields indexed for full-text search, in `manga_title_fts` column order.
+_MANGA_TITLE_FTS_COLUMNS = ("mangadex_id", "title_name", "english_name", "japanese_name", "synonymns")
+
+
+def _ensure_manga_title_search(cur):
+    """Create the trigram FTS5 index over catalog titles; skipped when FTS5 is unavailable."""
+    columns = ", ".join(_MANGA_TITLE_FTS_COLUMNS)
+    new_values = ", ".join(f"NEW.{column}" for column in _MANGA_TITLE_FTS_COLUMNS)
+    try:
+        cur.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS manga_title_fts USING fts5("
+            "mangadex_id UNINDEXED, title_name, english_name, japanese_name, synonymns, tokenize='trigram')"
+        )
+    except sqlite3.OperationalError:
+        # Older SQLite builds lack FTS5/trigram; search falls back to LIKE scans.
+        return
+    # FTS rowids mirror `manga_catalog` rowids. Catalog refreshes delete before
+    # re-inserting, so insert/delete triggers are enough to follow them.
+    cur.execute(
+        "CREATE TRIGGER IF NOT EXISTS trg_manga_catalog_insert_fts AFTER INSERT ON manga_catalog BEGIN "
+        f"INSERT INTO manga_title_fts (rowid, {columns}) VALUES (NEW.rowid, {new_values}); END"
+    )
+    cur.execute(
+        "CREATE TRIGGER IF NOT EXISTS trg_manga_catalog_delete_fts AFTER DELETE ON manga_catalog BEGIN "
+        "DELETE FROM manga_title_fts WHERE rowid = OLD.rowid; END"
+    )
+    cur.execute(
+        "CREATE TRIGGER IF NOT EXISTS trg_manga_catalog_update_fts AFTER UPDATE ON manga_catalog BEGIN "
+        "DELETE FROM manga_title_fts WHERE rowid = OLD.rowid; "
+        f"INSERT INTO manga_title_fts (rowid, {columns}) VALUES (NEW.rowid, {new_values}); END"
+    )
+
+    # Rebuild when rows are missing or rowids drifted (VACUUM may renumber catalog rowids).
+    catalog_count = cur.execute("SELECT COUNT(*) FROM manga_catalog").fetchone()[0]
+    fts_count = cur.execute("SELECT COUNT(*) FROM manga_title_fts").fetchone()[0]
+    aligned = cur.execute(
+        """
+        SELECT COUNT(*) FROM manga_title_fts f
+        JOIN manga_catalog c ON c.rowid = f.rowid AND c.mangadex_id = f.mangadex_id
+        """
+    ).fetchone()[0]
+    if not (catalog_count == fts_count == aligned):
+        cur.execute("DELETE FROM manga_title_fts")
+        cur.execute(f"INSERT INTO manga_title_fts (rowid, {columns}) SELECT rowid, {columns} FROM manga_catalog")
+
+
 def _is_logged_in():
     """Handle is logged in for this module."""
     return bool(session.get("user_id"))
@@ -399,11 +701,14 @@ def create_app():
     )
     app.config["SECRET_KEY"] = _resolve_secret_key()
     app.config["DATABASE"] = os.environ.get("MANGA_DB_PATH", _default_db_path())
+    app.config.update(db_config_from_env())
 
     init_db(app)
     app.teardown_appcontext(close_db)
     app.register_blueprint(auth_bp)
     app.register_blueprint(api_bp)
+    # Rows written before ids were resolved at write time are fixed up off the request path.
+    canonical_ids_service.start_backfill(app)
     try:
         # Warm the options cache so the first page load doesn't pay the cost.
         rec_service.get_available_options(app.config["DATABASE"])
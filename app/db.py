@@ -1,20 +1,267 @@
 """Shared Flask database connection helpers for per-request SQLite access."""
 
+import os
 import sqlite3
-from flask import current_app, g
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from flask import current_app, g, has_app_context
+
+# Long-lived connections, one per (thread, database path); sqlite3 connections
+# are bound to the thread that opened them.
+_POOL = threading.local()
+_POOL_STATS = {"opened": 0, "reused": 0, "reconnects": 0}
+
+DB_DEFAULTS = {
+    "DB_POOL": True,
+    "DB_JOURNAL_MODE": "WAL",
+    "DB_SYNCHRONOUS": "NORMAL",
+    "DB_CACHE_SIZE_KB": 65536,
+    "DB_MMAP_SIZE": 268435456,
+    "DB_BUSY_TIMEOUT_MS": 5000,
+    "DB_STATEMENT_CACHE": 256,
+    "DB_READ_SPLIT": True,
+    "DB_WRITE_QUEUE": True,
+    "DB_WRITE_BATCH_WINDOW_MS": 2,
+    "DB_WRITE_BATCH_MAX": 64,
+    "DB_GROUP_COMMIT": False,
+}
+
+
+_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def _env_choice(name, default, allowed):
+    """Upper-cased env value when it is one of `allowed`, else `default`."""
+    value = os.environ.get(name, default).strip().upper()
+    return value if value in allowed else default
+
+
+def _env_int(name, default):
+    """Non-negative integer env value, or `default` when unset or invalid."""
+    try:
+        return max(0, int(os.environ.get(name, str(default))))
+    except ValueError:
+        return default
+
+
+def db_config_from_env():
+    """Connection settings for `app.config`, overridable via `MANGA_DB_*` env vars."""
+    return {
+        "DB_POOL": os.environ.get("MANGA_DB_POOL", "1").strip() != "0",
+        "DB_JOURNAL_MODE": _env_choice("MANGA_DB_JOURNAL_MODE", DB_DEFAULTS["DB_JOURNAL_MODE"], _JOURNAL_MODES),
+        "DB_SYNCHRONOUS": _env_choice("MANGA_DB_SYNCHRONOUS", DB_DEFAULTS["DB_SYNCHRONOUS"], _SYNCHRONOUS_MODES),
+        "DB_CACHE_SIZE_KB": _env_int("MANGA_DB_CACHE_SIZE_KB", DB_DEFAULTS["DB_CACHE_SIZE_KB"]),
+        "DB_MMAP_SIZE": _env_int("MANGA_DB_MMAP_SIZE", DB_DEFAULTS["DB_MMAP_SIZE"]),
+        "DB_BUSY_TIMEOUT_MS": _env_int("MANGA_DB_BUSY_TIMEOUT_MS", DB_DEFAULTS["DB_BUSY_TIMEOUT_MS"]),
+        "DB_STATEMENT_CACHE": _env_int("MANGA_DB_STATEMENT_CACHE", DB_DEFAULTS["DB_STATEMENT_CACHE"]),
+        "DB_READ_SPLIT": os.environ.get("MANGA_DB_READ_SPLIT", "1").strip() != "0",
+        "DB_WRITE_QUEUE": os.environ.get("MANGA_DB_WRITE_QUEUE", "1").strip() != "0",
+        "DB_WRITE_BATCH_WINDOW_MS": _env_int("MANGA_DB_WRITE_BATCH_WINDOW_MS", DB_DEFAULTS["DB_WRITE_BATCH_WINDOW_MS"]),
+        "DB_WRITE_BATCH_MAX": _env_int("MANGA_DB_WRITE_BATCH_MAX", DB_DEFAULTS["DB_WRITE_BATCH_MAX"]),
+        "DB_GROUP_COMMIT": os.environ.get("MANGA_DB_GROUP_COMMIT", "0").strip() == "1",
+    }
+
+
+def connect(config, read_only=False):
+    """Open a connection to `config["DATABASE"]` with the configured pragmas applied."""
+    settings = {**DB_DEFAULTS, **{key: config[key] for key in DB_DEFAULTS if key in config}}
+    busy_timeout = settings["DB_BUSY_TIMEOUT_MS"]
+    target = str(config["DATABASE"])
+    if read_only:
+        target = f"file:{quote(os.path.abspath(target))}?mode=ro"
+    db = sqlite3.connect(
+        target,
+        timeout=busy_timeout / 1000.0,
+        # Long-lived connections keep their compiled statements between requests.
+        cached_statements=settings["DB_STATEMENT_CACHE"] or 128,
+        uri=read_only,
+    )
+    db.row_factory = sqlite3.Row
+    if read_only:
+        # The journal mode is a property of the file; readers only refuse writes.
+        db.execute("PRAGMA query_only=ON")
+    elif settings["DB_JOURNAL_MODE"]:
+        db.execute(f"PRAGMA journal_mode={settings['DB_JOURNAL_MODE']}")
+    if settings["DB_SYNCHRONOUS"]:
+        db.execute(f"PRAGMA synchronous={settings['DB_SYNCHRONOUS']}")
+    # Negative cache_size is in KiB rather than pages.
+    db.execute(f"PRAGMA cache_size=-{int(settings['DB_CACHE_SIZE_KB'])}")
+    db.execute(f"PRAGMA mmap_size={int(settings['DB_MMAP_SIZE'])}")
+    db.execute(f"PRAGMA busy_timeout={int(busy_timeout)}")
+    return db
+
+
+def _healthy(db):
+    """True when a pooled connection still answers a trivial query."""
+    try:
+        db.execute("SELECT 1").fetchone()
+    except sqlite3.Error:
+        return False
+    return True
+
+
+def _pooled_connection(config, read_only=False):
+    """Return this thread's connection for the configured database, reopening it if broken."""
+    connections = getattr(_POOL, "connections", None)
+    if connections is None:
+        connections = _POOL.connections = {}
+    path = (config["DATABASE"], read_only)
+    db = connections.get(path)
+    if db is not None:
+        if _healthy(db):
+            _POOL_STATS["reused"] += 1
+            return db
+        _POOL_STATS["reconnects"] += 1
+        try:
+            db.close()
+        except sqlite3.Error:
+            pass
+    db = connect(config, read_only=read_only)
+    connections[path] = db
+    _POOL_STATS["opened"] += 1
+    return db
+
+
+def bound_connection():
+    """Connection bound to this thread by `bind_connection` (the writer queue), or None."""
+    return getattr(_POOL, "bound", None)
+
+
+@contextmanager
+def bind_connection(db):
+    """Route `get_db`/`get_read_db` on this thread to `db`, whose transaction the caller owns."""
+    previous = getattr(_POOL, "bound", None)
+    _POOL.bound = db
+    try:
+        yield db
+    finally:
+        _POOL.bound = previous
+
+
+def in_unit_of_work():
+    """True when a surrounding unit of work (or writer-queue batch) owns the transaction."""
+    if bound_connection() is not None:
+        return True
+    return has_app_context() and g.get("uow_depth", 0) > 0
+
+
+@contextmanager
+def unit_of_work():
+    """Run every repository write in the block as one transaction on the request connection.
+
+    Nested units join the outermost one; it commits on a clean exit and rolls
+    back if the block raises.
+    """
+    db = get_db()
+    if bound_connection() is not None:
+        yield db
+        return
+    depth = g.get("uow_depth", 0)
+    g.uow_depth = depth + 1
+    try:
+        yield db
+    except BaseException:
+        g.uow_depth = depth
+        if depth == 0 and db.in_transaction:
+            db.rollback()
+        raise
+    g.uow_depth = depth
+    if depth == 0 and db.in_transaction:
+        db.commit()
+
+
+def commit(db):
+    """Commit `db` unless a unit of work owns the transaction (then it commits once at the end)."""
+    if not in_unit_of_work():
+        db.commit()
 
 
 def get_db():
-    """Return db."""
+    """Return the request's connection (this thread's pooled one when `DB_POOL` is on)."""
+    bound = bound_connection()
+    if bound is not None:
+        return bound
     if "db" not in g:
-        db = sqlite3.connect(current_app.config["DATABASE"])
-        db.row_factory = sqlite3.Row
-        g.db = db
+        config = current_app.config
+        if config.get("DB_POOL", DB_DEFAULTS["DB_POOL"]):
+            g.db = _pooled_connection(config)
+            g.db_pooled = True
+        else:
+            g.db = connect(config)
+            g.db_pooled = False
     return g.db
 
 
-def close_db(_error=None):
-    """Handle close db for this module."""
-    db = g.pop("db", None)
-    if db is not None:
+def get_read_db():
+    """Return a read-only connection so list/lookup reads never queue behind writers.
+
+    Falls back to the writer connection while this request has an open
+    transaction or unit of work, so reads see its own uncommitted rows.
+    """
+    if in_unit_of_work():
+        return get_db()
+    config = current_app.config
+    if not config.get("DB_READ_SPLIT", DB_DEFAULTS["DB_READ_SPLIT"]):
+        return get_db()
+    writer = g.get("db")
+    if writer is not None and writer.in_transaction:
+        return writer
+    if "read_db" not in g:
+        if config.get("DB_POOL", DB_DEFAULTS["DB_POOL"]):
+            g.read_db = _pooled_connection(config, read_only=True)
+            g.read_db_pooled = True
+        else:
+            g.read_db = connect(config, read_only=True)
+            g.read_db_pooled = False
+    return g.read_db
+
+
+def _release(db, pooled):
+    """Close an unpooled connection, or roll back a pooled one before reuse."""
+    if db is None:
+        return
+    if not pooled:
         db.close()
+        return
+    try:
+        # Never hand an open transaction (and its locks) to the next request.
+        if db.in_transaction:
+            db.rollback()
+    except sqlite3.Error:
+        close_pool(db)
+
+
+def close_db(_error=None):
+    """Release the request's connections; pooled ones stay open for the next request."""
+    _release(g.pop("db", None), g.pop("db_pooled", False))
+    _release(g.pop("read_db", None), g.pop("read_db_pooled", False))
+
+
+def close_pool(db=None):
+    """Close this thread's pooled connections (or just `db`)."""
+    connections = getattr(_POOL, "connections", {})
+    for path, conn in list(connections.items()):
+        if db is not None and conn is not db:
+            continue
+        connections.pop(path, None)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+def pool_stats():
+    """Counters for pooled connection reuse."""
+    stats = dict(_POOL_STATS)
+    stats["thread_connections"] = len(getattr(_POOL, "connections", {}))
+    return stats
+
+
+def chunked(values, size=500):
+    """Split values into lists small enough for one ``IN (...)`` clause."""
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
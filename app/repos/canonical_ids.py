@@ -0,0 +1,82 @@
+"""Data-access helpers that resolve title ids on legacy user list rows."""
+
+from app.db import commit, get_db, get_read_db
+from app.repos import user_state as user_state_repo
+
+# Key expression each table's reads used before ids were resolved at write time.
+_LEGACY_KEY_SQL = {
+    "user_ratings": "COALESCE(r.canonical_id, mm.mangadex_id, r.mdex_id, m.mangadex_id, r.manga_id)",
+    "user_dnr": "COALESCE(r.canonical_id, mm.mangadex_id, r.mdex_id, r.manga_id)",
+    "user_reading_list": "COALESCE(r.canonical_id, mm.mangadex_id, r.mdex_id, r.manga_id)",
+}
+TABLES = tuple(_LEGACY_KEY_SQL)
+
+
+# Canonical id repository: one-off resolution for rows written before `ids_resolved`.
+def has_pending():
+    # Cheap existence probe used to decide whether a backfill is needed at all.
+    db = get_read_db()
+    for table in TABLES:
+        if db.execute(f"SELECT 1 FROM {table} WHERE ids_resolved = 0 LIMIT 1").fetchone():
+            return True
+    return False
+
+
+def resolve_batch(table, after_rowid, limit):
+    # Resolve up to `limit` unresolved rows past `after_rowid` with the legacy join, store
+    # the result and mark them resolved. Returns (last_rowid, rows_processed).
+    db = get_db()
+    key_sql = _LEGACY_KEY_SQL[table]
+    cur = db.execute(
+        f"""
+        SELECT r.rowid AS row_id, r.user_id, r.canonical_id, r.mdex_id, r.mal_id,
+               {key_sql} AS resolved_key,
+               COALESCE(m.mangadex_id, CASE WHEN r.mdex_id LIKE 'mal:%' THEN mm.mangadex_id END, r.mdex_id)
+                   AS resolved_mdex,
+               COALESCE(r.mal_id, mm.mal_id, m.mal_id) AS resolved_mal
+        FROM {table} r
+        LEFT JOIN manga_map mm
+            ON mm.mal_id = COALESCE(
+                r.mal_id,
+                CASE WHEN r.mdex_id LIKE 'mal:%' THEN CAST(SUBSTR(r.mdex_id, 5) AS INTEGER) END
+            )
+        LEFT JOIN manga_merged m
+            ON m.mangadex_id = COALESCE(
+                CASE WHEN r.mdex_id LIKE 'mal:%' THEN mm.mangadex_id END,
+                r.mdex_id,
+                r.manga_id
+            )
+            OR (r.mdex_id IS NULL AND m.mangadex_id = r.manga_id)
+            OR (r.mdex_id IS NULL AND m.title_name = r.manga_id)
+        WHERE r.rowid IN (
+            SELECT rowid FROM {table} WHERE ids_resolved = 0 AND rowid > ? ORDER BY rowid LIMIT ?
+        )
+        ORDER BY r.rowid
+        """,
+        (after_rowid, limit),
+    )
+    resolved = {}
+    for row in cur.fetchall():
+        # Ambiguous title joins can yield several rows; the first match wins.
+        resolved.setdefault(row["row_id"], row)
+    if not resolved:
+        return after_rowid, 0
+
+    changed_users = set()
+    for row_id, row in resolved.items():
+        values = (row["resolved_key"], row["resolved_mdex"], row["resolved_mal"])
+        if row["resolved_key"] != row["canonical_id"]:
+            changed_users.add(row["user_id"])
+        db.execute(
+            f"UPDATE {table} SET canonical_id = ?, mdex_id = ?, mal_id = ?, ids_resolved = 1 WHERE rowid = ?",
+            (*values, row_id),
+        )
+    # Only the key feeds cached recommendations (and, for ratings, cached affinity sums);
+    # mdex_id/mal_id changes affect display only.
+    for user_id in changed_users:
+        if table == "user_ratings":
+            user_state_repo.bump_ratings(user_id)
+        else:
+            user_state_repo.bump_state(user_id)
+    commit(db)
+    return max(resolved), len(resolved)
@@ -1,6 +1,7 @@
 """Data-access helpers for user do-not-recommend records."""
 
-from app.db import get_db
+from app.db import chunked, commit, get_db, get_read_db
+from app.repos import user_state as user_state_repo
 
 
 # Data-access helpers for the "Do Not Recommend" list.
@@ -11,29 +12,19 @@ def list_by_user(user_id, sort="chron"):
         order_sql = "ORDER BY m.title_name COLLATE NOCASE ASC"
     elif sort == "chron":
         order_sql = "ORDER BY d.created_at DESC"
-    db = get_db()
-    # Join through mapping + merged tables so each row has display metadata and stable IDs.
+    db = get_read_db()
+    # Ids are resolved at write time (or by the canonical-id backfill), so metadata is a
+    # primary-key lookup on the stored mdex_id, or the `mal:N` core row for MAL-only titles.
     cur = db.execute(
         f"""
         SELECT d.user_id, d.manga_id, d.created_at, m.english_name, m.japanese_name, m.title_name, m.item_type, m.cover_url,
-               COALESCE(d.mal_id, mm.mal_id, m.mal_id) AS mal_id,
-               COALESCE(d.canonical_id, mm.mangadex_id, d.mdex_id, m.mangadex_id) AS mdex_id,
-               COALESCE(d.canonical_id, mm.mangadex_id, d.mdex_id, m.mangadex_id, d.manga_id) AS canonical_id
+               COALESCE(d.mal_id, mm.mal_id) AS mal_id,
+               COALESCE(d.canonical_id, d.mdex_id) AS mdex_id,
+               COALESCE(d.canonical_id, d.manga_id) AS canonical_id
         FROM user_dnr d
-        LEFT JOIN manga_map mm
-            ON mm.mal_id = COALESCE(
-                d.mal_id,
-                CASE WHEN d.mdex_id LIKE 'mal:%' THEN CAST(SUBSTR(d.mdex_id, 5) AS INTEGER) END
-            )
-        LEFT JOIN manga_merged m
-            ON m.mangadex_id = COALESCE(
-                CASE WHEN d.mdex_id LIKE 'mal:%' THEN mm.mangadex_id END,
-                d.mdex_id,
-                d.manga_id
-            )
-            OR (d.mdex_id IS NULL AND m.mangadex_id = d.manga_id)
-            OR (d.mdex_id IS NULL AND m.title_name = d.manga_id)
-        WHERE lower(d.user_id) = lower(?)
+        LEFT JOIN manga_core m ON m.id = COALESCE(d.mdex_id, d.canonical_id)
+        LEFT JOIN manga_map mm ON mm.mangadex_id = d.mdex_id
+        WHERE d.user_id = lower(?)
         {order_sql}
         """,
         (user_id,),
@@ -47,7 +38,7 @@ def add(user_id, manga_id, canonical_id=None, mdex_id=None, mal_id=None):
     db.execute(
         """
         DELETE FROM user_dnr
-        WHERE lower(user_id) = lower(?)
+        WHERE user_id = lower(?)
           AND (canonical_id = ? OR mdex_id = ? OR manga_id = ?)
         """,
         # Parameter order mirrors the OR conditions above.
@@ -55,10 +46,12 @@ def add(user_id, manga_id, canonical_id=None, mdex_id=None, mal_id=None):
     )
     db.execute(
         # Keep username normalized to lowercase at write time.
-        "INSERT OR IGNORE INTO user_dnr (user_id, manga_id, mdex_id, mal_id, canonical_id) VALUES (lower(?), ?, ?, ?, ?)",
+        "INSERT OR IGNORE INTO user_dnr (user_id, manga_id, mdex_id, mal_id, canonical_id, ids_resolved) "
+        "VALUES (lower(?), ?, ?, ?, ?, 1)",
         (user_id, canonical_id or manga_id, mdex_id, mal_id, canonical_id),
     )
-    db.commit()
+    user_state_repo.bump_state(user_id)
+    commit(db)
 
 
 def remove(user_id, manga_id, canonical_id=None, mdex_id=None):
@@ -67,29 +60,65 @@ def remove(user_id, manga_id, canonical_id=None, mdex_id=None):
     db.execute(
         """
         DELETE FROM user_dnr
-        WHERE lower(user_id) = lower(?)
+        WHERE user_id = lower(?)
           AND (canonical_id = ? OR mdex_id = ? OR manga_id = ?)
         """,
         (user_id, canonical_id or manga_id, mdex_id or manga_id, manga_id),
     )
-    db.commit()
+    user_state_repo.bump_state(user_id)
+    commit(db)
+
+
+def remove_many(user_id, refs):
+    # Bulk `remove` for imports over (canonical_id, mdex_id) pairs.
+    db = get_db()
+    params = [(user_id, canonical_id, mdex_id or canonical_id, canonical_id) for canonical_id, mdex_id in refs]
+    if not params:
+        return
+    db.executemany(
+        """
+        DELETE FROM user_dnr
+        WHERE user_id = lower(?)
+          AND (canonical_id = ? OR mdex_id = ? OR manga_id = ?)
+        """,
+        params,
+    )
+    user_state_repo.bump_state(user_id)
+    commit(db)
 
 
 def list_manga_ids_by_user(user_id):
     # Return canonical-ish keys used by filtering/exclusion paths.
-    db = get_db()
+    db = get_read_db()
     cur = db.execute(
         """
-        SELECT COALESCE(d.canonical_id, mm.mangadex_id, d.mdex_id, d.manga_id) AS key
+        SELECT COALESCE(d.canonical_id, d.manga_id) AS key
         FROM user_dnr d
-        LEFT JOIN manga_map mm
-            ON mm.mal_id = COALESCE(
-                d.mal_id,
-                CASE WHEN d.mdex_id LIKE 'mal:%' THEN CAST(SUBSTR(d.mdex_id, 5) AS INTEGER) END
-            )
-        WHERE lower(d.user_id) = lower(?)
+        WHERE d.user_id = lower(?)
         """,
         (user_id,),
     )
     # Some legacy rows may resolve to null; skip them.
     return [row[0] for row in cur.fetchall() if row[0]]
+
+
+def list_manga_ids_by_users(user_ids):
+    # Batch variant of `list_manga_ids_by_user`; keys are lowercased user ids.
+    db = get_read_db()
+    ids = {}
+    wanted = list(dict.fromkeys(str(user_id).lower() for user_id in user_ids if user_id))
+    for chunk in chunked(wanted):
+        placeholders = ",".join("?" for _ in chunk)
+        cur = db.execute(
+            f"""
+            SELECT d.user_id AS owner,
+                   COALESCE(d.canonical_id, d.manga_id) AS key
+            FROM user_dnr d
+            WHERE d.user_id IN ({placeholders})
+            """,
+            chunk,
+        )
+        for owner, key in cur.fetchall():
+            if key:
+                ids.setdefault(owner, []).append(key)
+    return ids
@@ -1,28 +1,63 @@
 """Data-access helpers for manga search and identifier resolution."""
 
-from app.db import get_db
+import sqlite3
+
+from app.db import commit, get_db, get_read_db
 
 
 # Read-only lookup helpers for manga/title resolution.
+_SEARCH_COLUMNS_SQL = """
+    c.mangadex_id AS id,
+    c.mal_id,
+    c.title_name,
+    c.english_name,
+    c.japanese_name,
+    c.synonymns,
+    c.cover_url,
+    c.score,
+    c.genres,
+    c.themes,
+    c.item_type
+"""
+
+# Trigram tokens need at least three characters; shorter queries use the LIKE scan.
+_FTS_MIN_QUERY_LENGTH = 3
+
+
+def _fts_phrase(query):
+    # Quote the query as one FTS5 phrase so punctuation/operators are matched literally.
+    return '"' + query.replace('"', '""') + '"'
+
+
 def search_by_title(query, limit=10):
     # Broad match for UI search against common title fields.
-    db = get_db()
+    db = get_read_db()
+    if len(query) >= _FTS_MIN_QUERY_LENGTH:
+        try:
+            cur = db.execute(
+                f"""
+                SELECT {_SEARCH_COLUMNS_SQL}
+                FROM manga_title_fts f
+                JOIN manga_catalog c ON c.mangadex_id = f.mangadex_id
+                WHERE manga_title_fts MATCH ?
+                  -- Exclude stats-only pseudo rows; UI actions expect mdex-backed IDs.
+                  AND c.mangadex_id NOT LIKE 'mal:%'
+                -- bm25 is negative (lower is better); well-scored titles get up to a 50% boost.
+                ORDER BY bm25(manga_title_fts, 0.0, 4.0, 4.0, 3.0, 1.0) * (1.0 + COALESCE(c.score, 0) / 20.0)
+                LIMIT ?
+                """,
+                (_fts_phrase(query), limit),
+            )
+            return cur.fetchall()
+        except sqlite3.OperationalError:
+            # No FTS5 index on this database (older SQLite build); use the scan below.
+            pass
     # Wrap in '%' so SQLite LIKE matches anywhere in the field.
     like = f"%{query}%"
     cur = db.execute(
-        """
-        SELECT mangadex_id AS id,
-               mal_id,
-               title_name,
-               english_name,
-               japanese_name,
-               synonymns,
-               cover_url,
-               score,
-               genres,
-               themes,
-               item_type
-        FROM manga_merged
+        f"""
+        SELECT {_SEARCH_COLUMNS_SQL}
+        FROM manga_catalog c
         WHERE (title_name LIKE ? OR english_name LIKE ? OR japanese_name LIKE ? OR synonymns LIKE ?)
           -- Exclude stats-only pseudo rows; UI actions expect mdex-backed IDs.
           AND mangadex_id NOT LIKE 'mal:%'
@@ -37,9 +72,9 @@ def search_by_title(query, limit=10):
 
 def get_by_id(mangadex_id):
     # Primary details lookup from merged metadata view.
-    db = get_db()
+    db = get_read_db()
     cur = db.execute(
-        "SELECT * FROM manga_merged WHERE mangadex_id = ?",
+        "SELECT * FROM manga_catalog WHERE mangadex_id = ?",
         (mangadex_id,),
     )
     return cur.fetchone()
@@ -47,10 +82,10 @@ def get_by_id(mangadex_id):
 
 def get_by_title(title):
     # Exact title fallback when an ID is not available.
-    db = get_db()
+    db = get_read_db()
     cur = db.execute(
         """
-        SELECT * FROM manga_merged
+        SELECT * FROM manga_catalog
         WHERE title_name = ? OR english_name = ? OR japanese_name = ?
         """,
         (title, title, title),
@@ -60,7 +95,7 @@ def get_by_title(title):
 
 def get_stats_by_mal_id(mal_id):
     # Read raw MAL stats row for a specific MAL ID.
-    db = get_db()
+    db = get_read_db()
     cur = db.execute(
         """
         SELECT *
@@ -74,7 +109,7 @@ def get_stats_by_mal_id(mal_id):
 
 def get_stats_by_title(title):
     # Exact title fallback in stats-only table.
-    db = get_db()
+    db = get_read_db()
     cur = db.execute(
         """
         SELECT *
@@ -92,7 +127,7 @@ def resolve_manga_ref(manga_id):
     if not raw:
         return {"raw": raw, "canonical_id": None, "mdex_id": None, "mal_id": None}
 
-    db = get_db()
+    db = get_read_db()
 
     if raw.lower().startswith("mal:"):
         # Input is explicitly a MAL key.
@@ -112,7 +147,7 @@ def resolve_manga_ref(manga_id):
 
     # Input might already be a MangaDex ID.
     row = db.execute(
-        "SELECT mangadex_id, mal_id FROM manga_merged WHERE mangadex_id = ?",
+        "SELECT mangadex_id, mal_id FROM manga_catalog WHERE mangadex_id = ?",
         (raw,),
     ).fetchone()
     if row:
@@ -127,7 +162,7 @@ def resolve_manga_ref(manga_id):
     rows = db.execute(
         """
         SELECT mangadex_id, mal_id
-        FROM manga_merged
+        FROM manga_catalog
         WHERE title_name = ? OR english_name = ? OR japanese_name = ?
         -- Fetch at most 2 so we can cheaply detect ambiguity.
         LIMIT 2
@@ -167,3 +202,96 @@ def resolve_manga_ref(manga_id):
 
     # Unknown/ambiguous input: preserve raw value so callers can still store it.
     return {"raw": raw, "canonical_id": raw, "mdex_id": None, "mal_id": None}
+
+
+def _unique_title_matches(db, table, id_columns):
+    # raw -> first matching row for refs that match exactly one row of `table` by title.
+    selects = " UNION ".join(
+        f"SELECT r.raw, {id_columns} FROM temp.import_refs r JOIN {table} t ON t.{column} = r.raw"
+        for column in ("title_name", "english_name", "japanese_name")
+    )
+    rows = db.execute(
+        f"""
+        SELECT raw, MIN(key_a) AS key_a, MIN(key_b) AS key_b, COUNT(*) AS matches
+        FROM ({selects})
+        GROUP BY raw
+        """
+    ).fetchall()
+    return {row["raw"]: row for row in rows if row["matches"] == 1}
+
+
+def resolve_manga_refs(raw_values):
+    # Set-based `resolve_manga_ref` for bulk imports: same rules, a fixed number of
+    # queries per batch. Runs on the writer connection because it fills a temp table.
+    db = get_db()
+    refs = {}
+    mal_refs = {}
+    for value in raw_values:
+        raw = (value or "").strip()
+        if not raw or raw in refs:
+            continue
+        refs[raw] = {"raw": raw, "canonical_id": raw, "mdex_id": None, "mal_id": None}
+        if raw.lower().startswith("mal:"):
+            try:
+                mal_refs[raw] = int(raw.split(":", 1)[-1].strip())
+            except (TypeError, ValueError):
+                mal_refs[raw] = None
+    if not refs:
+        return refs
+
+    db.execute("CREATE TEMP TABLE IF NOT EXISTS import_refs (raw TEXT PRIMARY KEY, mal_key INTEGER)")
+    db.execute("DELETE FROM temp.import_refs")
+    db.executemany(
+        "INSERT INTO temp.import_refs (raw, mal_key) VALUES (?, ?)",
+        [(raw, mal_refs.get(raw)) for raw in refs],
+    )
+    try:
+        # Explicit MAL keys, mapped to MangaDex when a map row exists.
+        for raw, mal_id in mal_refs.items():
+            if mal_id is not None:
+                refs[raw].update(canonical_id=f"mal:{mal_id}", mal_id=mal_id)
+        for row in db.execute(
+            """
+            SELECT r.raw, MIN(m.mangadex_id) AS mangadex_id
+            FROM temp.import_refs r
+            JOIN manga_map m ON m.mal_id = r.mal_key
+            GROUP BY r.raw
+            """
+        ):
+            refs[row["raw"]].update(canonical_id=row["mangadex_id"], mdex_id=row["mangadex_id"])
+
+        pending = {raw for raw in refs if raw not in mal_refs}
+        # MangaDex ids already in the catalog.
+        for row in db.execute(
+            """
+            SELECT r.raw, c.mangadex_id, c.mal_id
+            FROM temp.import_refs r
+            JOIN manga_catalog c ON c.mangadex_id = r.raw
+            """
+        ):
+            if row["raw"] in pending:
+                refs[row["raw"]].update(canonical_id=row["mangadex_id"], mdex_id=row["mangadex_id"], mal_id=row["mal_id"])
+                pending.discard(row["raw"])
+
+        # Titles that name exactly one catalog row.
+        for raw, row in _unique_title_matches(db, "manga_catalog", "t.mangadex_id AS key_a, t.mal_id AS key_b").items():
+            if raw in pending:
+                refs[raw].update(canonical_id=row["key_a"], mdex_id=row["key_a"], mal_id=row["key_b"])
+                pending.discard(raw)
+
+        # Titles that name exactly one MAL stats row, mapped to MangaDex when possible.
+        stats_matches = _unique_title_matches(
+            db,
+            "manga_stats",
+            "t.mal_id AS key_a, (SELECT MIN(m.mangadex_id) FROM manga_map m WHERE m.mal_id = t.mal_id) AS key_b",
+        )
+        for raw, row in stats_matches.items():
+            if raw in pending:
+                mal_id, mdex_id = row["key_a"], row["key_b"]
+                refs[raw].update(canonical_id=mdex_id or f"mal:{mal_id}", mdex_id=mdex_id, mal_id=mal_id)
+                pending.discard(raw)
+    finally:
+        db.execute("DELETE FROM temp.import_refs")
+        # Temp-only writes; ending them here keeps no read snapshot open into later writes.
+        commit(db)
+    return refs
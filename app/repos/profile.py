@@ -1,6 +1,7 @@
 """Data-access helpers for user profile and preference persistence."""
 
-from app.db import get_db
+from app.db import chunked, commit, get_db, get_read_db
+from app.repos import user_state as user_state_repo
 from utils.parsing import parse_dict
 
 
@@ -16,14 +17,34 @@ def _coerce_counts(value):
 
 def get_profile(username):
     # Read and normalize profile payload for service/API layers.
-    db = get_db()
+    db = get_read_db()
     cur = db.execute(
-        "SELECT username, age, gender, language, ui_prefs, preferred_genres, preferred_themes, blacklist_genres, blacklist_themes FROM users WHERE lower(username) = lower(?)",
+        "SELECT username, age, gender, language, ui_prefs, preferred_genres, preferred_themes, blacklist_genres, blacklist_themes FROM users WHERE username = lower(?)",
         (username,),
     )
     row = cur.fetchone()
     if row is None:
         return None
+    return _profile_from_row(row)
+
+
+def get_profiles(usernames):
+    # Batch variant of `get_profile`; keys are lowercased usernames.
+    db = get_read_db()
+    profiles = {}
+    wanted = list(dict.fromkeys(str(name).lower() for name in usernames if name))
+    for chunk in chunked(wanted):
+        placeholders = ",".join("?" for _ in chunk)
+        cur = db.execute(
+            f"SELECT username, age, gender, language, ui_prefs, preferred_genres, preferred_themes, blacklist_genres, blacklist_themes FROM users WHERE username IN ({placeholders})",
+            chunk,
+        )
+        for row in cur.fetchall():
+            profiles.setdefault(row["username"].lower(), _profile_from_row(row))
+    return profiles
+
+
+def _profile_from_row(row):
     # `parse_dict` handles legacy stringified dicts and empty/null values.
     blacklist_genres = _coerce_counts(parse_dict(row["blacklist_genres"]))
     blacklist_themes = _coerce_counts(parse_dict(row["blacklist_themes"]))
@@ -44,52 +65,57 @@ def update_profile(username, age=None, gender=None, language=None):
     # Persist editable basic profile fields.
     db = get_db()
     db.execute(
-        "UPDATE users SET age = ?, gender = ?, language = ? WHERE lower(username) = lower(?)",
+        "UPDATE users SET age = ?, gender = ?, language = ? WHERE username = lower(?)",
         (age, gender, language, username),
     )
-    db.commit()
+    user_state_repo.bump_state(username)
+    commit(db)
 
 
 def update_username(old_username, new_username):
     # Keep user-owned rows connected when username changes.
     db = get_db()
     db.execute(
-        "UPDATE users SET username = ? WHERE lower(username) = lower(?)",
+        "UPDATE users SET username = ? WHERE username = lower(?)",
         (new_username, old_username),
     )
     # Update ownership across core user-content tables.
     db.execute(
-        "UPDATE user_ratings SET user_id = ? WHERE lower(user_id) = lower(?)",
+        "UPDATE user_ratings SET user_id = ? WHERE user_id = lower(?)",
         (new_username, old_username),
     )
     db.execute(
-        "UPDATE user_dnr SET user_id = ? WHERE lower(user_id) = lower(?)",
+        "UPDATE user_dnr SET user_id = ? WHERE user_id = lower(?)",
         (new_username, old_username),
     )
     db.execute(
-        "UPDATE user_reading_list SET user_id = ? WHERE lower(user_id) = lower(?)",
+        "UPDATE user_reading_list SET user_id = ? WHERE user_id = lower(?)",
         (new_username, old_username),
     )
     db.execute(
-        "UPDATE user_requests SET user_id = ? WHERE lower(user_id) = lower(?)",
+        "UPDATE user_requests SET user_id = ? WHERE user_id = lower(?)",
         (new_username, old_username),
     )
     db.execute(
-        "UPDATE user_request_cache SET user_id = ? WHERE lower(user_id) = lower(?)",
+        "UPDATE user_request_cache SET user_id = ? WHERE user_id = lower(?)",
         (new_username, old_username),
     )
-    db.commit()
+    # Ratings move between names, so both users' cached rating sums go stale.
+    user_state_repo.bump_ratings(old_username)
+    user_state_repo.bump_ratings(new_username)
+    commit(db)
 
 
 def set_preferences(username, preferred_genres, preferred_themes):
     # Store rolling preference counts from request history.
     db = get_db()
     db.execute(
-        "UPDATE users SET preferred_genres = ?, preferred_themes = ? WHERE lower(username) = lower(?)",
+        "UPDATE users SET preferred_genres = ?, preferred_themes = ? WHERE username = lower(?)",
         # Values are stored as Python-literal strings for compatibility with `parse_dict`.
         (str(preferred_genres), str(preferred_themes), username),
     )
-    db.commit()
+    user_state_repo.bump_state(username)
+    commit(db)
 
 
 def clear_preferences(username):
@@ -101,24 +127,26 @@ def clear_history(username):
     # Clear accumulated preference + blacklist history.
     db = get_db()
     db.execute(
-        "UPDATE users SET preferred_genres = ?, preferred_themes = ?, blacklist_genres = ?, blacklist_themes = ? WHERE lower(username) = lower(?)",
+        "UPDATE users SET preferred_genres = ?, preferred_themes = ?, blacklist_genres = ?, blacklist_themes = ? WHERE username = lower(?)",
         ("{}", "{}", "{}", "{}", username),
     )
-    db.commit()
+    user_state_repo.bump_state(username)
+    commit(db)
 
 
 def set_ui_prefs(username, ui_prefs):
     # Persist UI flags/toggles as a serialized mapping.
     db = get_db()
-    db.execute("UPDATE users SET ui_prefs = ? WHERE lower(username) = lower(?)", (str(ui_prefs), username))
-    db.commit()
+    db.execute("UPDATE users SET ui_prefs = ? WHERE username = lower(?)", (str(ui_prefs), username))
+    commit(db)
 
 
 def set_blacklist_history(username, blacklist_genres, blacklist_themes):
     # Persist rolling blacklist selections as count maps.
     db = get_db()
     db.execute(
-        "UPDATE users SET blacklist_genres = ?, blacklist_themes = ? WHERE lower(username) = lower(?)",
+        "UPDATE users SET blacklist_genres = ?, blacklist_themes = ? WHERE username = lower(?)",
         (str(blacklist_genres), str(blacklist_themes), username),
     )
-    db.commit()
+    user_state_repo.bump_state(username)
+    commit(db)
@@ -1,12 +1,14 @@
 """Data-access helpers for user rating records."""
 
-from app.db import get_db
+from app.db import chunked, commit, get_db, get_read_db
+from app.repos import user_features as user_features_repo
+from app.repos import user_state as user_state_repo
 
 
 # Ratings repository: read/write rating rows with canonical ID fallback logic.
 def list_by_user(user_id, sort="chron"):
     """Return by user for the current context."""
-    db = get_db()
+    db = get_read_db()
     # Sorting is selected from a fixed allowlist to keep SQL safe.
     order_sql = "ORDER BY r.created_at DESC"
 
@@ -19,29 +21,19 @@ def list_by_user(user_id, sort="chron"):
     elif sort == "chron":
         order_sql = "ORDER BY r.created_at DESC"
 
-    # Join map/merged tables so each stored key form still resolves to metadata.
+    # Ids are resolved at write time (or by the canonical-id backfill), so metadata is a
+    # primary-key lookup on the stored mdex_id, or the `mal:N` core row for MAL-only titles.
     cur = db.execute(
         f"""
         SELECT r.user_id, r.manga_id, r.rating, r.recommended_by_us, r.finished_reading, r.created_at,
                m.title_name, m.english_name, m.japanese_name, m.item_type, m.cover_url,
-               COALESCE(r.mal_id, mm.mal_id, m.mal_id) AS mal_id,
-               COALESCE(r.canonical_id, mm.mangadex_id, r.mdex_id, m.mangadex_id) AS mdex_id,
-               COALESCE(r.canonical_id, mm.mangadex_id, r.mdex_id, m.mangadex_id, r.manga_id) AS canonical_id
+               COALESCE(r.mal_id, mm.mal_id) AS mal_id,
+               COALESCE(r.canonical_id, r.mdex_id) AS mdex_id,
+               COALESCE(r.canonical_id, r.manga_id) AS canonical_id
         FROM user_ratings r
-        LEFT JOIN manga_map mm
-            ON mm.mal_id = COALESCE(
-                r.mal_id,
-                CASE WHEN r.mdex_id LIKE 'mal:%' THEN CAST(SUBSTR(r.mdex_id, 5) AS INTEGER) END
-            )
-        LEFT JOIN manga_merged m
-            ON m.mangadex_id = COALESCE(
-                CASE WHEN r.mdex_id LIKE 'mal:%' THEN mm.mangadex_id END,
-                r.mdex_id,
-                r.manga_id
-            )
-            OR (r.mdex_id IS NULL AND m.mangadex_id = r.manga_id)
-            OR (r.mdex_id IS NULL AND m.title_name = r.manga_id)
-        WHERE lower(r.user_id) = lower(?)
+        LEFT JOIN manga_core m ON m.id = COALESCE(r.mdex_id, r.canonical_id)
+        LEFT JOIN manga_map mm ON mm.mangadex_id = r.mdex_id
+        WHERE r.user_id = lower(?)
         {order_sql}
         """,
         (user_id,),
@@ -49,34 +41,84 @@ def list_by_user(user_id, sort="chron"):
     return cur.fetchall()
 
 
-def list_ratings_map(user_id):
-    # Return compact {canonical_key: rating} map used by recommender/UI.
-    db = get_db()
+def iter_export_rows(user_id=None, batch_size=500):
+    # Export rows (one user, or everyone when `user_id` is None), fetched `batch_size` at a time.
+    db = get_read_db()
+    where_sql = "WHERE r.user_id = lower(?)" if user_id is not None else ""
+    params = (user_id,) if user_id is not None else ()
     cur = db.execute(
-        """
-        SELECT COALESCE(r.canonical_id, mm.mangadex_id, r.mdex_id, m.mangadex_id, r.manga_id) AS key,
-               r.rating
+        f"""
+        SELECT r.user_id, r.manga_id, r.rating, r.recommended_by_us, r.finished_reading, r.created_at,
+               c.title_name,
+               COALESCE(r.mal_id, (SELECT MIN(mm.mal_id) FROM manga_map mm WHERE mm.mangadex_id = r.mdex_id)) AS mal_id,
+               r.mdex_id,
+               COALESCE(r.canonical_id, r.manga_id) AS canonical_id
         FROM user_ratings r
-        LEFT JOIN manga_map mm
-            ON mm.mal_id = COALESCE(
-                r.mal_id,
-                CASE WHEN r.mdex_id LIKE 'mal:%' THEN CAST(SUBSTR(r.mdex_id, 5) AS INTEGER) END
-            )
-        LEFT JOIN manga_merged m
-            ON m.mangadex_id = COALESCE(
-                CASE WHEN r.mdex_id LIKE 'mal:%' THEN mm.mangadex_id END,
-                r.mdex_id,
-                r.manga_id
-            )
-            OR (r.mdex_id IS NULL AND m.mangadex_id = r.manga_id)
-            OR (r.mdex_id IS NULL AND m.title_name = r.manga_id)
-        WHERE lower(r.user_id) = lower(?)
+        LEFT JOIN manga_catalog c ON c.mangadex_id = r.mdex_id
+        {where_sql}
+        ORDER BY r.user_id, r.created_at DESC
         """,
-        (user_id,),
+        params,
     )
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
+
+
+# The key the recommender uses for each rating row; canonical_id is resolved at write time.
+_RATING_KEY_SQL = """
+    SELECT COALESCE(r.canonical_id, r.manga_id) AS key,
+           r.rating
+    FROM user_ratings r
+    WHERE r.user_id = lower(?)
+"""
+
+
+def list_ratings_map(user_id):
+    # Return compact {canonical_key: rating} map used by recommender/UI.
+    db = get_read_db()
+    cur = db.execute(_RATING_KEY_SQL, (user_id,))
     return {row[0]: row[1] for row in cur.fetchall() if row[0]}
 
 
+def _matching_ratings(db, user_id, condition, params):
+    # (key, rating) pairs of the rows a single-title write touches.
+    cur = db.execute(_RATING_KEY_SQL + f"  AND {condition}", (user_id, *params))
+    return list({row[0]: row[1] for row in cur.fetchall() if row[0]}.items())
+
+
+def _record_rating_change(db, user_id, before, after):
+    # Bump the ratings version and move the cached affinity sums along with it.
+    expected_version = user_state_repo.get_ratings_version(user_id)
+    user_state_repo.bump_ratings(user_id)
+    user_features_repo.apply_rating_change(user_id, before, after, expected_version)
+
+
+def list_ratings_maps(user_ids):
+    # Batch variant of `list_ratings_map`; keys are lowercased user ids.
+    db = get_read_db()
+    maps = {}
+    wanted = list(dict.fromkeys(str(user_id).lower() for user_id in user_ids if user_id))
+    for chunk in chunked(wanted):
+        placeholders = ",".join("?" for _ in chunk)
+        cur = db.execute(
+            f"""
+            SELECT r.user_id AS owner,
+                   COALESCE(r.canonical_id, r.manga_id) AS key,
+                   r.rating
+            FROM user_ratings r
+            WHERE r.user_id IN ({placeholders})
+            """,
+            chunk,
+        )
+        for owner, key, rating in cur.fetchall():
+            if key:
+                maps.setdefault(owner, {})[key] = rating
+    return maps
+
+
 def upsert_rating(user_id, manga_id, rating, recommended_by_us, finished_reading, canonical_id=None, mdex_id=None, mal_id=None):
     # Find existing row even if caller sends a different key representation.
     db = get_db()
@@ -84,54 +126,116 @@ def upsert_rating(user_id, manga_id, rating, recommended_by_us, finished_reading
         """
         SELECT manga_id
         FROM user_ratings
-        WHERE lower(user_id) = lower(?)
+        WHERE user_id = lower(?)
           AND (canonical_id = ? OR mdex_id = ? OR manga_id = ?)
         """,
         (user_id, canonical_id or manga_id, mdex_id or manga_id, manga_id),
     ).fetchone()
     # Reuse existing primary-key value when found to avoid duplicates for same title.
     key = existing[0] if existing else (canonical_id or manga_id)
+    before = _matching_ratings(db, user_id, "r.manga_id = ?", (key,))
     # Maintain exactly one rating row per user/title key.
     db.execute(
         """
-        INSERT INTO user_ratings (user_id, manga_id, rating, recommended_by_us, finished_reading, mdex_id, mal_id, canonical_id)
-        VALUES (lower(?), ?, ?, ?, ?, ?, ?, ?)
+        INSERT INTO user_ratings (
+            user_id, manga_id, rating, recommended_by_us, finished_reading, mdex_id, mal_id, canonical_id, ids_resolved
+        )
+        VALUES (lower(?), ?, ?, ?, ?, ?, ?, ?, 1)
         ON CONFLICT(user_id, manga_id) DO UPDATE SET
             rating = excluded.rating,
             recommended_by_us = excluded.recommended_by_us,
             finished_reading = excluded.finished_reading,
             mdex_id = excluded.mdex_id,
             mal_id = excluded.mal_id,
-            canonical_id = excluded.canonical_id
+            canonical_id = excluded.canonical_id,
+            ids_resolved = 1
         """,
         # First value is lower-cased in SQL, others are payload fields in column order.
         (user_id, key, rating, recommended_by_us, finished_reading, mdex_id, mal_id, canonical_id),
     )
-    db.commit()
+    _record_rating_change(db, user_id, before, _matching_ratings(db, user_id, "r.manga_id = ?", (key,)))
+    commit(db)
+
+
+def upsert_ratings(user_id, rows):
+    # Bulk `upsert_rating` for imports; a None rating keeps the stored value.
+    db = get_db()
+    keys = {}
+    ratings = {}
+    # Same key matching as `upsert_rating`: any stored representation of the title.
+    for row in db.execute(
+        "SELECT manga_id, canonical_id, mdex_id, rating FROM user_ratings WHERE user_id = lower(?)",
+        (user_id,),
+    ):
+        ratings[row["manga_id"]] = row["rating"]
+        for column in ("manga_id", "mdex_id", "canonical_id"):
+            if row[column]:
+                keys[row[column]] = row["manga_id"]
+    params = []
+    for item in rows:
+        canonical_id = item["canonical_id"]
+        key = keys.get(canonical_id) or keys.get(item["mdex_id"] or canonical_id) or canonical_id
+        rating = item["rating"]
+        if rating is None:
+            rating = ratings.get(key)
+        keys[canonical_id] = key
+        ratings[key] = rating
+        params.append(
+            (
+                user_id, key, rating, item["recommended_by_us"], item["finished_reading"],
+                item["mdex_id"], item["mal_id"], canonical_id,
+            )
+        )
+    if not params:
+        return 0
+    db.executemany(
+        """
+        INSERT INTO user_ratings (
+            user_id, manga_id, rating, recommended_by_us, finished_reading, mdex_id, mal_id, canonical_id, ids_resolved
+        )
+        VALUES (lower(?), ?, ?, ?, ?, ?, ?, ?, 1)
+        ON CONFLICT(user_id, manga_id) DO UPDATE SET
+            rating = excluded.rating,
+            recommended_by_us = excluded.recommended_by_us,
+            finished_reading = excluded.finished_reading,
+            mdex_id = excluded.mdex_id,
+            mal_id = excluded.mal_id,
+            canonical_id = excluded.canonical_id,
+            ids_resolved = 1
+        """,
+        params,
+    )
+    user_state_repo.bump_ratings(user_id)
+    commit(db)
+    return len(params)
 
 
 def delete_rating(user_id, manga_id):
     # Delete by canonical/mdex/raw key to handle historical rows.
     db = get_db()
+    before = _matching_ratings(
+        db, user_id, "(r.canonical_id = ? OR r.mdex_id = ? OR r.manga_id = ?)", (manga_id, manga_id, manga_id)
+    )
     db.execute(
         """
         DELETE FROM user_ratings
-        WHERE lower(user_id) = lower(?)
+        WHERE user_id = lower(?)
           AND (canonical_id = ? OR mdex_id = ? OR manga_id = ?)
         """,
         (user_id, manga_id, manga_id, manga_id),
     )
-    db.commit()
+    _record_rating_change(db, user_id, before, [])
+    commit(db)
 
 
 def get_rating_value(user_id, manga_id):
     # Read existing rating value when toggling flags without resubmitting score.
-    db = get_db()
+    db = get_read_db()
     cur = db.execute(
         """
         SELECT rating
         FROM user_ratings
-        WHERE lower(user_id) = lower(?)
+        WHERE user_id = lower(?)
           AND (canonical_id = ? OR mdex_id = ? OR manga_id = ?)
         """,
         (user_id, manga_id, manga_id, manga_id),
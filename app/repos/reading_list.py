@@ -1,6 +1,7 @@
 """Data-access helpers for user reading-list records."""
 
-from app.db import get_db
+from app.db import chunked, commit, get_db, get_read_db
+from app.repos import user_state as user_state_repo
 
 
 # Reading-list repository with canonical ID matching across mdex/MAL/raw keys.
@@ -11,29 +12,19 @@ def list_by_user(user_id, sort="chron"):
         order_sql = "ORDER BY m.title_name COLLATE NOCASE ASC"
     elif sort == "chron":
         order_sql = "ORDER BY r.created_at DESC"
-    db = get_db()
-    # Join mapping + merged metadata so list rows can render titles/covers consistently.
+    db = get_read_db()
+    # Ids are resolved at write time (or by the canonical-id backfill), so metadata is a
+    # primary-key lookup on the stored mdex_id, or the `mal:N` core row for MAL-only titles.
     cur = db.execute(
         f"""
         SELECT r.user_id, r.manga_id, r.status, r.created_at, m.english_name, m.japanese_name, m.title_name, m.item_type, m.cover_url,
-               COALESCE(r.mal_id, mm.mal_id, m.mal_id) AS mal_id,
-               COALESCE(r.canonical_id, mm.mangadex_id, r.mdex_id, m.mangadex_id) AS mdex_id,
-               COALESCE(r.canonical_id, mm.mangadex_id, r.mdex_id, m.mangadex_id, r.manga_id) AS canonical_id
+               COALESCE(r.mal_id, mm.mal_id) AS mal_id,
+               COALESCE(r.canonical_id, r.mdex_id) AS mdex_id,
+               COALESCE(r.canonical_id, r.manga_id) AS canonical_id
         FROM user_reading_list r
-        LEFT JOIN manga_map mm
-            ON mm.mal_id = COALESCE(
-                r.mal_id,
-                CASE WHEN r.mdex_id LIKE 'mal:%' THEN CAST(SUBSTR(r.mdex_id, 5) AS INTEGER) END
-            )
-        LEFT JOIN manga_merged m
-            ON m.mangadex_id = COALESCE(
-                CASE WHEN r.mdex_id LIKE 'mal:%' THEN mm.mangadex_id END,
-                r.mdex_id,
-                r.manga_id
-            )
-            OR (r.mdex_id IS NULL AND m.mangadex_id = r.manga_id)
-            OR (r.mdex_id IS NULL AND m.title_name = r.manga_id)
-        WHERE lower(r.user_id) = lower(?)
+        LEFT JOIN manga_core m ON m.id = COALESCE(r.mdex_id, r.canonical_id)
+        LEFT JOIN manga_map mm ON mm.mangadex_id = r.mdex_id
+        WHERE r.user_id = lower(?)
         {order_sql}
         """,
         (user_id,),
@@ -47,17 +38,19 @@ def add(user_id, manga_id, status="Plan to Read", canonical_id=None, mdex_id=Non
     db.execute(
         """
         DELETE FROM user_reading_list
-        WHERE lower(user_id) = lower(?)
+        WHERE user_id = lower(?)
           AND (canonical_id = ? OR mdex_id = ? OR manga_id = ?)
         """,
         (user_id, canonical_id or manga_id, mdex_id or manga_id, manga_id),
     )
     db.execute(
         # `INSERT OR IGNORE` prevents duplicate PK inserts during concurrent calls.
-        "INSERT OR IGNORE INTO user_reading_list (user_id, manga_id, status, mdex_id, mal_id, canonical_id) VALUES (lower(?), ?, ?, ?, ?, ?)",
+        "INSERT OR IGNORE INTO user_reading_list (user_id, manga_id, status, mdex_id, mal_id, canonical_id, ids_resolved) "
+        "VALUES (lower(?), ?, ?, ?, ?, ?, 1)",
         (user_id, canonical_id or manga_id, status, mdex_id, mal_id, canonical_id),
     )
-    db.commit()
+    user_state_repo.bump_state(user_id)
+    commit(db)
 
 
 def remove(user_id, manga_id, canonical_id=None, mdex_id=None):
@@ -66,27 +59,41 @@ def remove(user_id, manga_id, canonical_id=None, mdex_id=None):
     db.execute(
         """
         DELETE FROM user_reading_list
-        WHERE lower(user_id) = lower(?)
+        WHERE user_id = lower(?)
           AND (canonical_id = ? OR mdex_id = ? OR manga_id = ?)
         """,
         (user_id, canonical_id or manga_id, mdex_id or manga_id, manga_id),
     )
-    db.commit()
+    user_state_repo.bump_state(user_id)
+    commit(db)
+
+
+def remove_many(user_id, refs):
+    # Bulk `remove` for imports over (canonical_id, mdex_id) pairs.
+    db = get_db()
+    params = [(user_id, canonical_id, mdex_id or canonical_id, canonical_id) for canonical_id, mdex_id in refs]
+    if not params:
+        return
+    db.executemany(
+        """
+        DELETE FROM user_reading_list
+        WHERE user_id = lower(?)
+          AND (canonical_id = ? OR mdex_id = ? OR manga_id = ?)
+        """,
+        params,
+    )
+    user_state_repo.bump_state(user_id)
+    commit(db)
 
 
 def list_manga_ids_by_user(user_id):
     # Return normalized key list for exclusion in recommendation flow.
-    db = get_db()
+    db = get_read_db()
     cur = db.execute(
         """
-        SELECT COALESCE(r.canonical_id, mm.mangadex_id, r.mdex_id, r.manga_id) AS key
+        SELECT COALESCE(r.canonical_id, r.manga_id) AS key
         FROM user_reading_list r
-        LEFT JOIN manga_map mm
-            ON mm.mal_id = COALESCE(
-                r.mal_id,
-                CASE WHEN r.mdex_id LIKE 'mal:%' THEN CAST(SUBSTR(r.mdex_id, 5) AS INTEGER) END
-            )
-        WHERE lower(r.user_id) = lower(?)
+        WHERE r.user_id = lower(?)
         """,
         (user_id,),
     )
@@ -94,6 +101,28 @@ def list_manga_ids_by_user(user_id):
     return [row[0] for row in cur.fetchall() if row[0]]
 
 
+def list_manga_ids_by_users(user_ids):
+    # Batch variant of `list_manga_ids_by_user`; keys are lowercased user ids.
+    db = get_read_db()
+    ids = {}
+    wanted = list(dict.fromkeys(str(user_id).lower() for user_id in user_ids if user_id))
+    for chunk in chunked(wanted):
+        placeholders = ",".join("?" for _ in chunk)
+        cur = db.execute(
+            f"""
+            SELECT r.user_id AS owner,
+                   COALESCE(r.canonical_id, r.manga_id) AS key
+            FROM user_reading_list r
+            WHERE r.user_id IN ({placeholders})
+            """,
+            chunk,
+        )
+        for owner, key in cur.fetchall():
+            if key:
+                ids.setdefault(owner, []).append(key)
+    return ids
+
+
 def update_status(user_id, manga_id, status, canonical_id=None, mdex_id=None, mal_id=None):
     # Update status and backfill IDs if a better key is now available.
     db = get_db()
@@ -102,7 +131,7 @@ def update_status(user_id, manga_id, status, canonical_id=None, mdex_id=None, ma
         UPDATE user_reading_list
         -- Preserve existing mal_id/canonical_id when already populated.
         SET status = ?, mdex_id = ?, mal_id = COALESCE(mal_id, ?), canonical_id = COALESCE(canonical_id, ?)
-        WHERE lower(user_id) = lower(?)
+        WHERE user_id = lower(?)
           AND (canonical_id = ? OR mdex_id = ? OR manga_id = ?)
         """,
         (
@@ -116,4 +145,5 @@ def update_status(user_id, manga_id, status, canonical_id=None, mdex_id=None, ma
             manga_id,
         ),
     )
-    db.commit()
+    user_state_repo.bump_state(user_id)
+    commit(db)
@@ -0,0 +1,75 @@
+"""Data-access helpers for materialised per-user recommendation results."""
+
+import json
+import time
+
+from app import write_queue
+from app.db import get_read_db
+
+
+# Recommendation cache repository: one row per user + request-parameter hash.
+def get_cached(user_id, params_hash, catalog_fingerprint, state_version, max_age):
+    # Single primary-key read; rows from another catalog or user state version,
+    # or past their TTL, count as misses.
+    db = get_read_db()
+    row = db.execute(
+        """
+        SELECT catalog_fingerprint, state_version, payload, used_current, created_at
+        FROM user_recommendation_cache
+        WHERE user_id = lower(?) AND params_hash = ?
+        """,
+        (user_id, params_hash),
+    ).fetchone()
+    if row is None or row["catalog_fingerprint"] != catalog_fingerprint:
+        return None
+    if row["state_version"] != state_version:
+        return None
+    if max_age is not None and time.time() - float(row["created_at"]) > max_age:
+        return None
+    try:
+        payload = json.loads(row["payload"])
+    except (TypeError, ValueError):
+        return None
+    return payload, bool(row["used_current"])
+
+
+def store(user_id, params_hash, catalog_fingerprint, state_version, payload, used_current):
+    # Replace any earlier result for the same request shape. Goes through the writer
+    # queue so result writes from many users share commits.
+    write_queue.run_write(
+        _store, user_id, params_hash, catalog_fingerprint, state_version, payload, used_current
+    )
+
+
+def _store(db, user_id, params_hash, catalog_fingerprint, state_version, payload, used_current):
+    db.execute(
+        """
+        INSERT INTO user_recommendation_cache (
+            user_id, params_hash, catalog_fingerprint, state_version, payload, used_current, created_at
+        )
+        VALUES (lower(?), ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(user_id, params_hash) DO UPDATE SET
+            catalog_fingerprint = excluded.catalog_fingerprint,
+            state_version = excluded.state_version,
+            payload = excluded.payload,
+            used_current = excluded.used_current,
+            created_at = excluded.created_at
+        """,
+        (
+            user_id,
+            params_hash,
+            catalog_fingerprint,
+            state_version,
+            json.dumps(payload, default=str),
+            1 if used_current else 0,
+            time.time(),
+        ),
+    )
+    # Rows computed against an older catalog or user state can never be served again.
+    db.execute(
+        """
+        DELETE FROM user_recommendation_cache
+        WHERE user_id = lower(?) AND (catalog_fingerprint != ? OR state_version != ?)
+        """,
+        (user_id, catalog_fingerprint, state_version),
+    )
@@ -0,0 +1,149 @@
+"""Data-access helpers for cached per-user rating affinity sums."""
+
+import json
+
+from app.db import chunked, commit, get_db, get_read_db
+from recommender.scoring import rating_weight_v1, rating_weight_v2
+from utils.parsing import parse_list
+
+# Sums this close to zero are what is left after a title's contribution is removed.
+_ZERO_EPSILON = 1e-12
+
+
+# User feature repository: one JSON row of label-keyed rating sums per user.
+def get_features(user_id):
+    # Single primary-key read; returns (ratings_version, catalog_fingerprint, sums) or None.
+    db = get_read_db()
+    row = db.execute(
+        "SELECT ratings_version, catalog_fingerprint, payload FROM user_feature_cache WHERE user_id = lower(?)",
+        ((user_id or "").strip(),),
+    ).fetchone()
+    if row is None:
+        return None
+    try:
+        sums = json.loads(row["payload"])
+    except (TypeError, ValueError):
+        return None
+    return int(row["ratings_version"] or 0), row["catalog_fingerprint"], sums
+
+
+def get_features_many(user_ids):
+    # Batch variant of `get_features`; keys are lowercased user ids, missing users are absent.
+    db = get_read_db()
+    found = {}
+    wanted = list(dict.fromkeys(str(user_id).strip().lower() for user_id in user_ids if user_id))
+    for chunk in chunked(wanted):
+        placeholders = ",".join("?" for _ in chunk)
+        cur = db.execute(
+            f"""
+            SELECT user_id, ratings_version, catalog_fingerprint, payload
+            FROM user_feature_cache
+            WHERE user_id IN ({placeholders})
+            """,
+            chunk,
+        )
+        for row in cur.fetchall():
+            try:
+                sums = json.loads(row["payload"])
+            except (TypeError, ValueError):
+                continue
+            found[row["user_id"]] = (int(row["ratings_version"] or 0), row["catalog_fingerprint"], sums)
+    return found
+
+
+def store_features(user_id, ratings_version, catalog_fingerprint, sums):
+    # Full recompute result; replaces whatever was stored for the user.
+    db = get_db()
+    db.execute(
+        """
+        INSERT INTO user_feature_cache (user_id, ratings_version, catalog_fingerprint, payload, updated_at)
+        VALUES (lower(?), ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(user_id) DO UPDATE SET
+            ratings_version = excluded.ratings_version,
+            catalog_fingerprint = excluded.catalog_fingerprint,
+            payload = excluded.payload,
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        ((user_id or "").strip(), ratings_version, catalog_fingerprint, json.dumps(sums)),
+    )
+    commit(db)
+
+
+def _title_tags(db, manga_id):
+    # Same source and parsing as the recommendation catalog cache.
+    row = db.execute(
+        """
+        SELECT genres, themes
+        FROM manga_catalog
+        WHERE mangadex_id = ? AND mangadex_id NOT LIKE 'mal:%'
+        """,
+        (manga_id,),
+    ).fetchone()
+    if row is None:
+        return None
+    genres = list(dict.fromkeys(parse_list(row[0])))
+    themes = list(dict.fromkeys(parse_list(row[1])))
+    return genres, themes
+
+
+def _add_weight(bucket, labels, weight):
+    # One title spreads its weight evenly over its distinct labels.
+    if not labels:
+        return
+    share = weight / len(labels)
+    for label in labels:
+        value = bucket.get(label, 0.0) + share
+        if abs(value) < _ZERO_EPSILON:
+            bucket.pop(label, None)
+        else:
+            bucket[label] = value
+
+
+def _apply_rating(db, sums, manga_id, rating, sign):
+    v1_weight = rating_weight_v1(rating)
+    v2_weight = rating_weight_v2(rating)
+    if v1_weight is None:
+        return
+    v1 = sums.setdefault("v1", {})
+    v2 = sums.setdefault("v2", {})
+    # Ratings count toward the v1 mean even when their title is not in the catalog.
+    v1["rated_count"] = int(v1.get("rated_count") or 0) + sign
+    tags = _title_tags(db, manga_id)
+    if tags is None:
+        return
+    genres, themes = tags
+    _add_weight(v1.setdefault("genres", {}), genres, sign * v1_weight)
+    _add_weight(v1.setdefault("themes", {}), themes, sign * v1_weight)
+    if v2_weight is not None:
+        _add_weight(v2.setdefault("genres", {}), genres, sign * v2_weight)
+        _add_weight(v2.setdefault("themes", {}), themes, sign * v2_weight)
+
+
+def apply_rating_change(user_id, before, after, expected_version):
+    # Subtract the old (key, rating) contributions and add the new ones. Runs on the
+    # caller's connection without committing, next to the rating write it mirrors.
+    # Rows that are missing or not at `expected_version` are left for a full recompute.
+    db = get_db()
+    row = db.execute(
+        "SELECT ratings_version, payload FROM user_feature_cache WHERE user_id = lower(?)",
+        ((user_id or "").strip(),),
+    ).fetchone()
+    if row is None or int(row["ratings_version"] or 0) != expected_version:
+        return False
+    try:
+        sums = json.loads(row["payload"])
+    except (TypeError, ValueError):
+        return False
+    for manga_id, rating in before:
+        _apply_rating(db, sums, manga_id, rating, -1)
+    for manga_id, rating in after:
+        _apply_rating(db, sums, manga_id, rating, 1)
+    cur = db.execute(
+        """
+        UPDATE user_feature_cache
+        SET ratings_version = ?, payload = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE user_id = lower(?) AND ratings_version = ?
+        """,
+        (expected_version + 1, json.dumps(sums), (user_id or "").strip(), expected_version),
+    )
+    return cur.rowcount > 0
@@ -0,0 +1,89 @@
+"""Data-access helpers for per-user state version counters."""
+
+from app.db import chunked, get_db, get_read_db
+
+
+# User state repository: monotonically increasing counters bumped by write paths.
+def _bump(user_id, *columns, db=None):
+    # Runs on the caller's connection without committing, so the bump lands in the
+    # same transaction as the write it describes.
+    db = db or get_db()
+    db.execute(
+        f"""
+        INSERT INTO user_state (user_id, {", ".join(columns)}, updated_at)
+        VALUES (lower(?), {", ".join("1" for _ in columns)}, CURRENT_TIMESTAMP)
+        ON CONFLICT(user_id) DO UPDATE SET
+            {", ".join(f"{column} = {column} + 1" for column in columns)},
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        ((user_id or "").strip(),),
+    )
+
+
+def bump_state(user_id):
+    # Ratings, DNR, reading-list and profile writes.
+    _bump(user_id, "state_version")
+
+
+def bump_ratings(user_id):
+    # Rating writes: they change the user's state and their rating affinity sums.
+    _bump(user_id, "state_version", "ratings_version")
+
+
+def bump_history(user_id, db=None):
+    # Rolling request-history writes; `db` is the writer-queue connection.
+    _bump(user_id, "history_version", db=db)
+
+
+def get_versions(user_id):
+    # One primary-key read; users that never wrote anything are at version 0.
+    db = get_read_db()
+    row = db.execute(
+        "SELECT state_version, history_version FROM user_state WHERE user_id = lower(?)",
+        ((user_id or "").strip(),),
+    ).fetchone()
+    if row is None:
+        return 0, 0
+    return int(row[0] or 0), int(row[1] or 0)
+
+
+def get_versions_many(user_ids):
+    # Batch variant of `get_versions`; keys are lowercased user ids.
+    db = get_read_db()
+    versions = {}
+    wanted = list(dict.fromkeys(str(user_id).strip().lower() for user_id in user_ids if user_id))
+    for chunk in chunked(wanted):
+        placeholders = ",".join("?" for _ in chunk)
+        cur = db.execute(
+            f"SELECT user_id, state_version, history_version FROM user_state WHERE user_id IN ({placeholders})",
+            chunk,
+        )
+        for user_id, state_version, history_version in cur.fetchall():
+            versions[user_id] = (int(state_version or 0), int(history_version or 0))
+    return {user_id: versions.get(user_id, (0, 0)) for user_id in wanted}
+
+
+def get_ratings_version(user_id):
+    # Version of the user's ratings as seen by `user_feature_cache`.
+    db = get_read_db()
+    row = db.execute(
+        "SELECT ratings_version FROM user_state WHERE user_id = lower(?)",
+        ((user_id or "").strip(),),
+    ).fetchone()
+    return int(row[0] or 0) if row else 0
+
+
+def get_ratings_versions_many(user_ids):
+    # Batch variant of `get_ratings_version`; keys are lowercased user ids.
+    db = get_read_db()
+    versions = {}
+    wanted = list(dict.fromkeys(str(user_id).strip().lower() for user_id in user_ids if user_id))
+    for chunk in chunked(wanted):
+        placeholders = ",".join("?" for _ in chunk)
+        cur = db.execute(
+            f"SELECT user_id, ratings_version FROM user_state WHERE user_id IN ({placeholders})",
+            chunk,
+        )
+        for user_id, ratings_version in cur.fetchall():
+            versions[user_id] = int(ratings_version or 0)
+    return {user_id: versions.get(user_id, 0) for user_id in wanted}
@@ -1,13 +1,14 @@
 """Data-access helpers for user account rows."""
 
-from app.db import get_db
+from app.db import commit, get_db, get_read_db
+from app.repos import user_state as user_state_repo
 
 
 # User repository: credential row reads/writes in the users table.
 def get_by_username(username):
     # Case-insensitive fetch so login normalization is resilient.
-    db = get_db()
-    cur = db.execute("SELECT * FROM users WHERE lower(username) = lower(?)", (username,))
+    db = get_read_db()
+    cur = db.execute("SELECT * FROM users WHERE username = lower(?)", (username,))
     return cur.fetchone()
 
 
@@ -24,7 +25,7 @@ def is_admin(username):
 
 def has_any_admin():
     # Used for first-admin bootstrap gating.
-    db = get_db()
+    db = get_read_db()
     row = db.execute("SELECT 1 FROM users WHERE COALESCE(is_admin, 0) = 1 LIMIT 1").fetchone()
     return bool(row)
 
@@ -41,33 +42,36 @@ def create_user(username, password_hash, age=None, gender=None, language="Englis
         # Initialize map-like columns as "{}" so parse helpers return dicts consistently.
         (username, age, gender, language, ui_prefs, "{}", "{}", "{}", "{}", password_hash, 1 if is_admin else 0),
     )
-    db.commit()
+    commit(db)
 
 
 def set_password_hash(username, password_hash):
     # Update stored password hash for existing user.
     db = get_db()
-    db.execute("UPDATE users SET password_hash = ? WHERE lower(username) = lower(?)", (password_hash, username))
-    db.commit()
+    db.execute("UPDATE users SET password_hash = ? WHERE username = lower(?)", (password_hash, username))
+    commit(db)
 
 
 def set_admin(username, is_admin_flag=True):
     # Explicit role assignment for admin bootstrap and management operations.
     db = get_db()
     db.execute(
-        "UPDATE users SET is_admin = ? WHERE lower(username) = lower(?)",
+        "UPDATE users SET is_admin = ? WHERE username = lower(?)",
         (1 if is_admin_flag else 0, username),
     )
-    db.commit()
+    commit(db)
 
 
 def delete_user(username):
     # Explicit delete policy: full cascade cleanup across all user-owned tables.
     db = get_db()
-    db.execute("DELETE FROM user_ratings WHERE lower(user_id) = lower(?)", (username,))
-    db.execute("DELETE FROM user_dnr WHERE lower(user_id) = lower(?)", (username,))
-    db.execute("DELETE FROM user_reading_list WHERE lower(user_id) = lower(?)", (username,))
-    db.execute("DELETE FROM user_requests WHERE lower(user_id) = lower(?)", (username,))
-    db.execute("DELETE FROM user_request_cache WHERE lower(user_id) = lower(?)", (username,))
-    db.execute("DELETE FROM users WHERE lower(username) = lower(?)", (username,))
-    db.commit()
+    db.execute("DELETE FROM user_ratings WHERE user_id = lower(?)", (username,))
+    db.execute("DELETE FROM user_dnr WHERE user_id = lower(?)", (username,))
+    db.execute("DELETE FROM user_reading_list WHERE user_id = lower(?)", (username,))
+    db.execute("DELETE FROM user_requests WHERE user_id = lower(?)", (username,))
+    db.execute("DELETE FROM user_request_cache WHERE user_id = lower(?)", (username,))
+    db.execute("DELETE FROM user_recommendation_cache WHERE user_id = lower(?)", (username,))
+    db.execute("DELETE FROM user_feature_cache WHERE user_id = lower(?)", (username,))
+    db.execute("DELETE FROM users WHERE username = lower(?)", (username,))
+    user_state_repo.bump_state(username)
+    commit(db)
@@ -1,19 +1,24 @@
 """REST API routes for profile, library management, and recommendations."""
 
 from functools import wraps
-import re
 
-import csv
 import io
 
-from flask import Blueprint, jsonify, request, session, current_app, Response
+from flask import Blueprint, jsonify, request, session, current_app, Response, stream_with_context
 
+from app import write_queue
+from app.db import pool_stats as db_pool_stats
+from app.services import browse as browse_service
 from app.services import ratings as ratings_service
+from app.services import ratings_export as ratings_export_service
+from app.services import ratings_import as ratings_import_service
 from app.services import recommendations as rec_service
-from utils.parsing import parse_list
 from app.services import profile as profile_service
 from app.services import dnr as dnr_service
+from app.services import display_titles
 from app.services import reading_list as reading_list_service
+from app.services import stats_names as stats_names_service
+from app.services import title_match as title_match_service
 from app.repos import manga as manga_repo
 from app.repos import users as users_repo
 
@@ -63,100 +68,32 @@ def _get_value(row, key):
         return row[key] if hasattr(row, "keys") and key in row.keys() else None
 
 
-_STATS_NAME_CACHE = {}
-
-
-def _normalize_text(value):
-    """Normalize text for consistent comparisons."""
-    if value is None:
-        return ""
-    return re.sub(r"\s+", " ", str(value)).strip().lower()
-
-
-def _english_like(value):
-    """Handle english like for this module."""
-    if not value:
-        return False
-    latin = 0
-    nonlatin = 0
-    for ch in str(value):
-        if ch.isalpha():
-            if ord(ch) < 128:
-                latin += 1
-            else:
-                nonlatin += 1
-    return latin > 0 and nonlatin == 0
-
-
-def _best_english_synonym(synonyms, title):
-    """Handle best english synonym for this module."""
-    if not synonyms:
-        return None
-    title_norm = _normalize_text(title)
-    best = None
-    best_key = None
-    for raw in synonyms:
-        candidate = str(raw).strip()
-        if not candidate:
-            continue
-        if title_norm and _normalize_text(candidate) == title_norm:
-            continue
-        if not _english_like(candidate):
-            continue
-        key = (_variant_score(candidate), len(candidate))
-        if best is None or key < best_key:
-            best = candidate
-            best_key = key
-    return best
-
-
-def _stats_english_name(mal_id):
-    """Handle stats english name for this module."""
-    if not mal_id:
-        return None
-    try:
-        mal_id = int(mal_id)
-    except Exception:
-        return None
-    cached = _STATS_NAME_CACHE.get(mal_id)
-    if cached is not None:
-        return cached
-    row = manga_repo.get_stats_by_mal_id(mal_id)
-    name = None
-    if row:
-        try:
-            name = row.get("english_name")
-        except AttributeError:
-            name = row["english_name"] if "english_name" in row.keys() else None
-    _STATS_NAME_CACHE[mal_id] = name
-    return name
-
-
 def _display_title(row, language):
-    """Handle display title for this module."""
+    """Display title for a response row, preferring the precomputed catalog columns."""
+    precomputed = _get_value(row, "display_title_ja" if language == "Japanese" else "display_title_en")
+    if precomputed:
+        return precomputed
+    for key in ("id", "canonical_id", "mdex_id", "manga_id"):
+        manga_id = _get_value(row, key)
+        if not manga_id:
+            continue
+        cached = rec_service.catalog_display_title(current_app.config["DATABASE"], manga_id, language)
+        if cached:
+            return cached
+    # Rows outside the catalog cache (e.g. MAL-only entries) are resolved one by one.
     title = (
         _get_value(row, "title_name")
         or _get_value(row, "title")
         or _get_value(row, "manga_id")
         or _get_value(row, "id")
     )
-    if language == "Japanese":
-        return _get_value(row, "japanese_name") or title
     english = _get_value(row, "english_name")
-    # Preserve variant-specific English names (e.g., Official Colored) over MAL base title
-    if english and _variant_score(english) > 0:
-        return english
-    stats_name = _stats_english_name(_get_value(row, "mal_id"))
-    if stats_name:
-        return stats_name
-    if english and _normalize_text(english) != _normalize_text(title):
-        return english
-    synonyms = parse_list(_get_value(row, "synonymns"))
-    synonym_pick = _best_english_synonym(synonyms, title)
-    if synonym_pick:
-        return synonym_pick
-    return english or title
-
+    stats_name = None
+    if language != "Japanese" and not (english and display_titles.variant_score(english) > 0):
+        stats_name = stats_names_service.english_name(current_app.config["DATABASE"], _get_value(row, "mal_id"))
+    return display_titles.pick_display_title(
+        title, english, _get_value(row, "japanese_name"), _get_value(row, "synonymns"), stats_name, language
+    )
 
 
 def _sanitize_item(item):
@@ -188,30 +125,11 @@ def _parse_bool(value, default=False):
     return str(value).strip().lower() in {"1", "true", "yes", "on"}
 
 
-_VARIANT_RE = re.compile(
-    r"(official|digital|full)?\s*colou?r(ed)?|omnibus|deluxe|kanzenban|special\\s+edition|complete\\s+edition|collector",
-    re.I,
-)
-
-
-def _variant_score(title):
-    """Handle variant score for this module."""
-    if not title:
-        return 1
-    text = str(title).lower()
-    score = 0
-    if _VARIANT_RE.search(text):
-        score += 2
-    if "(" in text and ")" in text:
-        score += 1
-    return score
-
-
 def _dedupe_by_mal_id(items, query=None, limit=None):
     """Deduplicate rows in by mal id and keep the best record."""
     if not items:
         return items
-    if query and _VARIANT_RE.search(str(query).lower()):
+    if query and display_titles.VARIANT_RE.search(str(query).lower()):
         return items[:limit] if limit else items
 
     groups = {}
@@ -227,7 +145,7 @@ def _dedupe_by_mal_id(items, query=None, limit=None):
         best = min(
             group,
             key=lambda pair: (
-                _variant_score(pair[1].get("display_title") or pair[1].get("title") or ""),
+                display_titles.variant_score(pair[1].get("display_title") or pair[1].get("title") or ""),
                 len(pair[1].get("display_title") or pair[1].get("title") or ""),
             ),
         )
@@ -538,6 +456,9 @@ def search_manga():
         return jsonify({"items": []})
 
     rows = manga_repo.search_by_title(query, limit=20)
+    if not rows:
+        # Nothing contains the query verbatim; try near-miss titles (typos, missing words).
+        rows = title_match_service.search_rows(current_app.config["DATABASE"], query, limit=20)
     profile = profile_service.get_profile(session["user_id"])
     language = (profile or {}).get("language") or "English"
     payload = [
@@ -560,6 +481,22 @@ def search_manga():
     return jsonify({"items": payload})
 
 
+@api_bp.get("/manga/suggest")
+@login_required
+def suggest_manga():
+    """Return prefix typeahead suggestions from the in-memory catalog index."""
+    query = (request.args.get("q") or "").strip()
+    if not query:
+        return jsonify({"items": []})
+    profile = profile_service.get_profile(session["user_id"])
+    language = (profile or {}).get("language") or "English"
+    # Over-fetch so collapsing MAL duplicates still leaves a full list.
+    items = rec_service.suggest_titles(
+        current_app.config["DATABASE"], query, limit=24, language=language
+    )
+    return jsonify({"items": _dedupe_by_mal_id(items, query=query, limit=8)})
+
+
 @api_bp.get("/manga/browse")
 @login_required
 def browse_manga():
@@ -585,61 +522,38 @@ def browse_manga():
         except (TypeError, ValueError):
             min_score_val = None
 
-    # Reuse cached dataframe instead of reloading manga_merged on every browse request.
-    cache = rec_service._get_cache(current_app.config["DATABASE"])
-    df = cache["df"].copy()
-
-    # Keep this path tolerant if cached values ever arrive as serialized strings.
-    df["genres"] = df["genres"].apply(lambda value: value if isinstance(value, list) else parse_list(value))
-    df["themes"] = df["themes"].apply(lambda value: value if isinstance(value, list) else parse_list(value))
-
-    if genres:
-        df = df[df["genres"].apply(lambda values: any(g in values for g in genres))]
-    if themes:
-        df = df[df["themes"].apply(lambda values: any(t in values for t in themes))]
-
-    if content_types:
-        allowed = {str(t).strip() for t in content_types if str(t).strip()}
-        if allowed:
-            df = df[df["item_type"].isin(allowed)]
-
-    if min_score_val is not None:
-        df = df[df["score"].fillna(0) >= min_score_val]
-
-    if status:
-        df = df[df["status"].fillna("").str.lower() == status.lower()]
-
-    sort_map = {
-        "popularity": ("popularity", True),
-        "score": ("score", False),
-        "members": ("members", False),
-        "favorited": ("favorited", False),
-    }
-    sort_key, ascending = sort_map.get(sort, ("popularity", True))
-    if sort_key in df.columns:
-        df = df.sort_values(by=sort_key, ascending=ascending, na_position="last")
+    # Masks and sort permutations over the cached catalog; no per-request DataFrame work.
+    rows = browse_service.browse_rows(
+        current_app.config["DATABASE"],
+        sort=sort,
+        genres=genres,
+        themes=themes,
+        content_types=content_types,
+        status=status,
+        min_score=min_score_val,
+        limit=limit * 3,
+    )
 
     profile = profile_service.get_profile(session["user_id"])
     language = (profile or {}).get("language") or "English"
 
     payload = []
-    sample_limit = min(len(df), limit * 3)
-    for _, row in df.head(sample_limit).iterrows():
+    for row in rows:
         item = {
-            "id": row.get("id"),
-            "mal_id": row.get("mal_id"),
-            "title": row.get("title_name"),
+            "id": row["id"],
+            "mal_id": row["mal_id"],
+            "title": row["title_name"],
             "display_title": _display_title(row, language),
-            "english_name": row.get("english_name"),
-            "japanese_name": row.get("japanese_name"),
-            "cover_url": row.get("cover_url"),
-            "item_type": row.get("item_type"),
-            "score": row.get("score"),
-            "popularity": row.get("popularity"),
-            "members": row.get("members"),
-            "favorited": row.get("favorited"),
-            "genres": row.get("genres"),
-            "themes": row.get("themes"),
+            "english_name": row["english_name"],
+            "japanese_name": row["japanese_name"],
+            "cover_url": row["cover_url"],
+            "item_type": row["item_type"],
+            "score": row["score"],
+            "popularity": row["popularity"],
+            "members": row["members"],
+            "favorited": row["favorited"],
+            "genres": row["genres"],
+            "themes": row["themes"],
         }
         payload.append(_sanitize_item(item))
 
@@ -701,20 +615,33 @@ def admin_switch_user():
 @api_bp.get("/admin/ratings/export")
 @admin_required
 def admin_export_ratings():
-    """Handle admin export ratings for this module."""
-    user_id = session["user_id"]
-    rows = ratings_service.list_ratings(user_id, sort="chron")
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["manga_id", "rating"])  # header line
-    for row in rows:
-        manga_id = _get_value(row, "mdex_id") or _get_value(row, "mangadex_id") or row["manga_id"]
-        writer.writerow([manga_id, row["rating"]])
-    csv_data = output.getvalue()
+    """Stream the current user's ratings (or everyone's with `?all=1`) as CSV, JSONL or MAL XML."""
+    fmt = (request.args.get("format") or "csv").strip().lower()
+    if fmt not in ratings_export_service.FORMATS:
+        return jsonify({"error": "format must be one of: " + ", ".join(ratings_export_service.FORMATS)}), 400
+    all_users = (request.args.get("all") or "").lower() in {"1", "true"}
+    mimetype, extension = ratings_export_service.FORMATS[fmt]
+    filename = f"ratings-all.{extension}" if all_users else f"ratings.{extension}"
+    chunks = ratings_export_service.export_chunks(fmt, None if all_users else session["user_id"])
     return Response(
-        csv_data,
-        mimetype="text/csv",
-        headers={"Content-Disposition": "attachment; filename=ratings.csv"},
+        # Keep the request context (and its read connection) alive while the body streams.
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@api_bp.get("/admin/cache-stats")
+@admin_required
+def admin_cache_stats():
+    """Report result-cache, stats-name, connection-pool and writer-queue counters for this worker."""
+    return jsonify(
+        {
+            "result_cache": rec_service.result_cache_stats(),
+            "stats_names": stats_names_service.cache_stats(),
+            "db_pool": db_pool_stats(),
+            "write_queue": write_queue.queue_stats(),
+        }
     )
 
 
@@ -723,23 +650,36 @@ def admin_export_ratings():
 def admin_import_ratings():
     """Handle admin import ratings for this module."""
     user_id = session["user_id"]
-    data = request.get_json(silent=True) or {}
+    upload = request.files.get("file")
+    data = {} if upload else (request.get_json(silent=True) or {})
     csv_text = data.get("csv") or ""
-    if not csv_text.strip():
+    if upload is None and not csv_text.strip():
         return jsonify({"error": "csv required"}), 400
 
-    reader = csv.DictReader(io.StringIO(csv_text))
-    count = 0
-    for row in reader:
-        manga_id = (row.get("manga_id") or "").strip()
-        rating = row.get("rating")
-        if not manga_id:
-            continue
-        error = ratings_service.set_rating(user_id, manga_id, rating)
-        if error:
-            return jsonify({"error": error}), 400
-        count += 1
-    return jsonify({"ok": True, "count": count})
+    size = request.content_length or len(csv_text)
+    run_async = str(request.args.get("async") or data.get("async") or "").lower() in {"1", "true"}
+    if run_async or size > ratings_import_service.async_threshold_bytes():
+        # Large files are imported off the request; poll the job for progress.
+        source = upload.stream if upload is not None else csv_text
+        job = ratings_import_service.start_job(current_app._get_current_object(), user_id, source)
+        return jsonify({"ok": True, "job_id": job["id"], "total": job["total"]}), 202
+
+    if upload is not None:
+        stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+    else:
+        stream = io.StringIO(csv_text)
+    result = ratings_import_service.import_ratings(current_app.config["DATABASE"], user_id, stream)
+    return jsonify({"ok": True, **result})
+
+
+@api_bp.get("/admin/ratings/import/<job_id>")
+@admin_required
+def admin_import_status(job_id):
+    """Report progress of a background ratings import."""
+    job = ratings_import_service.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    return jsonify(job)
 
 
 @api_bp.post("/recommendations")
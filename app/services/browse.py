@@ -0,0 +1,126 @@
+"""Catalog browse on precomputed masks and sort permutations of the catalog cache."""
+
+import numpy as np
+import pandas as pd
+
+from app.services import recommendations as rec_service
+from recommender import features
+from utils.parsing import parse_list
+
+_BROWSE_CACHE = {}
+
+# sort name -> (column, ascending); unknown sorts fall back to popularity.
+SORTS = {
+    "popularity": ("popularity", True),
+    "score": ("score", False),
+    "members": ("members", False),
+    "favorited": ("favorited", False),
+}
+
+# Row fields copied into browse results.
+_ROW_FIELDS = (
+    "id", "mal_id", "title_name", "english_name", "japanese_name", "cover_url", "item_type", "score",
+    "popularity", "members", "favorited", "genres", "themes", "display_title_en", "display_title_ja",
+)
+
+
+def _sort_permutation(values, ascending):
+    """Stable row order by `values` with missing values last."""
+    values = np.asarray(values, dtype=float)
+    missing = np.isnan(values)
+    keys = np.where(missing, 0.0, values if ascending else -values)
+    # lexsort uses the last key as primary: missing flag first, then the value.
+    return np.lexsort((keys, missing))
+
+
+def _codes(series, lower=False):
+    """Integer code per row plus the value -> code lookup (missing maps to '')."""
+    values = series.where(series.notna(), "").astype(str)
+    if lower:
+        values = values.str.lower()
+    codes, uniques = pd.factorize(values)
+    return codes, {value: code for code, value in enumerate(uniques)}
+
+
+def _build_index(cache):
+    """Per-cache arrays reused by every browse request."""
+    df = cache["df"]
+    status_codes, status_lookup = _codes(df["status"], lower=True)
+    type_codes, type_lookup = _codes(df["item_type"])
+    return {
+        "permutations": {
+            name: _sort_permutation(df[column].to_numpy(dtype=float), ascending)
+            for name, (column, ascending) in SORTS.items()
+        },
+        "status_codes": status_codes,
+        "status_lookup": status_lookup,
+        "type_codes": type_codes,
+        "type_lookup": type_lookup,
+        "score_or_zero": np.nan_to_num(df["score"].to_numpy(dtype=float), nan=0.0),
+    }
+
+
+def _browse_index(db_path):
+    """Return `(cache, index)`, rebuilding the index when the catalog cache changed."""
+    cache = rec_service.get_catalog_cache(db_path)
+    entry = _BROWSE_CACHE.get(db_path)
+    if entry is None or entry["cache"] is not cache:
+        entry = {"cache": cache, "index": _build_index(cache)}
+        _BROWSE_CACHE[db_path] = entry
+    return cache, entry["index"]
+
+
+def _plain(value):
+    """Native Python value for JSON responses; NaN becomes None."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def _tag_mask(matrix, lookup, labels):
+    """Rows carrying any of `labels`; unknown labels match nothing."""
+    columns = [lookup[label] for label in labels if label in lookup]
+    if not columns:
+        return np.zeros(matrix.shape[0], dtype=bool)
+    return features.rows_with_any(matrix, columns)
+
+
+def browse_rows(db_path, sort="popularity", genres=None, themes=None, content_types=None,
+                status=None, min_score=None, limit=50):
+    """Return up to `limit` row dicts matching the filters, in `sort` order."""
+    db_path = rec_service.resolve_db_path(db_path)
+    cache, index = _browse_index(db_path)
+
+    mask = cache["live_mask"].copy()
+    if genres:
+        mask &= _tag_mask(cache["genre_matrix"], cache["genre_index"], genres)
+    if themes:
+        mask &= _tag_mask(cache["theme_matrix"], cache["theme_index"], themes)
+    allowed = {str(t).strip() for t in (content_types or []) if str(t).strip()}
+    if allowed:
+        codes = [index["type_lookup"][t] for t in allowed if t in index["type_lookup"]]
+        mask &= np.isin(index["type_codes"], codes)
+    if min_score is not None:
+        mask &= index["score_or_zero"] >= min_score
+    if status:
+        code = index["status_lookup"].get(status.lower())
+        mask &= index["status_codes"] == (code if code is not None else -1)
+
+    order = index["permutations"].get(sort)
+    if order is None:
+        order = index["permutations"]["popularity"]
+    rows = order[mask[order]][:limit]
+
+    df = cache["df"]
+    results = []
+    for idx in rows:
+        row = {key: df[key].iat[idx] for key in _ROW_FIELDS}
+        row = {key: _plain(value) for key, value in row.items()}
+        for key in ("genres", "themes"):
+            # Keep this path tolerant if cached values ever arrive as serialized strings.
+            if not isinstance(row[key], list):
+                row[key] = parse_list(row[key])
+        results.append(row)
+    return results
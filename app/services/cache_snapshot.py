@@ -0,0 +1,155 @@
+"""Versioned on-disk snapshots of the recommendation catalog cache.
+
+Numeric arrays are written as individual ``.npy`` files and memory-mapped on
+load, so every worker process that opens the same snapshot shares one copy of
+the feature matrices through the OS page cache. CSR matrices are stored as their
+``data``/``indices``/``indptr`` arrays and reassembled around the mapped
+buffers. Python objects (the display
+dataframe, lookup dicts and fitted binarizers) are pickled alongside.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from scipy import sparse
+
+SNAPSHOT_VERSION = 3
+MANIFEST_NAME = "manifest.json"
+OBJECTS_NAME = "objects.pkl"
+
+
+def snapshot_root():
+    """Return the configured snapshot directory, or None when disabled."""
+    root = (os.environ.get("MANGA_CACHE_SNAPSHOT_DIR") or "").strip()
+    if not root:
+        return None
+    return os.path.abspath(os.path.expandvars(os.path.expanduser(root)))
+
+
+def _snapshot_key(db_path, fingerprint):
+    """Build a stable directory name for one database + catalog state."""
+    raw = json.dumps([SNAPSHOT_VERSION, db_path, fingerprint], default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def _db_prefix(db_path):
+    """Prefix shared by every snapshot of the same database."""
+    return hashlib.sha1(str(db_path).encode("utf-8")).hexdigest()[:8]
+
+
+def _snapshot_path(root, db_path, fingerprint):
+    """Return the directory holding the snapshot for this catalog state."""
+    return os.path.join(root, f"{_db_prefix(db_path)}-{_snapshot_key(db_path, fingerprint)}")
+
+
+def _split_cache(cache):
+    """Separate memory-mappable arrays and CSR matrices from picklable objects."""
+    arrays = {}
+    matrices = {}
+    objects = {}
+    for key, value in cache.items():
+        if sparse.issparse(value):
+            matrices[key] = value.tocsr()
+        elif isinstance(value, np.ndarray) and value.dtype != object:
+            arrays[key] = value
+        else:
+            objects[key] = value
+    return arrays, matrices, objects
+
+
+def _load_csr(path, name, shape):
+    """Rebuild a CSR matrix on top of memory-mapped component arrays."""
+    parts = [
+        np.load(os.path.join(path, f"{name}.{part}.npy"), mmap_mode="r", allow_pickle=False)
+        for part in ("data", "indices", "indptr")
+    ]
+    return sparse.csr_matrix(tuple(parts), shape=tuple(shape), copy=False)
+
+
+def save_snapshot(cache, db_path, fingerprint):
+    """Write the cache to disk; returns the snapshot directory or None."""
+    root = snapshot_root()
+    if root is None:
+        return None
+    target = _snapshot_path(root, db_path, fingerprint)
+    if os.path.isdir(target):
+        return target
+    os.makedirs(root, exist_ok=True)
+
+    arrays, matrices, objects = _split_cache(cache)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=root)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+        for name, matrix in matrices.items():
+            for part in ("data", "indices", "indptr"):
+                np.save(os.path.join(staging, f"{name}.{part}.npy"), getattr(matrix, part), allow_pickle=False)
+        with open(os.path.join(staging, OBJECTS_NAME), "wb") as f:
+            pickle.dump(objects, f, protocol=pickle.HIGHEST_PROTOCOL)
+        manifest = {
+            "version": SNAPSHOT_VERSION,
+            "db_path": db_path,
+            "fingerprint": fingerprint,
+            "arrays": sorted(arrays.keys()),
+            "sparse": {name: list(matrix.shape) for name, matrix in matrices.items()},
+            "created_at": time.time(),
+        }
+        # Manifest goes last so a readable manifest implies a complete snapshot.
+        with open(os.path.join(staging, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, default=str)
+        try:
+            os.rename(staging, target)
+        except OSError:
+            # Another worker published the same snapshot first; theirs is equivalent.
+            shutil.rmtree(staging, ignore_errors=True)
+            return target if os.path.isdir(target) else None
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    _prune_stale(root, db_path, keep=target)
+    return target
+
+
+def load_snapshot(db_path, fingerprint):
+    """Load a snapshot matching the catalog fingerprint, or return None."""
+    root = snapshot_root()
+    if root is None:
+        return None
+    path = _snapshot_path(root, db_path, fingerprint)
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.isfile(manifest_path):
+        return None
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != SNAPSHOT_VERSION:
+            return None
+        if json.dumps(manifest.get("fingerprint"), default=str) != json.dumps(fingerprint, default=str):
+            return None
+        with open(os.path.join(path, OBJECTS_NAME), "rb") as f:
+            cache = pickle.load(f)
+        for name in manifest.get("arrays") or []:
+            cache[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+        for name, shape in (manifest.get("sparse") or {}).items():
+            cache[name] = _load_csr(path, name, shape)
+    except Exception:
+        # A corrupt or partially written snapshot is treated as a cache miss.
+        return None
+    return cache
+
+
+def _prune_stale(root, db_path, keep):
+    """Remove older snapshots of the same database."""
+    prefix = f"{_db_prefix(db_path)}-"
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if path == keep or not name.startswith(prefix):
+            continue
+        shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,50 @@
+"""Background backfill of resolved title ids on legacy ratings/DNR/reading-list rows."""
+
+import os
+import threading
+import time
+
+from app.repos import canonical_ids as canonical_ids_repo
+
+
+def _backfill_enabled():
+    """Return False when `MANGA_CANONICAL_BACKFILL` switches the startup backfill off."""
+    value = (os.environ.get("MANGA_CANONICAL_BACKFILL") or "1").strip().lower()
+    return value not in {"0", "false", "no", "off"}
+
+
+def backfill(batch_size=500, pause=0.0):
+    """Resolve every pending row in small committed batches; returns rows processed."""
+    total = 0
+    for table in canonical_ids_repo.TABLES:
+        after_rowid = 0
+        while True:
+            after_rowid, processed = canonical_ids_repo.resolve_batch(table, after_rowid, batch_size)
+            if not processed:
+                break
+            total += processed
+            if pause:
+                # Leave gaps for interactive writers between batches.
+                time.sleep(pause)
+    return total
+
+
+def start_backfill(app, batch_size=500, pause=0.05):
+    """Run `backfill` on a daemon thread when legacy rows are waiting; returns the thread."""
+    if not _backfill_enabled():
+        return None
+    with app.app_context():
+        if not canonical_ids_repo.has_pending():
+            return None
+
+    def run():
+        with app.app_context():
+            try:
+                backfill(batch_size=batch_size, pause=pause)
+            except Exception:
+                # Unresolved rows stay flagged and are picked up on the next start.
+                pass
+
+    thread = threading.Thread(target=run, name="canonical-id-backfill", daemon=True)
+    thread.start()
+    return thread
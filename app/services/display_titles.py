@@ -0,0 +1,135 @@
+"""Display-title selection shared by API response shaping and the catalog cache."""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from utils.parsing import parse_list
+
+VARIANT_RE = re.compile(
+    r"(?:official|digital|full)?\s*colou?r(?:ed)?|omnibus|deluxe|kanzenban|special\\s+edition|complete\\s+edition|collector",
+    re.I,
+)
+
+
+def variant_score(title):
+    """Rank edition variants (colored, omnibus, parenthesised) after base titles."""
+    if not title:
+        return 1
+    text = str(title).lower()
+    score = 0
+    if VARIANT_RE.search(text):
+        score += 2
+    if "(" in text and ")" in text:
+        score += 1
+    return score
+
+
+def normalize_text(value):
+    """Normalize text for consistent comparisons."""
+    if value is None:
+        return ""
+    return re.sub(r"\s+", " ", str(value)).strip().lower()
+
+
+def english_like(value):
+    """True when the text has Latin letters and no other alphabetic characters."""
+    if not value:
+        return False
+    latin = 0
+    nonlatin = 0
+    for ch in str(value):
+        if ch.isalpha():
+            if ord(ch) < 128:
+                latin += 1
+            else:
+                nonlatin += 1
+    return latin > 0 and nonlatin == 0
+
+
+def best_english_synonym(synonyms, title):
+    """Pick the shortest non-variant English synonym that differs from the title."""
+    if not synonyms:
+        return None
+    title_norm = normalize_text(title)
+    best = None
+    best_key = None
+    for raw in synonyms:
+        candidate = str(raw).strip()
+        if not candidate:
+            continue
+        if title_norm and normalize_text(candidate) == title_norm:
+            continue
+        if not english_like(candidate):
+            continue
+        key = (variant_score(candidate), len(candidate))
+        if best is None or key < best_key:
+            best = candidate
+            best_key = key
+    return best
+
+
+def pick_display_title(title, english, japanese, synonyms, stats_name, language):
+    """Choose the title shown to a user for one row."""
+    if language == "Japanese":
+        return japanese or title
+    # Preserve variant-specific English names (e.g., Official Colored) over MAL base title
+    if english and variant_score(english) > 0:
+        return english
+    if stats_name:
+        return stats_name
+    if english and normalize_text(english) != normalize_text(title):
+        return english
+    synonym_pick = best_english_synonym(parse_list(synonyms), title)
+    if synonym_pick:
+        return synonym_pick
+    return english or title
+
+
+def _text(df, column):
+    """Column as strings, '' where missing."""
+    if column not in df:
+        return pd.Series("", index=df.index, dtype=object)
+    values = df[column]
+    return values.where(values.notna(), "").astype(str)
+
+
+def _normalized(series):
+    return series.str.replace(r"\s+", " ", regex=True).str.strip().str.lower()
+
+
+def display_title_columns(df):
+    """Vectorised `pick_display_title` for every row; returns (english, japanese) arrays."""
+    title = _text(df, "title_name")
+    title = title.where(title != "", _text(df, "id"))
+    english = _text(df, "english_name")
+    japanese = _text(df, "japanese_name")
+    stats_name = _text(df, "stats_english_name")
+
+    japanese_display = japanese.where(japanese != "", title).to_numpy(dtype=object)
+
+    has_english = english != ""
+    is_variant = english.str.contains(VARIANT_RE) | (
+        english.str.contains("(", regex=False) & english.str.contains(")", regex=False)
+    )
+    english_display = np.select(
+        [
+            has_english & is_variant,
+            stats_name != "",
+            has_english & (_normalized(english) != _normalized(title)),
+        ],
+        [english, stats_name, english],
+        default="",
+    ).astype(object)
+
+    # Only rows without a direct pick need the per-synonym scan.
+    pending = np.flatnonzero(english_display == "")
+    if len(pending):
+        synonyms = df["synonymns"].to_numpy(dtype=object) if "synonymns" in df else [None] * len(df)
+        titles = title.to_numpy(dtype=object)
+        englishes = english.to_numpy(dtype=object)
+        for pos in pending:
+            pick = best_english_synonym(parse_list(synonyms[pos]), titles[pos])
+            english_display[pos] = pick or englishes[pos] or titles[pos]
+    return english_display, japanese_display
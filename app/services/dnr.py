@@ -4,6 +4,7 @@ from app.repos import dnr as dnr_repo
 from app.repos import manga as manga_repo
 from app.repos import ratings as ratings_repo
 from app.repos import reading_list as reading_list_repo
+from app.write_queue import transactional
 
 
 def _normalize(username):
@@ -16,6 +17,7 @@ def list_items(user_id, sort="chron"):
     return dnr_repo.list_by_user(_normalize(user_id), sort=sort)
 
 
+@transactional
 def add_item(user_id, manga_id):
     """Add item to storage."""
     user_id = _normalize(user_id)
@@ -32,6 +34,7 @@ def add_item(user_id, manga_id):
     return None
 
 
+@transactional
 def remove_item(user_id, manga_id):
     """Remove item from storage."""
     user_id = _normalize(user_id)
@@ -47,3 +50,8 @@ def remove_item(user_id, manga_id):
 def list_manga_ids(user_id):
     """Return manga ids for the current context."""
     return dnr_repo.list_manga_ids_by_user(_normalize(user_id))
+
+
+def list_manga_ids_for_users(user_ids):
+    """Return manga ids keyed by normalized user id for a batch of users."""
+    return dnr_repo.list_manga_ids_by_users([_normalize(user_id) for user_id in user_ids])
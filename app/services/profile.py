@@ -2,8 +2,10 @@
 
 import json
 
-from app.db import get_db
+from app import write_queue
+from app.db import commit, get_db
 from app.repos import profile as profile_repo
+from app.repos import user_state as user_state_repo
 from app.repos import users as users_repo
 from utils.parsing import parse_dict, parse_list
 
@@ -46,9 +48,9 @@ def clear_history(username):
     username = _normalize(username)
     profile_repo.clear_history(username)
     db = get_db()
-    db.execute("DELETE FROM user_requests WHERE lower(user_id) = lower(?)", (username,))
-    db.execute("DELETE FROM user_request_cache WHERE lower(user_id) = lower(?)", (username,))
-    db.commit()
+    db.execute("DELETE FROM user_requests WHERE user_id = lower(?)", (username,))
+    db.execute("DELETE FROM user_request_cache WHERE user_id = lower(?)", (username,))
+    commit(db)
 
 
 def increment_preferences(username, current_genres, current_themes):
@@ -106,9 +108,21 @@ def increment_blacklist_history(username, blacklist_genres, blacklist_themes):
 
 def record_request_history(username, current_genres, current_themes, blacklist_genres, blacklist_themes, max_requests=100):
     """Record request history in persistent storage."""
-    username = _normalize(username)
-    db = get_db()
+    # Serialised on the writer queue: concurrent requests for one user cannot lose
+    # updates to the rolling counts, and bursts from many users share one commit.
+    write_queue.run_write(
+        _apply_request_history,
+        _normalize(username),
+        current_genres,
+        current_themes,
+        blacklist_genres,
+        blacklist_themes,
+        max_requests,
+    )
+
 
+def _apply_request_history(db, username, current_genres, current_themes, blacklist_genres, blacklist_themes, max_requests):
+    """Record one request and update the rolling counts over the last `max_requests`."""
     current_genres = [g for g in (current_genres or []) if g]
     current_themes = [t for t in (current_themes or []) if t]
     blacklist_genres = [g for g in (blacklist_genres or []) if g]
@@ -132,7 +146,7 @@ def record_request_history(username, current_genres, current_themes, blacklist_g
         """
         SELECT request_count, preferred_genres, preferred_themes, blacklist_genres, blacklist_themes
         FROM user_request_cache
-        WHERE lower(user_id) = lower(?)
+        WHERE user_id = lower(?)
         """,
         (username,),
     ).fetchone()
@@ -163,7 +177,7 @@ def record_request_history(username, current_genres, current_themes, blacklist_g
             """
             SELECT id, genres, themes, blacklist_genres, blacklist_themes
             FROM user_requests
-            WHERE lower(user_id) = lower(?)
+            WHERE user_id = lower(?)
             ORDER BY created_at ASC, id ASC
             LIMIT 1
             """,
@@ -206,7 +220,7 @@ def record_request_history(username, current_genres, current_themes, blacklist_g
         """
         UPDATE users
         SET preferred_genres = ?, preferred_themes = ?, blacklist_genres = ?, blacklist_themes = ?
-        WHERE lower(username) = lower(?)
+        WHERE username = lower(?)
         """,
         (
             str(preferred_genres),
@@ -216,4 +230,4 @@ def record_request_history(username, current_genres, current_themes, blacklist_g
             username,
         ),
     )
-    db.commit()
+    user_state_repo.bump_history(username, db=db)
@@ -4,6 +4,7 @@ from app.repos import ratings as ratings_repo
 from app.repos import manga as manga_repo
 from app.repos import dnr as dnr_repo
 from app.repos import reading_list as reading_list_repo
+from app.write_queue import transactional
 
 
 def _normalize(username):
@@ -21,6 +22,7 @@ def list_ratings_map(user_id):
     return ratings_repo.list_ratings_map(_normalize(user_id))
 
 
+@transactional
 def set_rating(user_id, manga_id, rating, recommended_by_us=None, finished_reading=None):
     """Persist rating."""
     user_id = _normalize(user_id)
@@ -72,6 +74,7 @@ def set_rating(user_id, manga_id, rating, recommended_by_us=None, finished_readi
     return None
 
 
+@transactional
 def delete_rating(user_id, manga_id):
     """Delete rating."""
     user_id = _normalize(user_id)
@@ -0,0 +1,110 @@
+"""Streaming ratings export in CSV, JSON Lines and MAL XML formats."""
+
+import csv
+import io
+import json
+from xml.sax.saxutils import escape
+
+from app.repos import ratings as ratings_repo
+
+# format -> (mimetype, file extension)
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "xml": ("application/xml", "xml"),
+}
+
+BATCH_SIZE = 500
+
+
+def _normalize(username):
+    """Normalize values for consistent comparisons."""
+    return (username or "").strip().lower()
+
+
+def _export_id(row):
+    """Identifier written for a rating: the stored MangaDex id, else the stored key."""
+    return row["mdex_id"] or row["manga_id"]
+
+
+def _csv_chunks(batches, all_users):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["user_id", "manga_id", "rating"] if all_users else ["manga_id", "rating"])
+    for rows in batches:
+        for row in rows:
+            values = [_export_id(row), row["rating"]]
+            writer.writerow([row["user_id"], *values] if all_users else values)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _jsonl_chunks(batches, _all_users):
+    for rows in batches:
+        yield "".join(
+            json.dumps(
+                {
+                    "user_id": row["user_id"],
+                    "manga_id": _export_id(row),
+                    "canonical_id": row["canonical_id"],
+                    "mal_id": row["mal_id"],
+                    "title": row["title_name"],
+                    "rating": row["rating"],
+                    "recommended_by_us": bool(row["recommended_by_us"]),
+                    "finished_reading": bool(row["finished_reading"]),
+                    "created_at": row["created_at"],
+                },
+                ensure_ascii=False,
+            )
+            + "\n"
+            for row in rows
+        )
+
+
+def _mal_entry(row):
+    # MAL scores are whole numbers 0-10; 0 means "no score".
+    score = 0 if row["rating"] is None else max(0, min(10, int(round(float(row["rating"])))))
+    status = "Completed" if row["finished_reading"] else "Reading"
+    title = escape(row["title_name"] or row["canonical_id"] or row["manga_id"])
+    return (
+        "  <manga>\n"
+        f"    <manga_mangadb_id>{int(row['mal_id'])}</manga_mangadb_id>\n"
+        f"    <manga_title>{title}</manga_title>\n"
+        f"    <my_score>{score}</my_score>\n"
+        f"    <my_status>{status}</my_status>\n"
+        "    <update_on_import>1</update_on_import>\n"
+        "  </manga>\n"
+    )
+
+
+def _xml_chunks(batches, all_users):
+    # MAL's import format; titles without a MAL id cannot be imported there and are skipped.
+    yield '<?xml version="1.0" encoding="UTF-8" ?>\n<myanimelist>\n'
+    yield "  <myinfo>\n    <user_export_type>2</user_export_type>\n  </myinfo>\n"
+    current_user = None
+    for rows in batches:
+        parts = []
+        for row in rows:
+            if all_users and row["user_id"] != current_user:
+                current_user = row["user_id"]
+                parts.append(f"  <!-- user: {escape(current_user).replace('--', '- -')} -->\n")
+            if row["mal_id"] is not None:
+                parts.append(_mal_entry(row))
+        yield "".join(parts)
+    yield "</myanimelist>\n"
+
+
+_WRITERS = {"csv": _csv_chunks, "jsonl": _jsonl_chunks, "xml": _xml_chunks}
+
+
+def export_chunks(fmt, user_id=None):
+    """Yield the export as text chunks, one per cursor batch.
+
+    `user_id=None` exports every user's ratings (CSV gains a `user_id` column).
+    """
+    all_users = user_id is None
+    batches = ratings_repo.iter_export_rows(None if all_users else _normalize(user_id), batch_size=BATCH_SIZE)
+    return _WRITERS[fmt](batches, all_users)
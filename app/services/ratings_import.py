@@ -0,0 +1,221 @@
+"""Bulk ratings import: set-based id resolution, batched upserts and background jobs."""
+
+import csv
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+from app.db import close_pool, unit_of_work
+from app.repos import dnr as dnr_repo
+from app.repos import manga as manga_repo
+from app.repos import ratings as ratings_repo
+from app.repos import reading_list as reading_list_repo
+from app.services import title_match as title_match_service
+
+CHUNK_SIZE = 1000
+# Per-row errors kept in a result; the total is always counted.
+MAX_REPORTED_ERRORS = 500
+# Finished jobs kept for status polling (per worker).
+MAX_JOBS = 50
+
+_JOBS = {}
+_JOBS_LOCK = threading.Lock()
+
+
+def async_threshold_bytes():
+    """Uploads larger than this run as background jobs (`MANGA_IMPORT_ASYNC_BYTES`)."""
+    try:
+        return max(0, int(os.environ.get("MANGA_IMPORT_ASYNC_BYTES", "1000000")))
+    except ValueError:
+        return 1000000
+
+
+def _normalize(username):
+    """Normalize values for consistent comparisons."""
+    return (username or "").strip().lower()
+
+
+def _flag(value):
+    return 1 if str(value or "").strip().lower() in {"1", "true", "yes", "y"} else 0
+
+
+def _parse_rating(value):
+    """Return `(rating, error)` using the same rules as `ratings_service.set_rating`."""
+    if value is None or not str(value).strip():
+        return None, None
+    try:
+        rating = float(value)
+    except (TypeError, ValueError):
+        return None, "rating must be a number"
+    if rating < 0 or rating > 10:
+        return None, "rating must be between 0 and 10"
+    return rating, None
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _resolve_chunk(db_path, chunk, result):
+    """Validate and resolve one chunk of `(line, row)` pairs into rating rows to write."""
+    valid = []
+    for line, row in chunk:
+        manga_id = (row.get("manga_id") or "").strip()
+        if not manga_id:
+            continue
+        rating, error = _parse_rating(row.get("rating"))
+        if error:
+            result["error_count"] += 1
+            if len(result["errors"]) < MAX_REPORTED_ERRORS:
+                result["errors"].append({"line": line, "manga_id": manga_id, "error": error})
+            continue
+        valid.append((manga_id, rating, row))
+    if not valid:
+        return []
+
+    refs = manga_repo.resolve_manga_refs(manga_id for manga_id, _, _ in valid)
+    rows = []
+    for manga_id, rating, row in valid:
+        # Imported files often carry hand-typed titles; map near misses onto catalog ids.
+        resolved = title_match_service.fuzzy_ref(db_path, refs[manga_id])
+        rows.append(
+            {
+                "canonical_id": resolved["canonical_id"] or manga_id,
+                "mdex_id": resolved["mdex_id"],
+                "mal_id": resolved["mal_id"],
+                "rating": rating,
+                "recommended_by_us": _flag(row.get("recommended_by_us")),
+                "finished_reading": _flag(row.get("finished_reading")),
+            }
+        )
+    return rows
+
+
+def _write_rows(user_id, rows, result):
+    """Upsert resolved rows and clear the same titles from the user's other lists."""
+    if not rows:
+        return
+    result["count"] += ratings_repo.upsert_ratings(user_id, rows)
+    # Keep imported titles exclusive to ratings, as single-title writes do.
+    refs_to_clear = list(dict.fromkeys((row["canonical_id"], row["mdex_id"]) for row in rows))
+    dnr_repo.remove_many(user_id, refs_to_clear)
+    reading_list_repo.remove_many(user_id, refs_to_clear)
+
+
+def import_ratings(db_path, user_id, stream, progress=None, atomic=True):
+    """Import a `manga_id,rating` CSV from a text stream.
+
+    Rows are resolved `CHUNK_SIZE` at a time before any write lock is taken, so
+    the transactions only cover the upserts. `atomic` writes everything in one
+    transaction; otherwise each chunk commits on its own and `progress` reports
+    committed totals. Invalid rows are reported in `errors` instead of aborting.
+    Returns `{"count", "errors", "error_count"}`.
+    """
+    user_id = _normalize(user_id)
+    result = {"count": 0, "errors": [], "error_count": 0}
+    # Build the catalog cache and fuzzy index up front rather than on the first near miss.
+    title_match_service.warm(db_path)
+    reader = csv.DictReader(stream)
+    rows = ((reader.line_num, row) for row in reader)
+    processed = 0
+    pending = []
+    for chunk in _chunks(rows, CHUNK_SIZE):
+        resolved = _resolve_chunk(db_path, chunk, result)
+        processed += len(chunk)
+        if atomic:
+            pending.extend(resolved)
+            continue
+        with unit_of_work():
+            _write_rows(user_id, resolved, result)
+        if progress is not None:
+            progress(processed, result)
+    if atomic:
+        with unit_of_work():
+            _write_rows(user_id, pending, result)
+        if progress is not None:
+            progress(processed, result)
+    return result
+
+
+def _count_rows(path):
+    """Approximate data rows in a CSV file (lines minus the header)."""
+    with open(path, "rb") as handle:
+        return max(0, sum(1 for _ in handle) - 1)
+
+
+def _prune_jobs():
+    finished = [job for job in _JOBS.values() if job["status"] in {"done", "failed"}]
+    finished.sort(key=lambda job: job["finished_at"] or 0)
+    for job in finished[: max(0, len(finished) - MAX_JOBS)]:
+        _JOBS.pop(job["id"], None)
+
+
+def start_job(app, user_id, source):
+    """Spool `source` (CSV text or a binary file object) to disk and import it on a thread."""
+    handle = tempfile.NamedTemporaryFile("wb", suffix=".csv", delete=False)
+    with handle:
+        if isinstance(source, str):
+            handle.write(source.encode("utf-8"))
+        else:
+            for block in iter(lambda: source.read(1 << 20), b""):
+                handle.write(block)
+    path = handle.name
+    job = {
+        "id": uuid.uuid4().hex,
+        "user_id": _normalize(user_id),
+        "status": "queued",
+        "total": _count_rows(path),
+        "processed": 0,
+        "count": 0,
+        "error_count": 0,
+        "errors": [],
+        "error": None,
+        "started_at": time.time(),
+        "finished_at": None,
+    }
+    with _JOBS_LOCK:
+        _prune_jobs()
+        _JOBS[job["id"]] = job
+
+    def progress(processed, result):
+        job.update(processed=processed, count=result["count"], error_count=result["error_count"])
+
+    def run():
+        job["status"] = "running"
+        try:
+            with app.app_context():
+                try:
+                    with open(path, newline="", encoding="utf-8-sig") as stream:
+                        result = import_ratings(
+                            app.config["DATABASE"], user_id, stream, progress=progress, atomic=False
+                        )
+                finally:
+                    close_pool()
+            job.update(result, status="done")
+        except Exception as exc:
+            # Chunks committed before the failure stay; `processed`/`count` show how far it got.
+            job.update(status="failed", error=str(exc))
+        finally:
+            job["finished_at"] = time.time()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    threading.Thread(target=run, name=f"ratings-import-{job['id'][:8]}", daemon=True).start()
+    return dict(job)
+
+
+def get_job(job_id):
+    """Snapshot of a job's progress, or None when unknown to this worker."""
+    job = _JOBS.get(job_id)
+    return None if job is None else {**job, "errors": list(job["errors"])}
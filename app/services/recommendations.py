@@ -1,99 +1,54 @@
 """Recommendation orchestration, caching, filtering, and response shaping."""
 
+import copy
+import hashlib
+import json
 import os
 import sqlite3
+import threading
 import time
+from collections import OrderedDict
 
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.preprocessing import MultiLabelBinarizer
 
 from app.repos import profile as profile_repo
 from app.repos import ratings as ratings_repo
-from app.repos import manga as manga_repo
+from app.repos import recommendation_cache as recommendation_cache_repo
+from app.repos import user_features as user_features_repo
+from app.repos import user_state as user_state_repo
+from app.services import cache_snapshot
+from app.services import display_titles
 from app.services import dnr as dnr_service
 from app.services import reading_list as reading_list_service
+from app.services import stats_names
+from recommender import features
 from recommender.recommender import recommendation_scores
+from recommender.scoring import affinities_from_sums, internal_scores, rank_batch_v3, rating_affinity_sums
 from utils.lookup import get_all_unique
 from utils.parsing import parse_list
+from utils.prefix_index import build_prefix_index, prefix_search
 
 _MANGA_CACHE = {}
 _OPTIONS_CACHE = {}
-_STATS_NAME_CACHE = {}
-
-
-def _english_like(value):
-    """Handle english like for this module."""
-    if not value:
-        return False
-    latin = 0
-    nonlatin = 0
-    for ch in str(value):
-        if ch.isalpha():
-            if ord(ch) < 128:
-                latin += 1
-            else:
-                nonlatin += 1
-    return latin > 0 and nonlatin == 0
-
-
-def _stats_english_name(mal_id):
-    """Handle stats english name for this module."""
-    if not mal_id:
-        return None
-    try:
-        mal_id = int(mal_id)
-    except Exception:
-        return None
-    cached = _STATS_NAME_CACHE.get(mal_id)
-    if cached is not None:
-        return cached
-    row = manga_repo.get_stats_by_mal_id(mal_id)
-    name = None
-    if row:
-        try:
-            name = row.get("english_name")
-        except AttributeError:
-            name = row["english_name"] if "english_name" in row.keys() else None
-    _STATS_NAME_CACHE[mal_id] = name
-    return name
+_TYPEAHEAD_CACHE = {}
+_REFRESH_LOCK = threading.Lock()
+_RESULT_CACHE = OrderedDict()
+_RESULT_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+_RESULT_CACHE_LOCK = threading.Lock()
 
 
-def _best_synonym(row, title):
-    """Handle best synonym for this module."""
-    synonyms = parse_list(row.get("synonymns"))
-    if not synonyms:
-        return None
-    for raw in synonyms:
-        candidate = str(raw).strip()
-        if not candidate:
-            continue
-        if candidate.strip().lower() == (title or "").strip().lower():
-            continue
-        if _english_like(candidate):
-            return candidate
-    return None
+def _display_title_for_row(row, language):
+    """Precomputed display title of a catalog row."""
+    return row.get("display_title_ja" if language == "Japanese" else "display_title_en")
 
 
-def _display_title_for_row(row, language):
-    """Handle display title for row for this module."""
-    title = row.get("title_name") or row.get("english_name") or row.get("japanese_name") or ""
-    if language == "Japanese":
-        return row.get("japanese_name") or title
-    english = row.get("english_name")
-    if english and str(english).strip().lower() != str(title).strip().lower():
-        return english
-    stats_name = _stats_english_name(row.get("mal_id"))
-    if stats_name:
-        return stats_name
-    synonym = _best_synonym(row, title)
-    if synonym:
-        return synonym
-    return english or title
-
-
-def _build_rated_lookup(manga_df, read_manga, language):
+def _build_rated_lookup(cache, read_manga, language):
     """Build rated lookup for later use."""
+    manga_df = cache["df"]
+    id_index = cache["id_index"]
     if manga_df is None or manga_df.empty or not read_manga:
         return {}, {}
     genre_best = {}
@@ -107,13 +62,10 @@ def _build_rated_lookup(manga_df, read_manga, language):
             continue
         if rating_value <= 0:
             continue
-        try:
-            matches = manga_df[manga_df["id"] == manga_id]
-        except Exception:
-            matches = None
-        if matches is None or matches.empty:
+        idx = id_index.get(manga_id)
+        if idx is None:
             continue
-        row = matches.iloc[0]
+        row = manga_df.iloc[idx]
         display_title = _display_title_for_row(row, language)
         genres = parse_list(row.get("genres"))
         themes = parse_list(row.get("themes"))
@@ -195,60 +147,136 @@ def _extract_year_series(series):
     return year
 
 
+_MANGA_SELECT_SQL = """
+    SELECT
+        mangadex_id AS id,
+        mangadex_id,
+        title_name,
+        english_name,
+        japanese_name,
+        synonymns,
+        item_type,
+        volumes,
+        chapters,
+        status,
+        publishing_date,
+        authors,
+        serialization,
+        genres,
+        themes,
+        demographic,
+        description,
+        content_rating,
+        original_language,
+        cover_url,
+        links,
+        updated_at,
+        mal_id,
+        score,
+        scored_by,
+        ranked,
+        popularity,
+        members,
+        favorited,
+        (SELECT s.english_name FROM manga_stats s WHERE s.mal_id = manga_catalog.mal_id) AS stats_english_name
+    FROM manga_catalog
+    WHERE mangadex_id NOT LIKE 'mal:%'
+"""
+
+
+def _prepare_manga_df(df):
+    """Parse list columns and derive the published year for freshly loaded rows."""
+    # Pre-parse lists once per dataset load
+    df["genres"] = df["genres"].apply(parse_list)
+    df["themes"] = df["themes"].apply(parse_list)
+
+    # Precompute published year with fallback to updated_at
+    publish_year = _extract_year_series(df.get("publishing_date"))
+    update_year = _extract_year_series(df.get("updated_at"))
+    df["published_year"] = publish_year.fillna(update_year)
+
+    # Display titles are resolved once per load so response shaping is a column lookup.
+    df["display_title_en"], df["display_title_ja"] = display_titles.display_title_columns(df)
+
+    return df
+
+
 def _load_manga_df(db_path):
     """Handle load manga df for this module."""
     conn = sqlite3.connect(db_path)
+    try:
+        df = pd.read_sql_query(_MANGA_SELECT_SQL, conn)
+    finally:
+        conn.close()
+    return _prepare_manga_df(df)
+
+
+def _load_changed_manga_df(db_path, since, until):
+    """Load merged rows logged in `manga_catalog_changes` after `since`, up to `until`."""
+    conn = sqlite3.connect(db_path)
     try:
         df = pd.read_sql_query(
-            """
-            SELECT
-                mangadex_id AS id,
-                mangadex_id,
-                title_name,
-                english_name,
-                japanese_name,
-                synonymns,
-                item_type,
-                volumes,
-                chapters,
-                status,
-                publishing_date,
-                authors,
-                serialization,
-                genres,
-                themes,
-                demographic,
-                description,
-                content_rating,
-                original_language,
-                cover_url,
-                links,
-                updated_at,
-                mal_id,
-                score,
-                scored_by,
-                ranked,
-                popularity,
-                members,
-                favorited
-            FROM manga_merged
-            WHERE mangadex_id NOT LIKE 'mal:%'
+            _MANGA_SELECT_SQL
+            + """
+              AND mangadex_id IN (
+                  SELECT mangadex_id FROM manga_catalog_changes WHERE seq > ? AND seq <= ?
+              )
             """,
             conn,
+            params=(since, until),
         )
     finally:
         conn.close()
+    return _prepare_manga_df(df)
 
-    # Pre-parse lists once per dataset load
-    df["genres"] = df["genres"].apply(parse_list)
-    df["themes"] = df["themes"].apply(parse_list)
 
-    # Precompute published year with fallback to updated_at
-    publish_year = _extract_year_series(df.get("publishing_date"))
-    update_year = _extract_year_series(df.get("updated_at"))
-    df["published_year"] = publish_year.fillna(update_year)
+def _load_catalog_changes(db_path, since, until):
+    """Return `(changed ids, complete)` for change-log entries after `since`, up to `until`.
 
-    return df
+    `complete` is False when entries after `since` were already pruned.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        oldest = conn.execute("SELECT MIN(seq) FROM manga_catalog_changes").fetchone()[0]
+        rows = conn.execute(
+            """
+            SELECT DISTINCT mangadex_id FROM manga_catalog_changes
+            WHERE seq > ? AND seq <= ? AND mangadex_id IS NOT NULL
+            """,
+            (since, until),
+        ).fetchall()
+    finally:
+        conn.close()
+    complete = oldest is None or oldest <= since + 1
+    return {row[0] for row in rows}, complete
+
+
+def _content_rating_values(df):
+    """Lower-cased content rating per row."""
+    content_rating = df.get("content_rating")
+    if content_rating is None:
+        content_rating = pd.Series([""] * len(df))
+    return content_rating.fillna("").astype(str).str.lower().to_numpy()
+
+
+def _nsfw_flags(genre_matrix, genre_mlb, content_rating):
+    """Flag rows with adult genres or an adult content rating."""
+    classes = genre_mlb.classes_.tolist()
+    nsfw_mask = np.zeros(genre_matrix.shape[0], dtype=bool)
+    idxs = [classes.index(g) for g in ("Hentai", "Ecchi", "Erotica") if g in classes]
+    if idxs:
+        nsfw_mask = features.rows_with_any(genre_matrix, idxs)
+    return nsfw_mask | np.isin(content_rating, ["erotica", "pornographic"])
+
+
+def _mal_key(mal_id):
+    """Normalize a MAL id value into an int key, or None."""
+    if mal_id is None or mal_id != mal_id:
+        return None
+    try:
+        return int(mal_id)
+    except Exception:
+        return None
 
 
 def _build_cache(db_path):
@@ -256,42 +284,30 @@ def _build_cache(db_path):
     df = _load_manga_df(db_path)
     df = df.reset_index(drop=True)
 
-    genre_mlb = MultiLabelBinarizer()
-    theme_mlb = MultiLabelBinarizer()
+    # Titles carry a handful of tags each, so the sparse backend stores only non-zeros.
+    backend = features.feature_backend()
+    genre_mlb = MultiLabelBinarizer(sparse_output=backend == "sparse")
+    theme_mlb = MultiLabelBinarizer(sparse_output=backend == "sparse")
 
-    genre_matrix = genre_mlb.fit_transform(df["genres"]).astype(np.uint8)
-    theme_matrix = theme_mlb.fit_transform(df["themes"]).astype(np.uint8)
+    genre_matrix = features.to_backend(genre_mlb.fit_transform(df["genres"]), backend)
+    theme_matrix = features.to_backend(theme_mlb.fit_transform(df["themes"]), backend)
 
     genre_index = {g: i for i, g in enumerate(genre_mlb.classes_.tolist())}
     theme_index = {t: i for i, t in enumerate(theme_mlb.classes_.tolist())}
 
-    genre_counts = genre_matrix.sum(axis=1)
-    theme_counts = theme_matrix.sum(axis=1)
+    genre_counts = features.row_counts(genre_matrix)
+    theme_counts = features.row_counts(theme_matrix)
 
     id_index = {mid: idx for idx, mid in enumerate(df["id"].tolist())}
     id_to_mal = {mid: mal for mid, mal in zip(df["id"].tolist(), df["mal_id"].tolist())}
 
     mal_id_to_indices = {}
     for idx, mal_id in enumerate(df["mal_id"].tolist()):
-        if mal_id is None or mal_id != mal_id:
-            continue
-        try:
-            key = int(mal_id)
-        except Exception:
-            continue
-        mal_id_to_indices.setdefault(key, []).append(idx)
+        key = _mal_key(mal_id)
+        if key is not None:
+            mal_id_to_indices.setdefault(key, []).append(idx)
 
-    content_rating = df.get("content_rating")
-    if content_rating is None:
-        content_rating = pd.Series([""] * len(df))
-    content_rating = content_rating.fillna("").astype(str).str.lower().to_numpy()
-
-    nsfw_genres = [g for g in ("Hentai", "Ecchi", "Erotica") if g in genre_mlb.classes_]
-    nsfw_mask = np.zeros(len(df), dtype=bool)
-    if nsfw_genres:
-        idxs = [genre_mlb.classes_.tolist().index(g) for g in nsfw_genres]
-        nsfw_mask = np.any(genre_matrix[:, idxs] > 0, axis=1)
-    nsfw_mask = nsfw_mask | np.isin(content_rating, ["erotica", "pornographic"])
+    nsfw_mask = _nsfw_flags(genre_matrix, genre_mlb, _content_rating_values(df))
 
     return {
         "df": df,
@@ -309,7 +325,230 @@ def _build_cache(db_path):
         "published_year": df["published_year"].to_numpy(),
         "item_type": df.get("item_type").fillna("").astype(str).to_numpy(),
         "nsfw_mask": nsfw_mask,
+        "internal_score": internal_scores(df["score"]),
+        # Rows stay in place when their title disappears; they are masked out instead.
+        "live_mask": np.ones(len(df), dtype=bool),
+    }
+
+
+def _catalog_fingerprint(db_path):
+    """Cheap summary of the catalog used to validate cached state.
+
+    The first field is the latest `manga_catalog_changes` sequence number, which
+    moves on every catalog or `manga_stats` write and doubles as the delta watermark.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute(
+            """
+            SELECT
+                (SELECT COALESCE(MAX(seq), 0) FROM manga_catalog_changes),
+                (SELECT COUNT(*) FROM manga_catalog),
+                (SELECT MAX(updated_at) FROM manga_catalog),
+                (SELECT COUNT(*) FROM manga_stats)
+            """
+        ).fetchone()
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+    return list(row) if row else None
+
+
+def _apply_catalog_delta(cache, changed_df, removed_ids=()):
+    """Return a patched copy of the cache, or None when a full rebuild is required."""
+    genre_index = cache["genre_index"]
+    theme_index = cache["theme_index"]
+    for values, index in ((changed_df["genres"], genre_index), (changed_df["themes"], theme_index)):
+        for labels in values:
+            if any(label not in index for label in labels):
+                # New vocabulary changes the matrix width; refit from scratch.
+                return None
+
+    id_index = dict(cache["id_index"])
+    updated_pos = []
+    updated_rows = []
+    appended_rows = []
+    for pos, mid in enumerate(changed_df["id"].tolist()):
+        idx = id_index.get(mid)
+        if idx is None:
+            appended_rows.append(pos)
+        else:
+            updated_pos.append(pos)
+            updated_rows.append(idx)
+
+    df = cache["df"]
+    columns = list(df.columns)
+    changed_df = changed_df[columns]
+    # Match the cached matrices, which may predate a MANGA_FEATURE_BACKEND change.
+    backend = "sparse" if sparse.issparse(cache["genre_matrix"]) else "dense"
+    genre_rows = features.to_backend(cache["genre_mlb"].transform(changed_df["genres"]), backend)
+    theme_rows = features.to_backend(cache["theme_mlb"].transform(changed_df["themes"]), backend)
+    nsfw_rows = _nsfw_flags(genre_rows, cache["genre_mlb"], _content_rating_values(changed_df))
+    years = changed_df["published_year"].to_numpy()
+    item_types = changed_df.get("item_type").fillna("").astype(str).to_numpy()
+
+    # Work on copies so concurrent readers keep a consistent view until the swap.
+    # Snapshot-backed arrays are read-only memory maps, so copying is required anyway.
+    arrays = {
+        "genre_counts": np.array(cache["genre_counts"]),
+        "theme_counts": np.array(cache["theme_counts"]),
+        "published_year": np.array(cache["published_year"]),
+        "item_type": np.array(cache["item_type"]),
+        "nsfw_mask": np.array(cache["nsfw_mask"]),
+        "internal_score": np.array(cache.get("internal_score", internal_scores(df["score"]))),
+        "live_mask": np.array(cache.get("live_mask", np.ones(len(df), dtype=bool))),
     }
+    row_values = {
+        "genre_counts": features.row_counts(genre_rows),
+        "theme_counts": features.row_counts(theme_rows),
+        "published_year": years,
+        "item_type": item_types,
+        "nsfw_mask": nsfw_rows,
+        "internal_score": internal_scores(changed_df["score"]),
+        "live_mask": np.ones(len(changed_df), dtype=bool),
+    }
+
+    id_to_mal = dict(cache["id_to_mal"])
+    mal_id_to_indices = {key: list(value) for key, value in cache["mal_id_to_indices"].items()}
+
+    def unlink_mal(idx, mid):
+        """Drop a row from the MAL variant index."""
+        old_key = _mal_key(id_to_mal.get(mid))
+        if old_key is None:
+            return
+        remaining = [i for i in mal_id_to_indices.get(old_key, []) if i != idx]
+        if remaining:
+            mal_id_to_indices[old_key] = remaining
+        else:
+            mal_id_to_indices.pop(old_key, None)
+
+    start = len(df)
+    if updated_rows:
+        for name, values in row_values.items():
+            arrays[name][updated_rows] = values[updated_pos]
+    if appended_rows:
+        for name, values in row_values.items():
+            arrays[name] = np.concatenate([arrays[name], values[appended_rows]])
+    for name, rows in (("genre_matrix", genre_rows), ("theme_matrix", theme_rows)):
+        arrays[name] = features.patch_rows(cache[name], updated_rows, rows[updated_pos], rows[appended_rows])
+
+    # Updated rows keep their position; appended rows take the next free positions.
+    target_index = [0] * len(changed_df)
+    for pos, idx in zip(updated_pos, updated_rows):
+        target_index[pos] = idx
+    for offset, pos in enumerate(appended_rows):
+        target_index[pos] = start + offset
+    incoming = changed_df.copy()
+    incoming.index = target_index
+    # All-NA columns in a small delta load as object; match the cached dtypes so the
+    # patched frame stays identical to a full rebuild.
+    for column in incoming.columns:
+        dtype = df[column].dtype
+        if incoming[column].dtype != dtype and incoming[column].isna().all() and dtype.kind not in "iub":
+            incoming[column] = incoming[column].astype(dtype)
+    kept = df.drop(index=updated_rows)
+    df = pd.concat([frame for frame in (kept, incoming) if not frame.empty] or [kept]).sort_index()
+
+    for mid, mal_id, idx in zip(incoming["id"].tolist(), incoming["mal_id"].tolist(), target_index):
+        if mid in id_index:
+            unlink_mal(idx, mid)
+        id_index[mid] = idx
+        id_to_mal[mid] = mal_id
+        key = _mal_key(mal_id)
+        if key is not None:
+            mal_id_to_indices.setdefault(key, []).append(idx)
+
+    # Tombstone titles that dropped out of the catalog.
+    for mid in [mid for mid in removed_ids if mid in id_index]:
+        idx = id_index.pop(mid)
+        arrays["live_mask"][idx] = False
+        unlink_mal(idx, mid)
+        id_to_mal.pop(mid, None)
+
+    patched = dict(cache)
+    patched.update(arrays)
+    patched.update(
+        {
+            "df": df,
+            "id_index": id_index,
+            "id_to_mal": id_to_mal,
+            "mal_id_to_indices": mal_id_to_indices,
+        }
+    )
+    return patched
+
+
+def _refresh_cache_delta(db_path, cached, fingerprint):
+    """Patch the cache from rows changed since its watermark; None means rebuild."""
+    previous = cached.get("fingerprint")
+    if not previous or not fingerprint or fingerprint[0] < previous[0]:
+        return None
+
+    changed_ids, complete = _load_catalog_changes(db_path, previous[0], fingerprint[0])
+    if not complete:
+        # The log was pruned past our watermark, so some changes are unknown.
+        return None
+    total_rows = len(cached["df"])
+    if len(changed_ids) > max(500, total_rows // 5):
+        # Heavy churn: a clean rebuild is cheaper than patching most of the catalog.
+        return None
+    if not changed_ids:
+        # Only unmapped manga_stats rows changed; a new cache object still drops name lookups.
+        return dict(cached)
+
+    changed_df = _load_changed_manga_df(db_path, previous[0], fingerprint[0])
+    removed_ids = changed_ids - set(changed_df["id"])
+    return _apply_catalog_delta(cached, changed_df, removed_ids=removed_ids)
+
+
+def _load_or_build_cache(db_path, fingerprint):
+    """Reuse an on-disk snapshot for the current catalog state, else rebuild."""
+    use_snapshot = fingerprint is not None and cache_snapshot.snapshot_root() is not None
+    if use_snapshot:
+        cache = cache_snapshot.load_snapshot(db_path, fingerprint)
+        if cache is not None:
+            return cache
+    cache = _build_cache(db_path)
+    if use_snapshot:
+        _save_snapshot(cache, db_path, fingerprint)
+    return cache
+
+
+def _save_snapshot(cache, db_path, fingerprint):
+    """Publish the cache as a snapshot when snapshots are enabled."""
+    if fingerprint is None or cache_snapshot.snapshot_root() is None:
+        return
+    try:
+        cache_snapshot.save_snapshot(
+            {key: value for key, value in cache.items() if key not in {"built_at", "fingerprint"}},
+            db_path,
+            fingerprint,
+        )
+    except OSError:
+        # Snapshots are an optimization; an unwritable directory must not break requests.
+        pass
+
+
+def _refresh_cache(db_path, cached):
+    """Bring an expired cache up to date, preferring the cheapest valid path."""
+    fingerprint = _catalog_fingerprint(db_path)
+    if cached is not None and fingerprint is not None and fingerprint == cached.get("fingerprint"):
+        return cached
+    refresh_mode = (os.environ.get("MANGA_CACHE_REFRESH") or "delta").strip().lower()
+    if cached is not None and refresh_mode == "delta":
+        try:
+            patched = _refresh_cache_delta(db_path, cached, fingerprint)
+        except Exception:
+            # Any surprise while patching falls back to the always-correct full rebuild.
+            patched = None
+        if patched is not None:
+            patched["fingerprint"] = fingerprint
+            _save_snapshot(patched, db_path, fingerprint)
+            return patched
+    cache = _load_or_build_cache(db_path, fingerprint)
+    cache["fingerprint"] = fingerprint
+    return cache
 
 
 def _get_cache(db_path):
@@ -324,11 +563,47 @@ def _get_cache(db_path):
             return cached
     elif cached is not None and cache_ttl <= 0:
         return cached
-    _OPTIONS_CACHE.pop(db_path, None)
-    cache = _build_cache(db_path)
-    cache["built_at"] = now
-    _MANGA_CACHE[db_path] = cache
-    return cache
+    if cached is not None and not _REFRESH_LOCK.acquire(blocking=False):
+        # Another request is already refreshing; keep serving the current cache.
+        return cached
+    if cached is None:
+        _REFRESH_LOCK.acquire()
+    try:
+        current = _MANGA_CACHE.get(db_path)
+        if current is not None and current is not cached:
+            # Built by another request while this one waited for the lock.
+            return current
+        cache = _refresh_cache(db_path, cached)
+        if cache is not cached:
+            _OPTIONS_CACHE.pop(db_path, None)
+            _TYPEAHEAD_CACHE.pop(db_path, None)
+            # The catalog fingerprint covers manga_stats, so names may have changed too.
+            stats_names.invalidate()
+        cache["built_at"] = now
+        _MANGA_CACHE[db_path] = cache
+        return cache
+    finally:
+        _REFRESH_LOCK.release()
+
+
+def resolve_db_path(db_path=None):
+    """Absolute path of `db_path`, or of the configured database when omitted."""
+    return _resolve_db_path(db_path)
+
+
+def get_catalog_cache(db_path=None):
+    """Return the shared catalog cache (frame, feature matrices and id indexes)."""
+    return _get_cache(db_path)
+
+
+def catalog_title_entries(cache):
+    """Yield `(name, row, rank)` for every title variant of live catalog rows."""
+    return _typeahead_entries(cache)
+
+
+def mal_key(mal_id):
+    """Normalize a MAL id value into an int key, or None."""
+    return _mal_key(mal_id)
 
 
 def get_available_options(db_path=None):
@@ -345,69 +620,134 @@ def get_available_options(db_path=None):
     return genres, themes
 
 
-def recommend_for_user(
-    db_path,
-    user_id,
-    current_genres,
-    current_themes,
-    limit=20,
-    mode=None,
-    earliest_year=None,
-    content_types=None,
-    blacklist_genres=None,
-    blacklist_themes=None,
-):
-    """Compute recommendation results for the requested user context."""
-    db_path = _resolve_db_path(db_path)
-    mode = (mode or os.environ.get("RECOMMENDER_MODE", "v3")).lower()
-    profile = profile_repo.get_profile(user_id)
-    if not profile:
-        return [], False
+_SUGGEST_FIELDS = (
+    "id", "mal_id", "title_name", "english_name", "japanese_name", "cover_url", "item_type", "score",
+    "display_title_en", "display_title_ja",
+)
+
+
+def _typeahead_entries(cache):
+    """Yield `(name, row, rank)` for every title variant of live catalog rows."""
+    df = cache["df"]
+    live_mask = cache["live_mask"]
+    scores = df["score"].to_numpy()
+    columns = [df[name].tolist() for name in ("title_name", "english_name", "japanese_name", "synonymns")]
+    for idx, (title, english, japanese, synonyms) in enumerate(zip(*columns)):
+        if not live_mask[idx]:
+            continue
+        score = scores[idx]
+        # Scored titles first (best score first), then unscored ones in catalog order.
+        rank = (0, -float(score), idx) if score == score and score is not None else (1, 0.0, idx)
+        for name in (title, english, japanese, *parse_list(synonyms)):
+            if name and name == name:
+                yield str(name), idx, rank
+
+
+def _typeahead_index(db_path, cache):
+    """Return the prefix index for `cache`, building it on first use."""
+    entry = _TYPEAHEAD_CACHE.get(db_path)
+    if entry is not None and entry["cache"] is cache:
+        return entry["index"]
+    index = build_prefix_index(_typeahead_entries(cache))
+    _TYPEAHEAD_CACHE[db_path] = {"cache": cache, "index": index}
+    return index
+
 
+def suggest_titles(db_path, query, limit=10, language="English"):
+    """Prefix-match title variants in memory; returns search-shaped dicts, best first."""
+    db_path = _resolve_db_path(db_path)
     cache = _get_cache(db_path)
-    manga_df = cache["df"]
+    rows = prefix_search(_typeahead_index(db_path, cache), query, limit=limit)
+    df = cache["df"]
+    items = []
+    for idx in rows:
+        # Frames patched by delta refreshes may carry NaN for missing text.
+        row = {key: df[key].iat[idx] for key in _SUGGEST_FIELDS}
+        row = {key: (None if value != value else value) for key, value in row.items()}
+        items.append(
+            {
+                "id": row["id"],
+                "mal_id": _mal_key(row["mal_id"]),
+                "title": row["title_name"],
+                "display_title": _display_title_for_row(row, language),
+                "english_name": row["english_name"],
+                "japanese_name": row["japanese_name"],
+                "cover_url": row["cover_url"],
+                "item_type": row["item_type"],
+                "score": None if row["score"] is None else float(row["score"]),
+            }
+        )
+    return items
+
+
+def catalog_display_title(db_path, manga_id, language):
+    """Precomputed display title for a catalog id, or None when the id is not cached."""
+    cache = _get_cache(_resolve_db_path(db_path))
+    idx = cache["id_index"].get(manga_id)
+    if idx is None:
+        return None
+    column = "display_title_ja" if language == "Japanese" else "display_title_en"
+    return cache["df"][column].iat[idx]
+
 
+def _combined_blacklists(profile, blacklist_genres=None, blacklist_themes=None):
+    """Merge request blacklists with the user's blacklist history."""
     history_blacklist_genres = list((profile.get("blacklist_genres") or {}).keys())
     history_blacklist_themes = list((profile.get("blacklist_themes") or {}).keys())
     combined_blacklist_genres = list(dict.fromkeys((blacklist_genres or []) + history_blacklist_genres))
     combined_blacklist_themes = list(dict.fromkeys((blacklist_themes or []) + history_blacklist_themes))
+    return combined_blacklist_genres, combined_blacklist_themes
 
-    read_manga = ratings_repo.list_ratings_map(user_id)
 
+def _expand_rated_variants(cache, read_manga):
+    """Add unrated MAL variants of rated titles so they are excluded too."""
+    if not read_manga:
+        return read_manga
+    manga_df = cache["df"]
     rated_mal_ids = set()
-    if read_manga:
-        # Resolve rated MAL ids to block alternate variants from showing up
-        id_to_mal = cache.get("id_to_mal", {})
-        for key in read_manga.keys():
-            if not key:
-                continue
-            if str(key).startswith("mal:"):
-                try:
-                    rated_mal_ids.add(int(str(key).replace("mal:", "").strip()))
-                except Exception:
-                    pass
+    # Resolve rated MAL ids to block alternate variants from showing up
+    id_to_mal = cache.get("id_to_mal", {})
+    for key in list(read_manga.keys()):
+        if not key:
+            continue
+        if str(key).startswith("mal:"):
+            try:
+                rated_mal_ids.add(int(str(key).replace("mal:", "").strip()))
+            except Exception:
+                pass
+            continue
+        mal_id = id_to_mal.get(key)
+        if mal_id and mal_id == mal_id:
+            try:
+                rated_mal_ids.add(int(mal_id))
+            except Exception:
+                pass
+    for mid in rated_mal_ids:
+        for idx in cache.get("mal_id_to_indices", {}).get(mid, []):
+            try:
+                rid = manga_df.at[idx, "id"]
+            except Exception:
                 continue
-            mal_id = id_to_mal.get(key)
-            if mal_id and mal_id == mal_id:
-                try:
-                    rated_mal_ids.add(int(mal_id))
-                except Exception:
-                    pass
-        if rated_mal_ids:
-            for mid in rated_mal_ids:
-                for idx in cache.get("mal_id_to_indices", {}).get(mid, []):
-                    try:
-                        rid = manga_df.at[idx, "id"]
-                    except Exception:
-                        continue
-                    if rid:
-                        read_manga.setdefault(rid, None)
+            if rid:
+                read_manga.setdefault(rid, None)
+    return read_manga
 
-    dnr_ids = set(dnr_service.list_manga_ids(user_id))
-    reading_ids = set(reading_list_service.list_manga_ids(user_id))
 
-    total_rows = len(manga_df)
-    mask = np.ones(total_rows, dtype=bool)
+def _candidate_rows(
+    cache,
+    profile,
+    read_manga,
+    dnr_ids,
+    reading_ids,
+    limit,
+    earliest_year=None,
+    content_types=None,
+    blacklist_genres=None,
+    blacklist_themes=None,
+):
+    """Return candidate row indices and the effective earliest-year preference."""
+    total_rows = len(cache["df"])
+    mask = np.array(cache.get("live_mask", np.ones(total_rows, dtype=bool)), dtype=bool)
 
     # Age-based NSFW filtering
     if profile.get("age") is not None and profile["age"] < 18:
@@ -420,21 +760,21 @@ def recommend_for_user(
             mask &= np.isin(cache.get("item_type"), list(allowed))
 
     # Blacklist filtering (genres/themes)
-    blacklist_genres = [g for g in (combined_blacklist_genres or []) if g]
-    blacklist_themes = [t for t in (combined_blacklist_themes or []) if t]
+    blacklist_genres = [g for g in (blacklist_genres or []) if g]
+    blacklist_themes = [t for t in (blacklist_themes or []) if t]
     if blacklist_genres:
         genre_index = cache.get("genre_index", {})
         idxs = [genre_index[g] for g in blacklist_genres if g in genre_index]
         if idxs:
-            mask &= ~np.any(cache["genre_matrix"][:, idxs] > 0, axis=1)
+            mask &= ~features.rows_with_any(cache["genre_matrix"], idxs)
     if blacklist_themes:
         theme_index = cache.get("theme_index", {})
         idxs = [theme_index[t] for t in blacklist_themes if t in theme_index]
         if idxs:
-            mask &= ~np.any(cache["theme_matrix"][:, idxs] > 0, axis=1)
+            mask &= ~features.rows_with_any(cache["theme_matrix"], idxs)
 
     # Exclude read/DNR/reading list
-    exclude_ids = dnr_ids | reading_ids | set(read_manga.keys())
+    exclude_ids = set(dnr_ids) | set(reading_ids) | set(read_manga.keys())
     id_index = cache.get("id_index", {})
     for mid in exclude_ids:
         idx = id_index.get(mid)
@@ -455,34 +795,19 @@ def recommend_for_user(
                 mask &= year_mask
         earliest_year = min_year
 
-    row_idx = np.where(mask)[0]
-    filtered_df = manga_df.iloc[row_idx].copy()
+    return np.flatnonzero(mask), earliest_year
 
-    ranked, used_current = recommendation_scores(
-        manga_df,
-        profile,
-        current_genres,
-        current_themes,
-        read_manga,
-        top_n=limit,
-        mode=mode,
-        earliest_year=earliest_year,
-        content_types=content_types,
-        blacklist_genres=combined_blacklist_genres,
-        blacklist_themes=combined_blacklist_themes,
-        prefiltered_df=filtered_df,
-        prefiltered_idx=row_idx,
-        precomputed=cache,
-    )
 
+def _shape_results(cache, ranked, profile, read_manga, current_genres, current_themes):
+    """Convert ranked rows into API result dicts with reasons."""
     if ranked is None or ranked.empty:
-        return [], used_current
+        return []
 
     language = profile.get("language") or "English"
-    genre_best, theme_best = _build_rated_lookup(manga_df, read_manga, language)
+    genre_best, theme_best = _build_rated_lookup(cache, read_manga, language)
 
     results = []
-    for _, row in ranked.iterrows():
+    for row in ranked.to_dict("records"):
         reasons = _explain_row(row, current_genres, current_themes, profile, genre_best, theme_best)
         results.append(
             {
@@ -499,4 +824,357 @@ def recommend_for_user(
                 "reasons": reasons,
             }
         )
+    return results
+
+
+def _result_cache_ttl():
+    """Seconds a materialised result may be served; 0 disables the store."""
+    try:
+        return max(int(os.environ.get("MANGA_REC_CACHE_TTL_SEC", "3600")), 0)
+    except ValueError:
+        return 3600
+
+
+def _request_params_hash(
+    profile,
+    mode,
+    current_genres,
+    current_themes,
+    limit,
+    earliest_year,
+    content_types,
+    blacklist_genres,
+    blacklist_themes,
+):
+    """Hash everything that shapes a result besides ratings/lists and the catalog.
+
+    Profile fields that hard-filter candidates (blacklist history, the under-18
+    flag) and the display language are part of the key; rolling preference
+    counts are not, so recording request history does not wipe the cache.
+    """
+    age = profile.get("age")
+    key = {
+        "mode": mode,
+        "genres": sorted(current_genres or []),
+        "themes": sorted(current_themes or []),
+        "limit": limit,
+        "min_year": earliest_year,
+        "content_types": sorted(str(t) for t in (content_types or [])),
+        "blacklist_genres": sorted(blacklist_genres or []),
+        "blacklist_themes": sorted(blacklist_themes or []),
+        "history_blacklist_genres": sorted((profile.get("blacklist_genres") or {}).keys()),
+        "history_blacklist_themes": sorted((profile.get("blacklist_themes") or {}).keys()),
+        "minor": age is not None and age < 18,
+        "language": profile.get("language") or "English",
+    }
+    return hashlib.sha1(json.dumps(key, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _result_lru_settings():
+    """Return (max entries, ttl seconds) for the in-process result cache."""
+    try:
+        size = max(int(os.environ.get("MANGA_RESULT_CACHE_SIZE", "1024")), 0)
+    except ValueError:
+        size = 1024
+    try:
+        ttl = max(float(os.environ.get("MANGA_RESULT_CACHE_TTL_SEC", "300")), 0)
+    except ValueError:
+        ttl = 300.0
+    return size, ttl
+
+
+def _result_lru_get(key, ttl):
+    """Return a copy of a cached result, counting hits and misses."""
+    now = time.time()
+    with _RESULT_CACHE_LOCK:
+        entry = _RESULT_CACHE.get(key)
+        if entry is not None and now - entry[0] > ttl:
+            del _RESULT_CACHE[key]
+            _RESULT_CACHE_STATS["expired"] += 1
+            entry = None
+        if entry is None:
+            _RESULT_CACHE_STATS["misses"] += 1
+            return None
+        _RESULT_CACHE.move_to_end(key)
+        _RESULT_CACHE_STATS["hits"] += 1
+    # Callers decorate result dicts in place; never hand out the cached ones.
+    return copy.deepcopy(entry[1])
+
+
+def _result_lru_put(key, value, size):
+    """Insert a result and evict least-recently-used entries beyond ``size``."""
+    with _RESULT_CACHE_LOCK:
+        _RESULT_CACHE[key] = (time.time(), copy.deepcopy(value))
+        _RESULT_CACHE.move_to_end(key)
+        while len(_RESULT_CACHE) > size:
+            _RESULT_CACHE.popitem(last=False)
+            _RESULT_CACHE_STATS["evictions"] += 1
+
+
+def result_cache_stats():
+    """Hit/miss counters and occupancy of the in-process result cache."""
+    size, ttl = _result_lru_settings()
+    with _RESULT_CACHE_LOCK:
+        stats = dict(_RESULT_CACHE_STATS)
+        stats["entries"] = len(_RESULT_CACHE)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    stats["max_entries"] = size
+    stats["ttl_sec"] = ttl
+    return stats
+
+
+def _catalog_key(cache):
+    """Serialized catalog fingerprint, or None when the catalog state is unknown."""
+    fingerprint = cache.get("fingerprint")
+    if fingerprint is None:
+        return None
+    return json.dumps(fingerprint, default=str)
+
+
+def _rating_affinities(cache, user_id, read_manga, ratings_version, stored):
+    """Rating affinity vectors from the user's cached sums, recomputed when stale."""
+    catalog_key = _catalog_key(cache)
+    sums = None
+    if stored is not None and catalog_key is not None:
+        stored_version, stored_fingerprint, stored_sums = stored
+        if stored_version == ratings_version and stored_fingerprint == catalog_key:
+            sums = stored_sums
+    if sums is None:
+        sums = rating_affinity_sums(read_manga, cache)
+        if catalog_key is not None:
+            user_features_repo.store_features(user_id, ratings_version, catalog_key, sums)
+    return affinities_from_sums(sums, cache)
+
+
+def recommend_for_user(
+    db_path,
+    user_id,
+    current_genres,
+    current_themes,
+    limit=20,
+    mode=None,
+    earliest_year=None,
+    content_types=None,
+    blacklist_genres=None,
+    blacklist_themes=None,
+):
+    """Compute recommendation results for the requested user context."""
+    db_path = _resolve_db_path(db_path)
+    mode = (mode or os.environ.get("RECOMMENDER_MODE", "v3")).lower()
+    profile = profile_repo.get_profile(user_id)
+    if not profile:
+        return [], False
+
+    cache = _get_cache(db_path)
+    manga_df = cache["df"]
+
+    params_hash = _request_params_hash(
+        profile,
+        mode,
+        current_genres,
+        current_themes,
+        limit,
+        earliest_year,
+        content_types,
+        blacklist_genres,
+        blacklist_themes,
+    )
+    # Read before loading ratings/lists so a concurrent write can only make this result look older.
+    state_version, _ = user_state_repo.get_versions(user_id)
+    lru_size, lru_ttl = _result_lru_settings()
+    lru_key = None
+    if lru_size and lru_ttl:
+        lru_key = (str(user_id).strip().lower(), params_hash, state_version, cache.get("built_at"))
+        hit = _result_lru_get(lru_key, lru_ttl)
+        if hit is not None:
+            return hit
+
+    ttl = _result_cache_ttl()
+    catalog_key = _catalog_key(cache)
+    store_enabled = bool(ttl and catalog_key is not None)
+    if store_enabled:
+        cached = recommendation_cache_repo.get_cached(user_id, params_hash, catalog_key, state_version, ttl)
+        if cached is not None:
+            if lru_key is not None:
+                _result_lru_put(lru_key, cached, lru_size)
+            return cached
+
+    combined_blacklist_genres, combined_blacklist_themes = _combined_blacklists(
+        profile, blacklist_genres, blacklist_themes
+    )
+    # Same ordering rule as state_version: read the version before the ratings it describes.
+    ratings_version = user_state_repo.get_ratings_version(user_id)
+    read_manga = _expand_rated_variants(cache, ratings_repo.list_ratings_map(user_id))
+    affinities = _rating_affinities(
+        cache, user_id, read_manga, ratings_version, user_features_repo.get_features(user_id)
+    )
+
+    dnr_ids = set(dnr_service.list_manga_ids(user_id))
+    reading_ids = set(reading_list_service.list_manga_ids(user_id))
+
+    row_idx, earliest_year = _candidate_rows(
+        cache,
+        profile,
+        read_manga,
+        dnr_ids,
+        reading_ids,
+        limit,
+        earliest_year=earliest_year,
+        content_types=content_types,
+        blacklist_genres=combined_blacklist_genres,
+        blacklist_themes=combined_blacklist_themes,
+    )
+
+    ranked, used_current = recommendation_scores(
+        manga_df,
+        profile,
+        current_genres,
+        current_themes,
+        read_manga,
+        top_n=limit,
+        mode=mode,
+        earliest_year=earliest_year,
+        content_types=content_types,
+        blacklist_genres=combined_blacklist_genres,
+        blacklist_themes=combined_blacklist_themes,
+        prefiltered_idx=row_idx,
+        precomputed=cache,
+        affinities=affinities,
+    )
+    results = _shape_results(cache, ranked, profile, read_manga, current_genres, current_themes)
+    if store_enabled:
+        recommendation_cache_repo.store(user_id, params_hash, catalog_key, state_version, results, used_current)
+    if lru_key is not None:
+        _result_lru_put(lru_key, (results, used_current), lru_size)
     return results, used_current
+
+
+def _batch_user_key(user_id):
+    """Key used by the batch repo helpers (lowercased, trimmed user id)."""
+    return (str(user_id or "")).strip().lower()
+
+
+def recommend_for_users(db_path, requests, limit=20, mode=None, chunk_size=32):
+    """Compute recommendations for many users at once.
+
+    ``requests`` holds user ids or dicts with ``user_id`` plus any of the
+    ``recommend_for_user`` keyword arguments (``current_genres``,
+    ``current_themes``, ``limit``, ``earliest_year``, ``content_types``,
+    ``blacklist_genres``, ``blacklist_themes``). User state is fetched with
+    one set-based query per table, and v3 scores ``chunk_size`` users per
+    matrix-matrix product. Returns ``(results, used_current)`` per request, in
+    order; unknown users get ``([], False)``.
+    """
+    db_path = _resolve_db_path(db_path)
+    mode = (mode or os.environ.get("RECOMMENDER_MODE", "v3")).lower()
+    specs = [dict(request) if isinstance(request, dict) else {"user_id": request} for request in requests]
+    user_keys = list(dict.fromkeys(_batch_user_key(spec.get("user_id")) for spec in specs))
+    user_keys = [key for key in user_keys if key]
+
+    versions = user_state_repo.get_versions_many(user_keys)
+    ratings_versions = user_state_repo.get_ratings_versions_many(user_keys)
+    stored_features = user_features_repo.get_features_many(user_keys)
+    profiles = profile_repo.get_profiles(user_keys)
+    ratings = ratings_repo.list_ratings_maps(user_keys)
+    dnr_ids = dnr_service.list_manga_ids_for_users(user_keys)
+    reading_ids = reading_list_service.list_manga_ids_for_users(user_keys)
+
+    cache = _get_cache(db_path)
+    outputs = [([], False)] * len(specs)
+    scored = []
+    for pos, spec in enumerate(specs):
+        key = _batch_user_key(spec.get("user_id"))
+        profile = profiles.get(key)
+        if not profile:
+            continue
+        current_genres = list(spec.get("current_genres") or [])
+        current_themes = list(spec.get("current_themes") or [])
+        request_limit = spec.get("limit") or limit
+        combined_blacklist_genres, combined_blacklist_themes = _combined_blacklists(
+            profile, spec.get("blacklist_genres"), spec.get("blacklist_themes")
+        )
+        # Copy so variant expansion never leaks between requests for the same user.
+        read_manga = _expand_rated_variants(cache, dict(ratings.get(key, {})))
+        row_idx, earliest_year = _candidate_rows(
+            cache,
+            profile,
+            read_manga,
+            dnr_ids.get(key, []),
+            reading_ids.get(key, []),
+            request_limit,
+            earliest_year=spec.get("earliest_year"),
+            content_types=spec.get("content_types"),
+            blacklist_genres=combined_blacklist_genres,
+            blacklist_themes=combined_blacklist_themes,
+        )
+        scored.append(
+            (
+                pos,
+                {
+                    "profile": profile,
+                    "current_genres": current_genres,
+                    "current_themes": current_themes,
+                    "read_manga": read_manga,
+                    "affinities": _rating_affinities(
+                        cache, key, read_manga, ratings_versions.get(key, 0), stored_features.get(key)
+                    ),
+                    "row_idx": row_idx,
+                    "top_n": request_limit,
+                    "earliest_year": earliest_year,
+                },
+            )
+        )
+
+    if mode in {"v1", "legacy", "v2", "unbias"}:
+        # Older modes keep their per-user scorers; only the state fetch is batched.
+        ranked_list = [
+            recommendation_scores(
+                cache["df"],
+                request["profile"],
+                request["current_genres"],
+                request["current_themes"],
+                request["read_manga"],
+                top_n=request["top_n"],
+                mode=mode,
+                earliest_year=request["earliest_year"],
+                prefiltered_idx=request["row_idx"],
+                precomputed=cache,
+                affinities=request["affinities"],
+            )
+            for _, request in scored
+        ]
+    else:
+        ranked_list = rank_batch_v3([request for _, request in scored], cache, chunk_size=chunk_size)
+
+    ttl = _result_cache_ttl()
+    catalog_key = _catalog_key(cache)
+    for (pos, request), (ranked, used_current) in zip(scored, ranked_list):
+        results = _shape_results(
+            cache,
+            ranked,
+            request["profile"],
+            request["read_manga"],
+            request["current_genres"],
+            request["current_themes"],
+        )
+        outputs[pos] = (results, used_current)
+        if ttl and catalog_key is not None:
+            # Warm the per-user store so the next interactive request is a single read.
+            spec = specs[pos]
+            params_hash = _request_params_hash(
+                request["profile"],
+                mode,
+                request["current_genres"],
+                request["current_themes"],
+                request["top_n"],
+                spec.get("earliest_year"),
+                spec.get("content_types"),
+                spec.get("blacklist_genres"),
+                spec.get("blacklist_themes"),
+            )
+            user_key = _batch_user_key(spec.get("user_id"))
+            recommendation_cache_repo.store(
+                user_key, params_hash, catalog_key, versions.get(user_key, (0, 0))[0], results, used_current
+            )
+    return outputs
@@ -0,0 +1,99 @@
+"""Process-wide lookup of MAL-stats English names, bulk-loaded from `manga_stats`."""
+
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+_NAME_TABLES = {}
+_NAME_STATS = {"hits": 0, "negative_hits": 0, "loads": 0}
+_NAME_LOCK = threading.Lock()
+
+
+def _name_ttl():
+    """Seconds a loaded name table is trusted before reloading (`MANGA_STATS_NAME_TTL_SEC`)."""
+    try:
+        return max(0, int(os.environ.get("MANGA_STATS_NAME_TTL_SEC", "21600")))
+    except ValueError:
+        return 21600
+
+
+def _load_table(db_path):
+    """Sorted MAL ids with a non-empty English name, plus the names in the same order."""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            """
+            SELECT mal_id, english_name
+            FROM manga_stats
+            WHERE mal_id IS NOT NULL AND english_name IS NOT NULL AND TRIM(english_name) != ''
+            ORDER BY mal_id
+            """
+        ).fetchall()
+    except sqlite3.Error:
+        rows = []
+    finally:
+        conn.close()
+    # Ids absent from the array are known misses, so negative lookups need no storage.
+    return {
+        "mal_ids": np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+        "names": [row[1] for row in rows],
+        "loaded_at": time.time(),
+    }
+
+
+def _get_table(db_path):
+    """Return the name table for `db_path`, loading it once per TTL window."""
+    table = _NAME_TABLES.get(db_path)
+    ttl = _name_ttl()
+    if table is not None and (ttl == 0 or time.time() - table["loaded_at"] < ttl):
+        return table
+    with _NAME_LOCK:
+        current = _NAME_TABLES.get(db_path)
+        if current is not None and current is not table:
+            # Reloaded by another request while this one waited for the lock.
+            return current
+        table = _load_table(db_path)
+        _NAME_TABLES[db_path] = table
+        _NAME_STATS["loads"] += 1
+    return table
+
+
+def english_name(db_path, mal_id):
+    """English name stored in `manga_stats` for `mal_id`, or None."""
+    if not mal_id:
+        return None
+    try:
+        key = int(mal_id)
+    except (TypeError, ValueError):
+        return None
+    table = _get_table(db_path)
+    mal_ids = table["mal_ids"]
+    pos = int(np.searchsorted(mal_ids, key))
+    if pos < len(mal_ids) and mal_ids[pos] == key:
+        _NAME_STATS["hits"] += 1
+        return table["names"][pos]
+    _NAME_STATS["negative_hits"] += 1
+    return None
+
+
+def invalidate(db_path=None):
+    """Drop loaded tables (all, or one database) so the next lookup reloads."""
+    with _NAME_LOCK:
+        if db_path is None:
+            _NAME_TABLES.clear()
+        else:
+            _NAME_TABLES.pop(db_path, None)
+
+
+def cache_stats():
+    """Size and hit-rate counters for the loaded name tables."""
+    stats = dict(_NAME_STATS)
+    stats["entries"] = sum(len(table["names"]) for table in list(_NAME_TABLES.values()))
+    stats["tables"] = len(_NAME_TABLES)
+    lookups = stats["hits"] + stats["negative_hits"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    stats["ttl_sec"] = _name_ttl()
+    return stats
@@ -0,0 +1,58 @@
+"""Typo-tolerant title search and reference resolution over the catalog cache."""
+
+from app.services import recommendations as rec_service
+from utils.fuzzy_match import best_match, build_ngram_index, fuzzy_search
+
+_FUZZY_CACHE = {}
+
+# Row fields returned in the same shape as `manga_repo.search_by_title`.
+_ROW_FIELDS = (
+    "id", "mal_id", "title_name", "english_name", "japanese_name", "synonymns",
+    "cover_url", "score", "genres", "themes", "item_type",
+)
+
+
+def _fuzzy_index(db_path):
+    """Return `(cache, index)`, rebuilding the n-gram index when the catalog cache changed."""
+    cache = rec_service.get_catalog_cache(db_path)
+    entry = _FUZZY_CACHE.get(db_path)
+    if entry is None or entry["cache"] is not cache:
+        entries = ((name, idx) for name, idx, _ in rec_service.catalog_title_entries(cache))
+        entry = {"cache": cache, "index": build_ngram_index(entries)}
+        _FUZZY_CACHE[db_path] = entry
+    return cache, entry["index"]
+
+
+def warm(db_path):
+    """Build the catalog cache and fuzzy index ahead of bulk matching."""
+    _fuzzy_index(rec_service.resolve_db_path(db_path))
+
+
+def _row(cache, idx):
+    """Plain dict for one catalog row, with NaN turned into None."""
+    df = cache["df"]
+    row = {key: df[key].iat[idx] for key in _ROW_FIELDS}
+    row = {key: (None if value != value else value) for key, value in row.items()}
+    row["mal_id"] = rec_service.mal_key(row["mal_id"])
+    return row
+
+
+def search_rows(db_path, query, limit=20):
+    """Near-miss title matches, best first, shaped like `search_by_title` rows."""
+    db_path = rec_service.resolve_db_path(db_path)
+    cache, index = _fuzzy_index(db_path)
+    return [_row(cache, idx) for idx, _ in fuzzy_search(index, query, limit=limit)]
+
+
+def fuzzy_ref(db_path, resolved):
+    """Replace an unresolved `resolve_manga_ref` result with one confident fuzzy title match."""
+    raw = resolved["raw"]
+    if not raw or resolved["mdex_id"] or resolved["mal_id"] is not None:
+        return resolved
+    db_path = rec_service.resolve_db_path(db_path)
+    cache, index = _fuzzy_index(db_path)
+    idx = best_match(index, raw)
+    if idx is None:
+        return resolved
+    row = _row(cache, idx)
+    return {"raw": raw, "canonical_id": row["id"], "mdex_id": row["id"], "mal_id": row["mal_id"]}
@@ -29,11 +29,25 @@ async function switchUser() {
 async function importRatings() {
   const csv = importCsv.value.trim();
   if (!csv) return;
-  const data = await api("/api/admin/ratings/import", {
+  let data = await api("/api/admin/ratings/import", {
     method: "POST",
     body: JSON.stringify({ csv }),
   });
-  setStatus(importStatus, `Imported ${data.count} ratings.`);
+  // Large files come back as a background job; poll until it finishes.
+  while (data.job_id && !["done", "failed"].includes(data.status)) {
+    if (data.status) {
+      setStatus(importStatus, `Importing… ${data.processed || 0} of ${data.total || "?"} rows`);
+    }
+    await new Promise((resolve) => setTimeout(resolve, 1000));
+    const job = await api(`/api/admin/ratings/import/${data.job_id}`);
+    data = { ...job, job_id: job.id };
+  }
+  if (data.status === "failed") {
+    setStatus(importStatus, data.error || "Import failed", true);
+    return;
+  }
+  const skipped = data.error_count ? ` Skipped ${data.error_count} invalid rows.` : "";
+  setStatus(importStatus, `Imported ${data.count} ratings.${skipped}`, Boolean(data.error_count));
 }
 
 switchBtn.addEventListener("click", () => switchUser().catch((e) => setStatus(adminStatus, e.message, true)));
@@ -5,6 +5,7 @@ const searchBtn = document.getElementById("search-btn");
 const searchStatus = document.getElementById("search-status");
 const searchResults = document.getElementById("search-results");
 const searchLoading = document.getElementById("search-loading");
+const searchSuggestions = document.getElementById("search-suggestions");
 
 const browseBtn = document.getElementById("browse-btn");
 const browseResults = document.getElementById("browse-results");
@@ -340,6 +341,33 @@ async function loadUiPrefs() {
   }
 }
 
+// Suggesttitles helper for this page.
+let suggestTimer = null;
+let suggestSeq = 0;
+function suggestTitles() {
+  if (!searchInput || !searchSuggestions) return;
+  clearTimeout(suggestTimer);
+  const query = searchInput.value.trim();
+  if (!query) {
+    searchSuggestions.innerHTML = "";
+    return;
+  }
+  suggestTimer = setTimeout(async () => {
+    const seq = ++suggestSeq;
+    try {
+      const data = await api(`/api/manga/suggest?q=${encodeURIComponent(query)}`);
+      // Drop responses that arrive after a newer keystroke's request.
+      if (seq !== suggestSeq) return;
+      searchSuggestions.innerHTML = "";
+      (data.items || []).forEach((item) => {
+        const option = document.createElement("option");
+        option.value = item.display_title || item.title || "";
+        searchSuggestions.appendChild(option);
+      });
+    } catch (err) {}
+  }, 80);
+}
+
 // Saveuipref helper for this page.
 async function saveUiPref(key, value) {
   try {
@@ -354,6 +382,7 @@ if (searchBtn) {
   searchBtn.addEventListener("click", () => searchTitles().catch((e) => setStatus(e.message, true)));
 }
 if (searchInput) {
+  searchInput.addEventListener("input", suggestTitles);
   searchInput.addEventListener("keydown", (event) => {
     if (event.key === "Enter") {
       event.preventDefault();
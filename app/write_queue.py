@@ -0,0 +1,193 @@
+"""Single-writer queue that group-commits small writes from concurrent requests.
+
+Each database gets one daemon thread owning one writer connection. Queued
+writes are drained in batches and applied inside one `BEGIN IMMEDIATE`
+transaction, each under its own savepoint so a failing write only rolls back
+itself, and the batch is committed once.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import wraps
+
+from flask import current_app
+
+from app.db import bind_connection, connect, get_db, in_unit_of_work, unit_of_work
+
+_QUEUES = {}
+_QUEUES_LOCK = threading.Lock()
+_STOP = object()
+
+
+class _WriteQueue:
+    """One writer thread and connection draining queued writes for a database."""
+
+    def __init__(self, config):
+        """Read batching settings from `config` and start the writer thread."""
+        self.config = dict(config)
+        self.window = max(0, int(self.config.get("DB_WRITE_BATCH_WINDOW_MS", 2))) / 1000.0
+        self.batch_max = max(1, int(self.config.get("DB_WRITE_BATCH_MAX", 64)))
+        self.items = queue.Queue()
+        self.stats = {"writes": 0, "batches": 0, "failed": 0}
+        self.thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, fn, args, kwargs):
+        """Queue `fn(db, *args, **kwargs)` and return a Future for its result."""
+        future = Future()
+        self.items.put((fn, args, kwargs, future))
+        return future
+
+    def stop(self):
+        """Ask the writer to finish queued work and wait briefly for it to exit."""
+        self.items.put(_STOP)
+        self.thread.join(timeout=5)
+
+    def _next_batch(self):
+        """Block for one write, then collect more until the window closes or the batch is full."""
+        first = self.items.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.batch_max:
+            try:
+                item = self.items.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Finish what was queued before the stop request.
+                self.items.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        """Writer thread loop: apply batches on a dedicated connection until stopped."""
+        db = connect(self.config)
+        db.isolation_level = None
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                self._apply(db, batch)
+        finally:
+            db.close()
+
+    def _apply(self, db, batch):
+        """Apply a batch in one transaction, one savepoint per write, and settle the futures."""
+        results = []
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            # Repository calls made by queued functions land on this connection.
+            with bind_connection(db):
+                for fn, args, kwargs, future in batch:
+                    db.execute("SAVEPOINT queued_write")
+                    try:
+                        results.append((future, fn(db, *args, **kwargs), None))
+                        db.execute("RELEASE queued_write")
+                    except Exception as exc:
+                        db.execute("ROLLBACK TO queued_write")
+                        db.execute("RELEASE queued_write")
+                        results.append((future, None, exc))
+            db.execute("COMMIT")
+        except Exception as exc:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            self.stats["failed"] += len(batch)
+            for _, _, _, future in batch:
+                future.set_exception(exc)
+            return
+        self.stats["batches"] += 1
+        for future, value, error in results:
+            self.stats["writes"] += 1
+            if error is not None:
+                self.stats["failed"] += 1
+                future.set_exception(error)
+            else:
+                future.set_result(value)
+
+
+def _queue_for(config):
+    """Return the live writer queue for `config["DATABASE"]`, starting one if needed."""
+    path = config["DATABASE"]
+    with _QUEUES_LOCK:
+        write_queue = _QUEUES.get(path)
+        if write_queue is None or not write_queue.thread.is_alive():
+            write_queue = _QUEUES[path] = _WriteQueue(config)
+    return write_queue
+
+
+def run_write(fn, *args, wait=True, **kwargs):
+    """Apply `fn(db, *args, **kwargs)` on the writer thread; returns its result when `wait`.
+
+    `fn` must not commit, and callers must not hold an open write transaction
+    on the request connection while waiting. With `DB_WRITE_QUEUE` off it runs
+    on the request connection and is committed immediately; inside a unit of
+    work it joins that transaction instead.
+    """
+    if in_unit_of_work():
+        # Queueing would wait on the lock the surrounding transaction holds.
+        value = fn(get_db(), *args, **kwargs)
+    elif not current_app.config.get("DB_WRITE_QUEUE", True):
+        db = get_db()
+        try:
+            value = fn(db, *args, **kwargs)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    else:
+        future = _queue_for(current_app.config).submit(fn, args, kwargs)
+        return future.result() if wait else future
+    if wait:
+        return value
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def run_unit_of_work(fn, *args, **kwargs):
+    """Run `fn(*args, **kwargs)` as one transaction and return its result.
+
+    With `DB_GROUP_COMMIT` on, the whole call runs on the writer thread and
+    shares a commit with other queued operations; otherwise it is a unit of
+    work on the request connection. Calls already inside a unit of work join it.
+    """
+    if in_unit_of_work():
+        return fn(*args, **kwargs)
+    if current_app.config.get("DB_GROUP_COMMIT", False) and current_app.config.get("DB_WRITE_QUEUE", True):
+        return run_write(lambda _db: fn(*args, **kwargs))
+    with unit_of_work():
+        return fn(*args, **kwargs)
+
+
+def transactional(fn):
+    """Decorator form of `run_unit_of_work` for service operations."""
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        return run_unit_of_work(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def queue_stats():
+    """Writes, batches and failures per database writer thread."""
+    with _QUEUES_LOCK:
+        return {
+            path: {**write_queue.stats, "pending": write_queue.items.qsize()}
+            for path, write_queue in _QUEUES.items()
+        }
+
+
+def shutdown(db_path=None):
+    """Drain and stop writer threads (all, or one database)."""
+    with _QUEUES_LOCK:
+        paths = [path for path in _QUEUES if db_path is None or path == db_path]
+        stopping = [_QUEUES.pop(path) for path in paths]
+    for write_queue in stopping:
+        write_queue.stop()
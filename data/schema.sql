@@ -18,6 +18,7 @@ CREATE TABLE IF NOT EXISTS user_ratings (
     canonical_id TEXT,
     mdex_id TEXT,
     mal_id INTEGER,
+    ids_resolved INTEGER DEFAULT 0,
     rating REAL,
     recommended_by_us INTEGER DEFAULT 0,
     finished_reading INTEGER DEFAULT 0,
@@ -32,6 +33,7 @@ CREATE TABLE IF NOT EXISTS user_dnr (
     canonical_id TEXT,
     mdex_id TEXT,
     mal_id INTEGER,
+    ids_resolved INTEGER DEFAULT 0,
     created_at TEXT DEFAULT CURRENT_TIMESTAMP,
     PRIMARY KEY (user_id, manga_id),
     FOREIGN KEY (user_id) REFERENCES users(username)
@@ -43,6 +45,7 @@ CREATE TABLE IF NOT EXISTS user_reading_list (
     canonical_id TEXT,
     mdex_id TEXT,
     mal_id INTEGER,
+    ids_resolved INTEGER DEFAULT 0,
     status TEXT DEFAULT 'Plan to Read',
     created_at TEXT DEFAULT CURRENT_TIMESTAMP,
     PRIMARY KEY (user_id, manga_id),
@@ -72,6 +75,33 @@ CREATE TABLE IF NOT EXISTS user_request_cache (
 
 CREATE INDEX IF NOT EXISTS idx_user_requests_user_time ON user_requests (user_id, created_at);
 
+CREATE TABLE IF NOT EXISTS user_recommendation_cache (
+    user_id TEXT NOT NULL,
+    params_hash TEXT NOT NULL,
+    catalog_fingerprint TEXT NOT NULL,
+    state_version INTEGER DEFAULT 0,
+    payload TEXT NOT NULL,
+    used_current INTEGER DEFAULT 0,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (user_id, params_hash)
+);
+
+CREATE TABLE IF NOT EXISTS user_state (
+    user_id TEXT PRIMARY KEY,
+    state_version INTEGER DEFAULT 0,
+    history_version INTEGER DEFAULT 0,
+    ratings_version INTEGER DEFAULT 0,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS user_feature_cache (
+    user_id TEXT PRIMARY KEY,
+    ratings_version INTEGER DEFAULT 0,
+    catalog_fingerprint TEXT,
+    payload TEXT NOT NULL,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
 CREATE TABLE IF NOT EXISTS manga_stats (
     mal_id INTEGER PRIMARY KEY,
     link TEXT,
@@ -173,3 +203,7 @@ SELECT
 FROM manga_core AS core
 LEFT JOIN manga_map AS map ON map.mangadex_id = core.id
 LEFT JOIN manga_stats AS stats ON stats.mal_id = map.mal_id;
+
+-- manga_catalog (the materialised copy of manga_merged), its refresh triggers, the
+-- catalog change log and the manga_title_fts index are derived from the tables
+-- above and are created by app.app.init_db, which is their single definition.
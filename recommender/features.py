@@ -0,0 +1,102 @@
+"""Feature-matrix helpers that work for both dense and CSR genre/theme matrices."""
+
+import os
+
+import numpy as np
+from scipy import sparse
+
+# Row subsets smaller than this fraction of the catalog are sliced before multiplying;
+# larger ones multiply the whole matrix and index the result, which avoids a copy.
+_SLICE_FRACTION = 0.25
+
+
+def feature_backend():
+    """Return the configured matrix backend ("sparse" or "dense")."""
+    backend = (os.environ.get("MANGA_FEATURE_BACKEND") or "sparse").strip().lower()
+    return "dense" if backend == "dense" else "sparse"
+
+
+def to_backend(matrix, backend=None):
+    """Convert a binarized feature matrix to the configured backend."""
+    backend = backend or feature_backend()
+    if backend == "dense":
+        return matrix.toarray().astype(np.uint8) if sparse.issparse(matrix) else np.asarray(matrix, dtype=np.uint8)
+    if sparse.issparse(matrix):
+        return matrix.tocsr().astype(np.uint8)
+    return sparse.csr_matrix(np.asarray(matrix, dtype=np.uint8))
+
+
+def row_counts(matrix):
+    """Number of tags per row."""
+    return np.asarray(matrix.sum(axis=1)).ravel()
+
+
+def column_indicator(matrix, columns):
+    """Vector with ones at the requested column positions."""
+    indicator = np.zeros(matrix.shape[1], dtype=float)
+    indicator[list(columns)] = 1.0
+    return indicator
+
+
+def _product(matrix, vector):
+    """Dense result of ``matrix @ vector`` keeping the vector's dimensionality."""
+    result = np.asarray(matrix @ vector, dtype=float)
+    return result.ravel() if np.ndim(vector) == 1 else result
+
+
+def matvec(matrix, vector, row_idx=None):
+    """Compute ``matrix @ vector`` restricted to ``row_idx`` without copying the row block.
+
+    ``vector`` may also be a 2-D ``(n_features, k)`` array to score several
+    weight vectors in one pass over the matrix.
+    """
+    total = matrix.shape[0]
+    if row_idx is None:
+        return _product(matrix, vector)
+    row_idx = np.asarray(row_idx, dtype=np.intp)
+    if sparse.issparse(matrix) and row_idx.size < total * _SLICE_FRACTION:
+        # CSR row slicing only touches the non-zeros of the selected rows.
+        return _product(matrix[row_idx], vector)
+    return _product(matrix, vector)[row_idx]
+
+
+def column_hits(matrix, columns, row_idx=None):
+    """Count how many of ``columns`` are set in each (selected) row."""
+    columns = list(columns)
+    size = matrix.shape[0] if row_idx is None else len(row_idx)
+    if not columns:
+        return np.zeros(size, dtype=float)
+    return matvec(matrix, column_indicator(matrix, columns), row_idx)
+
+
+def rows_with_any(matrix, columns):
+    """Boolean mask of rows that contain at least one of ``columns``."""
+    return column_hits(matrix, columns) > 0
+
+
+def weighted_row_sum(matrix, indices, weights):
+    """Compute ``weights @ matrix[indices]`` as a dense vector."""
+    block = matrix[np.asarray(indices, dtype=np.intp)]
+    if sparse.issparse(block):
+        return np.asarray(block.T @ np.asarray(weights, dtype=float), dtype=float).ravel()
+    return np.asarray(weights, dtype=float) @ block
+
+
+def patch_rows(matrix, updated_rows, updated_values, appended_values):
+    """Return a copy of ``matrix`` with rows replaced and new rows appended."""
+    if sparse.issparse(matrix):
+        total = matrix.shape[0]
+        updated_values = sparse.csr_matrix(updated_values, dtype=matrix.dtype)
+        appended_values = sparse.csr_matrix(appended_values, dtype=matrix.dtype)
+        stacked = sparse.vstack([matrix, updated_values, appended_values], format="csr")
+        # Re-order rows so replacements land at their original positions.
+        order = np.arange(total + appended_values.shape[0])
+        order[np.asarray(updated_rows, dtype=np.intp)] = total + np.arange(updated_values.shape[0])
+        order[total:] = total + updated_values.shape[0] + np.arange(appended_values.shape[0])
+        return stacked[order]
+    patched = np.array(matrix)
+    if len(updated_rows):
+        patched[updated_rows] = updated_values
+    if len(appended_values):
+        patched = np.concatenate([patched, appended_values])
+    return patched
@@ -18,11 +18,18 @@ def recommendation_scores(
     prefiltered_df=None,
     prefiltered_idx=None,
     precomputed=None,
+    affinities=None,
 ):
 
     """Compute recommendation results for the requested user context."""
+    mode = (mode or "v3").lower()
     if prefiltered_df is not None:
         filtered = prefiltered_df
+    elif prefiltered_idx is not None and precomputed is not None:
+        # Every scorer version reads straight off the cached arrays; no frame is needed.
+        filtered = None
+    elif prefiltered_idx is not None:
+        filtered = manga_df.iloc[prefiltered_idx].copy()
     else:
         filtered = run_filters(
             manga_df,
@@ -32,7 +39,6 @@ def recommendation_scores(
             blacklist_genres=blacklist_genres,
             blacklist_themes=blacklist_themes,
         )
-    mode = (mode or "v3").lower()
     if mode in {"v1", "legacy"}:
         ranked, used_current = score_and_rank(
             filtered,
@@ -43,6 +49,9 @@ def recommendation_scores(
             read_manga,
             top_n=top_n,
             earliest_year=earliest_year,
+            precomputed=precomputed,
+            prefiltered_idx=prefiltered_idx,
+            affinities=affinities,
         )
     elif mode in {"v2", "unbias"}:
         ranked, used_current = score_and_rank_v2(
@@ -54,6 +63,9 @@ def recommendation_scores(
             read_manga,
             top_n=top_n,
             earliest_year=earliest_year,
+            precomputed=precomputed,
+            prefiltered_idx=prefiltered_idx,
+            affinities=affinities,
         )
     else:
         ranked, used_current = score_and_rank_v3(
@@ -67,6 +79,7 @@ def recommendation_scores(
             earliest_year=earliest_year,
             precomputed=precomputed,
             prefiltered_idx=prefiltered_idx,
+            affinities=affinities,
         )
 
     return ranked, used_current
@@ -14,6 +14,7 @@ from recommender.constants import (
     REQUESTED_GENRE_WEIGHT,
     REQUESTED_THEME_WEIGHT,
 )
+from recommender import features
 from utils.parsing import parse_list
 
 
@@ -174,23 +175,42 @@ def _collect_rated_indices(read_manga, id_index):
 
 
 
-def _compute_rating_affinities_v2_vec(read_manga, precomputed):
-    """Vectorized normalized rating affinity construction."""
-    indices, ratings = _collect_rated_indices(read_manga, precomputed.get("id_index", {}))
-    if indices.size == 0:
-        return (
-            np.zeros(len(precomputed["genre_mlb"].classes_), dtype=float),
-            np.zeros(len(precomputed["theme_mlb"].classes_), dtype=float),
-        )
+def rating_weight_v2(rating):
+    """Per-title weight used by the v2/v3 rating affinity, or None when the rating is ignored."""
+    if rating is None:
+        return None
+    try:
+        value = float(rating)
+    except (TypeError, ValueError):
+        return None
+    if value == 0:
+        return None
+    return max((value - 5) / 5, -0.4)
+
 
+
+def rating_weight_v1(rating):
+    """Per-title weight used by the legacy v1 affinity, or None when the rating is ignored."""
+    if rating is None:
+        return None
+    try:
+        value = float(rating)
+    except (TypeError, ValueError):
+        return None
+    return (value - 5) / 5
+
+
+
+def _rating_boosts_v2(read_manga, precomputed):
+    """Un-normalised v2 genre/theme boosts summed over rated catalog titles."""
+    genre_size = len(precomputed["genre_mlb"].classes_)
+    theme_size = len(precomputed["theme_mlb"].classes_)
+    indices, ratings = _collect_rated_indices(read_manga, precomputed.get("id_index", {}))
     nonzero_mask = ratings != 0
     indices = indices[nonzero_mask]
     ratings = ratings[nonzero_mask]
     if indices.size == 0:
-        return (
-            np.zeros(len(precomputed["genre_mlb"].classes_), dtype=float),
-            np.zeros(len(precomputed["theme_mlb"].classes_), dtype=float),
-        )
+        return np.zeros(genre_size, dtype=float), np.zeros(theme_size, dtype=float)
 
     local_weight = (ratings - 5) / 5
     local_weight = np.maximum(local_weight, -0.4)
@@ -201,29 +221,180 @@ def _compute_rating_affinities_v2_vec(read_manga, precomputed):
     genre_weights = local_weight / np.maximum(genre_counts, 1)
     theme_weights = local_weight / np.maximum(theme_counts, 1)
 
-    genre_boost = genre_weights @ precomputed["genre_matrix"][indices]
-    theme_boost = theme_weights @ precomputed["theme_matrix"][indices]
+    genre_boost = features.weighted_row_sum(precomputed["genre_matrix"], indices, genre_weights)
+    theme_boost = features.weighted_row_sum(precomputed["theme_matrix"], indices, theme_weights)
+    return genre_boost, theme_boost
+
+
+
+def _normalize_l1(vector):
+    """Scale a vector so its absolute values sum to 1 (zeros stay zeros)."""
+    denom = np.sum(np.abs(vector))
+    if denom <= 0:
+        return np.zeros_like(vector, dtype=float)
+    return vector / denom
+
+
+
+def _compute_rating_affinities_v2_vec(read_manga, precomputed):
+    """Vectorized normalized rating affinity construction."""
+    genre_boost, theme_boost = _rating_boosts_v2(read_manga, precomputed)
+    return _normalize_l1(genre_boost), _normalize_l1(theme_boost)
+
+
+
+def _rating_boosts_v1(read_manga, precomputed):
+    """Summed v1 genre/theme boosts plus the number of countable ratings."""
+    genre_size = len(precomputed["genre_mlb"].classes_)
+    theme_size = len(precomputed["theme_mlb"].classes_)
+    # Ratings count toward the mean even when their title is not in the catalog.
+    rated_count = sum(1 for rating in read_manga.values() if rating_weight_v1(rating) is not None)
+    indices, ratings = _collect_rated_indices(read_manga, precomputed.get("id_index", {}))
+    if indices.size == 0:
+        return np.zeros(genre_size, dtype=float), np.zeros(theme_size, dtype=float), rated_count
+
+    local_weight = (ratings - 5) / 5
+    genre_weights = local_weight / np.maximum(precomputed["genre_counts"][indices], 1)
+    theme_weights = local_weight / np.maximum(precomputed["theme_counts"][indices], 1)
+    genre_boost = features.weighted_row_sum(precomputed["genre_matrix"], indices, genre_weights)
+    theme_boost = features.weighted_row_sum(precomputed["theme_matrix"], indices, theme_weights)
+    return genre_boost, theme_boost, rated_count
+
+
+
+def _compute_rating_affinities_vec(read_manga, precomputed):
+    """Vectorized legacy rating affinity (mean per-tag weight over all rated titles)."""
+    genre_boost, theme_boost, rated_count = _rating_boosts_v1(read_manga, precomputed)
+    if rated_count <= 0:
+        return np.zeros_like(genre_boost), np.zeros_like(theme_boost)
+    return genre_boost / rated_count, theme_boost / rated_count
+
+
+
+def _labelled(vector, classes):
+    """Map non-zero vector entries to their class labels."""
+    return {str(label): float(value) for label, value in zip(classes, vector) if value != 0}
+
+
+
+def rating_affinity_sums(read_manga, precomputed):
+    """Label-keyed rating boost sums that `affinities_from_sums` turns back into vectors.
+
+    The sums are additive per rated title, so a single rating change can be
+    applied as a delta without revisiting the rest of the user's ratings.
+    """
+    genre_classes = precomputed["genre_mlb"].classes_
+    theme_classes = precomputed["theme_mlb"].classes_
+    v2_genre, v2_theme = _rating_boosts_v2(read_manga, precomputed)
+    v1_genre, v1_theme, rated_count = _rating_boosts_v1(read_manga, precomputed)
+    return {
+        "v1": {
+            "genres": _labelled(v1_genre, genre_classes),
+            "themes": _labelled(v1_theme, theme_classes),
+            "rated_count": int(rated_count),
+        },
+        "v2": {
+            "genres": _labelled(v2_genre, genre_classes),
+            "themes": _labelled(v2_theme, theme_classes),
+        },
+    }
+
+
+
+def _vector_from_sums(sums, index, size):
+    """Dense vector from a label->sum mapping, ignoring unknown labels."""
+    vector = np.zeros(size, dtype=float)
+    for label, value in (sums or {}).items():
+        idx = index.get(label)
+        if idx is not None:
+            vector[idx] = float(value)
+    return vector
+
+
+
+def affinities_from_sums(sums, precomputed):
+    """Turn stored rating sums into the ``{"v1": (g, t), "v2": (g, t)}`` affinity vectors."""
+    genre_index = precomputed.get("genre_index", {})
+    theme_index = precomputed.get("theme_index", {})
+    genre_size = len(precomputed["genre_mlb"].classes_)
+    theme_size = len(precomputed["theme_mlb"].classes_)
+    v1 = sums.get("v1") or {}
+    v2 = sums.get("v2") or {}
+    rated_count = int(v1.get("rated_count") or 0)
+    v1_genre = _vector_from_sums(v1.get("genres"), genre_index, genre_size)
+    v1_theme = _vector_from_sums(v1.get("themes"), theme_index, theme_size)
+    if rated_count > 0:
+        v1_genre, v1_theme = v1_genre / rated_count, v1_theme / rated_count
+    else:
+        v1_genre, v1_theme = np.zeros(genre_size), np.zeros(theme_size)
+    return {
+        "v1": (v1_genre, v1_theme),
+        "v2": (
+            _normalize_l1(_vector_from_sums(v2.get("genres"), genre_index, genre_size)),
+            _normalize_l1(_vector_from_sums(v2.get("themes"), theme_index, theme_size)),
+        ),
+    }
+
+
+
+def _tag_columns(precomputed, current_genres, current_themes, genre_vectors, theme_vectors):
+    """Stack the requested-tag indicator and weight vectors into per-matrix columns.
+
+    Column 0 is the requested-tag indicator; the rest follow the order of
+    ``genre_vectors``/``theme_vectors``.
+    """
+    genre_index = precomputed.get("genre_index", {})
+    theme_index = precomputed.get("theme_index", {})
+    cur_genre_idx = [genre_index[genre] for genre in current_genres if genre in genre_index]
+    cur_theme_idx = [theme_index[theme] for theme in current_themes if theme in theme_index]
+    genre_cols = np.column_stack(
+        [features.column_indicator(precomputed["genre_matrix"], cur_genre_idx)] + list(genre_vectors)
+    )
+    theme_cols = np.column_stack(
+        [features.column_indicator(precomputed["theme_matrix"], cur_theme_idx)] + list(theme_vectors)
+    )
+    return genre_cols, theme_cols
 
-    def normalize(vector):
-        denom = np.sum(np.abs(vector))
-        if denom <= 0:
-            return np.zeros_like(vector, dtype=float)
-        return vector / denom
 
-    return normalize(genre_boost), normalize(theme_boost)
 
+def _tag_products(precomputed, row_idx, current_genres, current_themes, genre_vectors, theme_vectors):
+    """Requested-tag hits plus one dot product per weight vector, for each row.
 
+    Returns ``(genre_columns, theme_columns)`` transposed so each signal unpacks
+    as one row-aligned array.
+    """
+    genre_cols, theme_cols = _tag_columns(precomputed, current_genres, current_themes, genre_vectors, theme_vectors)
+    # One pass per matrix covers every signal.
+    genre_products = features.matvec(precomputed["genre_matrix"], genre_cols, row_idx)
+    theme_products = features.matvec(precomputed["theme_matrix"], theme_cols, row_idx)
+    return genre_products.T, theme_products.T
 
-def _apply_earliest_year_bias_vectorized(combined_score, years, earliest_year):
-    """Apply a capped penalty to items older than the preferred year."""
+
+
+def _catalog_internal_scores(precomputed):
+    """Return the cached 0.1-scaled internal score array."""
+    catalog_internal = precomputed.get("internal_score")
+    if catalog_internal is None:
+        catalog_internal = internal_scores(precomputed["df"]["score"])
+    return np.asarray(catalog_internal, dtype=float)
+
+
+
+def _apply_earliest_year_bias_vectorized(combined_score, years, earliest_year, missing_penalty=0.0):
+    """Apply a capped penalty to items older than the preferred year.
+
+    ``missing_penalty`` is applied to rows without a year; the DataFrame path
+    used by v1/v2 has always charged those the full 0.25.
+    """
     if combined_score is None or not earliest_year or years is None:
         return combined_score
     try:
         earliest_year = int(earliest_year)
     except (TypeError, ValueError):
         return combined_score
-    gap = earliest_year - years
+    gap = earliest_year - np.asarray(years, dtype=float)
     penalty = np.where(np.isfinite(gap) & (gap > 0), np.minimum(0.25, gap * 0.01), 0.0)
+    penalty = np.where(np.isnan(gap), missing_penalty, penalty)
     return combined_score * (1 - penalty)
 
 
@@ -400,53 +571,215 @@ def score_row_v3(
 
 
 
+def _dedupe_key(value):
+    """Hashable dedupe key; missing values all collapse to one key like drop_duplicates."""
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    return value
+
+
+def select_top_k(scores, keys, top_n):
+    """Return positions of the ``top_n`` best scores, keeping the first row per key.
+
+    Candidates are pulled in score order from an ``argpartition`` pool; the pool
+    doubles only when duplicate keys leave fewer than ``top_n`` winners. NaN
+    scores rank last, matching ``sort_values``.
+    """
+    scores = np.asarray(scores, dtype=float)
+    total = scores.shape[0]
+    if total == 0 or top_n is None or top_n <= 0:
+        return np.zeros(0, dtype=np.intp)
+    order_scores = np.where(np.isnan(scores), -np.inf, scores)
+    pool = min(total, top_n * 2 + 8)
+    while True:
+        if pool < total:
+            candidates = np.argpartition(-order_scores, pool - 1)[:pool]
+        else:
+            candidates = np.arange(total)
+        # Ties resolve by position so results are stable across pool sizes.
+        ordered = candidates[np.lexsort((candidates, -order_scores[candidates]))]
+        picked = []
+        seen = set()
+        for pos in ordered:
+            key = _dedupe_key(keys[pos]) if keys is not None else pos
+            if key in seen:
+                continue
+            seen.add(key)
+            picked.append(pos)
+            if len(picked) == top_n:
+                return np.asarray(picked, dtype=np.intp)
+        if pool >= total:
+            return np.asarray(picked, dtype=np.intp)
+        pool = min(total, pool * 2)
+
+
 def _finalize_ranked(df, top_n):
     """Sort, dedupe, and limit the ranked dataframe."""
-    ranked = df.sort_values("combined_score", ascending=False)
-    if "title_name" in ranked.columns:
-        ranked = ranked.drop_duplicates(subset=["title_name"], keep="first")
-    elif "id" in ranked.columns:
-        ranked = ranked.drop_duplicates(subset=["id"], keep="first")
-    return ranked.head(top_n)
+    if "title_name" in df.columns:
+        keys = df["title_name"].to_numpy()
+    elif "id" in df.columns:
+        keys = df["id"].to_numpy()
+    else:
+        keys = None
+    positions = select_top_k(df["combined_score"].to_numpy(dtype=float), keys, top_n)
+    return df.iloc[positions]
 
 
 
-def _score_and_rank_v3_fast(
-    filtered_df,
+def internal_scores(scores):
+    """Scale raw MAL scores to the 0-1 range used by combine_scores."""
+    values = pd.to_numeric(pd.Series(scores), errors="coerce").fillna(0).to_numpy(dtype=float)
+    return np.round(values * 0.1, 3)
+
+
+def _history_vectors(profile, precomputed):
+    """Dense history weight vectors plus their totals."""
+    hist_genres = profile.get("preferred_genres", {}) or {}
+    hist_themes = profile.get("preferred_themes", {}) or {}
+    genre_vec = _vector_from_weights(
+        hist_genres, precomputed.get("genre_index", {}), len(precomputed["genre_mlb"].classes_)
+    )
+    theme_vec = _vector_from_weights(
+        hist_themes, precomputed.get("theme_index", {}), len(precomputed["theme_mlb"].classes_)
+    )
+    return genre_vec, theme_vec, sum(hist_genres.values()) or 1, sum(hist_themes.values()) or 1
+
+
+
+def _blend_internal(match_score, internal_score):
+    """Vectorized ``combine_scores``."""
+    return np.where(
+        internal_score > 0,
+        (match_score * MATCH_VS_INTERNAL_WEIGHT) + (internal_score * (1 - MATCH_VS_INTERNAL_WEIGHT)),
+        match_score,
+    )
+
+
+
+def _year_biased(combined_score, precomputed, row_idx, earliest_year, missing_penalty=0.0):
+    """Apply the earliest-year penalty using the cached year array."""
+    years = precomputed.get("published_year")
+    if years is None:
+        return combined_score
+    return _apply_earliest_year_bias_vectorized(
+        combined_score, years[row_idx], earliest_year, missing_penalty=missing_penalty
+    )
+
+
+
+def score_v1_arrays(
     profile,
     current_genres,
     current_themes,
     read_manga,
-    top_n=20,
+    precomputed,
+    row_idx,
     earliest_year=None,
-    precomputed=None,
-    prefiltered_idx=None,
+    affinities=None,
 ):
-    """Vectorized v3 scoring path used by the web app."""
-    df = filtered_df.copy()
-    if precomputed is None or prefiltered_idx is None:
-        return df.head(0), False
+    """Score the catalog rows in ``row_idx`` with the legacy blend; returns aligned arrays.
 
-    row_idx = np.asarray(prefiltered_idx)
-    genre_matrix = precomputed["genre_matrix"][row_idx]
-    theme_matrix = precomputed["theme_matrix"][row_idx]
-    genre_counts = precomputed["genre_counts"][row_idx]
-    theme_counts = precomputed["theme_counts"][row_idx]
+    ``affinities`` may carry precomputed rating vectors (see `affinities_from_sums`).
+    """
+    row_idx = np.asarray(row_idx, dtype=np.intp)
+    cur_genres = set(current_genres)
+    cur_themes = set(current_themes)
+    genre_vec, theme_vec, total_hist_genres, total_hist_themes = _history_vectors(profile, precomputed)
+    if affinities is not None:
+        genre_affinity, theme_affinity = affinities["v1"]
+    else:
+        genre_affinity, theme_affinity = _compute_rating_affinities_vec(read_manga, precomputed)
 
-    genre_index = precomputed.get("genre_index", {})
-    theme_index = precomputed.get("theme_index", {})
+    genre_cols, theme_cols = _tag_products(
+        precomputed, row_idx, cur_genres, cur_themes, (genre_vec, genre_affinity), (theme_vec, theme_affinity)
+    )
+    cur_genre_hits, hist_genre_dot, genre_affinity_dot = genre_cols
+    cur_theme_hits, hist_theme_dot, theme_affinity_dot = theme_cols
 
-    cur_genre_idx = [genre_index[genre] for genre in current_genres if genre in genre_index]
-    cur_theme_idx = [theme_index[theme] for theme in current_themes if theme in theme_index]
+    used_current = bool((cur_genre_hits > 0).any() or (cur_theme_hits > 0).any())
+    total_score = (
+        (cur_genre_hits / max(len(cur_genres), 1)) * REQUESTED_GENRE_WEIGHT
+        + (cur_theme_hits / max(len(cur_themes), 1)) * REQUESTED_THEME_WEIGHT
+        + (hist_genre_dot / total_hist_genres) * HISTORY_GENRE_WEIGHT
+        + (hist_theme_dot / total_hist_themes) * HISTORY_THEME_WEIGHT
+        + genre_affinity_dot * READ_TITLES_GENRE_WEIGHT
+        + theme_affinity_dot * READ_TITLES_THEME_WEIGHT
+    )
+    if not used_current:
+        total_score = total_score * (1 / (1 - (REQUESTED_GENRE_WEIGHT + REQUESTED_THEME_WEIGHT)))
+    match_score = _soft_cap(total_score)
 
-    if cur_genre_idx:
-        cur_genre_hits = genre_matrix[:, cur_genre_idx].sum(axis=1)
-    else:
-        cur_genre_hits = np.zeros(len(df), dtype=float)
-    if cur_theme_idx:
-        cur_theme_hits = theme_matrix[:, cur_theme_idx].sum(axis=1)
+    internal_score = _catalog_internal_scores(precomputed)[row_idx]
+    combined_score = _blend_internal(match_score, internal_score)
+    combined_score = _year_biased(combined_score, precomputed, row_idx, earliest_year, missing_penalty=0.25)
+    return match_score, internal_score, combined_score, used_current
+
+
+
+def _minmax_array(values):
+    """Min-max normalize an array the same way ``_minmax`` treats a series."""
+    if values.size == 0:
+        return values
+    min_value = values.min()
+    max_value = values.max()
+    if max_value == min_value:
+        return np.zeros_like(values, dtype=float)
+    return (values - min_value) / (max_value - min_value)
+
+
+
+def score_v2_arrays(
+    profile,
+    current_genres,
+    current_themes,
+    read_manga,
+    precomputed,
+    row_idx,
+    earliest_year=None,
+    affinities=None,
+):
+    """Score the catalog rows in ``row_idx`` with v2; returns aligned arrays.
+
+    Match and internal scores are min-max normalized over the candidate rows,
+    exactly like the DataFrame scorer.
+    """
+    row_idx = np.asarray(row_idx, dtype=np.intp)
+    match_score, used_current = _relative_match_score(
+        profile, set(current_genres), set(current_themes), read_manga, precomputed, row_idx, affinities
+    )
+    match_score = _minmax_array(match_score)
+
+    raw_scores = precomputed["df"]["score"].to_numpy()[row_idx]
+    raw_scores = pd.to_numeric(pd.Series(raw_scores), errors="coerce").fillna(0).to_numpy(dtype=float)
+    internal_score = _minmax_array(raw_scores)
+
+    combined_score = _blend_internal(match_score, internal_score)
+    combined_score = _year_biased(combined_score, precomputed, row_idx, earliest_year, missing_penalty=0.25)
+    return match_score, internal_score, combined_score, used_current
+
+
+
+def _relative_columns(profile, current_genres, current_themes, read_manga, precomputed, affinities=None):
+    """Per-matrix signal columns for the v2/v3 blend plus history totals."""
+    genre_vec, theme_vec, total_hist_genres, total_hist_themes = _history_vectors(profile, precomputed)
+    if affinities is not None:
+        genre_affinity, theme_affinity = affinities["v2"]
     else:
-        cur_theme_hits = np.zeros(len(df), dtype=float)
+        genre_affinity, theme_affinity = _compute_rating_affinities_v2_vec(read_manga, precomputed)
+    genre_cols, theme_cols = _tag_columns(
+        precomputed, current_genres, current_themes, (genre_vec, genre_affinity), (theme_vec, theme_affinity)
+    )
+    return genre_cols, theme_cols, (total_hist_genres, total_hist_themes)
+
+
+
+def _relative_total(genre_products, theme_products, current_genres, current_themes, totals, precomputed, row_idx):
+    """Combine per-row signal products (rows x 3) into the raw v2/v3 match score."""
+    genre_counts = np.maximum(precomputed["genre_counts"][row_idx], 1)
+    theme_counts = np.maximum(precomputed["theme_counts"][row_idx], 1)
+    total_hist_genres, total_hist_themes = totals
+    cur_genre_hits, hist_genre_dot, genre_affinity_dot = genre_products.T
+    cur_theme_hits, hist_theme_dot, theme_affinity_dot = theme_products.T
 
     used_current = bool((cur_genre_hits > 0).any() or (cur_theme_hits > 0).any())
 
@@ -456,28 +789,14 @@ def _score_and_rank_v3_fast(
     weighted_cur_genres = cur_genres_score * REQUESTED_GENRE_WEIGHT
     weighted_cur_themes = cur_themes_score * REQUESTED_THEME_WEIGHT
 
-    hist_genres = profile.get("preferred_genres", {}) or {}
-    hist_themes = profile.get("preferred_themes", {}) or {}
-    total_hist_genres = sum(hist_genres.values()) or 1
-    total_hist_themes = sum(hist_themes.values()) or 1
-
-    genre_vec = _vector_from_weights(hist_genres, genre_index, len(precomputed["genre_mlb"].classes_))
-    theme_vec = _vector_from_weights(hist_themes, theme_index, len(precomputed["theme_mlb"].classes_))
-
-    denom_genres = total_hist_genres * np.maximum(genre_counts, 1)
-    denom_themes = total_hist_themes * np.maximum(theme_counts, 1)
-
-    hist_genres_score = (genre_matrix @ genre_vec) / denom_genres
-    hist_themes_score = (theme_matrix @ theme_vec) / denom_themes
+    hist_genres_score = hist_genre_dot / (total_hist_genres * genre_counts)
+    hist_themes_score = hist_theme_dot / (total_hist_themes * theme_counts)
 
     weighted_hist_genres = hist_genres_score * HISTORY_GENRE_WEIGHT
     weighted_hist_themes = hist_themes_score * HISTORY_THEME_WEIGHT
 
-    genre_affinity, theme_affinity = _compute_rating_affinities_v2_vec(read_manga, precomputed)
-    rating_genre_boost = (genre_matrix @ genre_affinity) / np.maximum(genre_counts, 1)
-    rating_theme_boost = (theme_matrix @ theme_affinity) / np.maximum(theme_counts, 1)
-    rating_genre_boost = np.maximum(rating_genre_boost, -0.2)
-    rating_theme_boost = np.maximum(rating_theme_boost, -0.2)
+    rating_genre_boost = np.maximum(genre_affinity_dot / genre_counts, -0.2)
+    rating_theme_boost = np.maximum(theme_affinity_dot / theme_counts, -0.2)
 
     weighted_rating_genres = rating_genre_boost * READ_TITLES_GENRE_WEIGHT
     weighted_rating_themes = rating_theme_boost * READ_TITLES_THEME_WEIGHT
@@ -490,28 +809,194 @@ def _score_and_rank_v3_fast(
         + weighted_rating_genres
         + weighted_rating_themes
     )
+    return total_score, used_current
+
+
 
+def _relative_match_score(
+    profile, current_genres, current_themes, read_manga, precomputed, row_idx, affinities=None
+):
+    """Raw v2/v3 match score (before capping) and whether requested tags matched."""
+    genre_cols, theme_cols, totals = _relative_columns(
+        profile, current_genres, current_themes, read_manga, precomputed, affinities
+    )
+    genre_products = features.matvec(precomputed["genre_matrix"], genre_cols, row_idx)
+    theme_products = features.matvec(precomputed["theme_matrix"], theme_cols, row_idx)
+    return _relative_total(
+        genre_products, theme_products, current_genres, current_themes, totals, precomputed, row_idx
+    )
+
+
+
+def _finish_v3(total_score, used_current, precomputed, row_idx, earliest_year):
+    """Turn the raw v3 match score into match/internal/combined arrays."""
     match_score = _soft_cap(total_score)
     if not used_current:
         match_score = match_score * (1 / (1 - (REQUESTED_GENRE_WEIGHT + REQUESTED_THEME_WEIGHT)))
 
-    internal_score = pd.to_numeric(df.get("score", 0), errors="coerce").fillna(0).to_numpy() * 0.1
-    internal_score = np.round(internal_score, 3)
+    internal_score = _catalog_internal_scores(precomputed)[row_idx]
+    combined_score = _blend_internal(match_score, internal_score)
+    combined_score = _year_biased(combined_score, precomputed, row_idx, earliest_year)
+    return match_score, internal_score, combined_score, used_current
 
-    combined_score = np.where(
-        internal_score > 0,
-        (match_score * MATCH_VS_INTERNAL_WEIGHT) + (internal_score * (1 - MATCH_VS_INTERNAL_WEIGHT)),
-        match_score,
+
+
+def score_v3_arrays(
+    profile,
+    current_genres,
+    current_themes,
+    read_manga,
+    precomputed,
+    row_idx,
+    earliest_year=None,
+    affinities=None,
+):
+    """Score the catalog rows in ``row_idx`` with v3; returns aligned score arrays."""
+    row_idx = np.asarray(row_idx, dtype=np.intp)
+    # v3 has always divided requested-tag hits by the raw request length.
+    total_score, used_current = _relative_match_score(
+        profile, list(current_genres), list(current_themes), read_manga, precomputed, row_idx, affinities
     )
+    return _finish_v3(total_score, used_current, precomputed, row_idx, earliest_year)
 
-    years = precomputed.get("published_year")
-    if years is not None:
-        combined_score = _apply_earliest_year_bias_vectorized(combined_score, years[row_idx], earliest_year)
 
-    df["match_score"] = match_score
-    df["internal_score"] = internal_score
-    df["combined_score"] = combined_score
-    return _finalize_ranked(df, top_n), used_current
+
+_ARRAY_SCORERS = {
+    "v1": score_v1_arrays,
+    "v2": score_v2_arrays,
+    "v3": score_v3_arrays,
+}
+
+
+
+def rank_from_cache(
+    version,
+    profile,
+    current_genres,
+    current_themes,
+    read_manga,
+    precomputed,
+    row_idx,
+    top_n=20,
+    earliest_year=None,
+    affinities=None,
+):
+    """Score ``row_idx`` with the array scorer for ``version`` and materialise the top rows."""
+    row_idx = np.asarray(row_idx, dtype=np.intp)
+    catalog = precomputed["df"]
+    match_score, internal_score, combined_score, used_current = _ARRAY_SCORERS[version](
+        profile,
+        current_genres,
+        current_themes,
+        read_manga,
+        precomputed,
+        row_idx,
+        earliest_year=earliest_year,
+        affinities=affinities,
+    )
+
+    return _materialise_top(catalog, row_idx, match_score, internal_score, combined_score, top_n), used_current
+
+
+
+def _materialise_top(catalog, row_idx, match_score, internal_score, combined_score, top_n):
+    """Slice the deduped top rows out of the cached frame and attach their scores."""
+    titles = catalog["title_name"].to_numpy()[row_idx]
+    winners = select_top_k(combined_score, titles, top_n)
+    ranked = catalog.iloc[row_idx[winners]].copy()
+    ranked["match_score"] = match_score[winners]
+    ranked["internal_score"] = internal_score[winners]
+    ranked["combined_score"] = combined_score[winners]
+    return ranked
+
+
+
+def rank_batch_v3(requests, precomputed, chunk_size=32):
+    """Rank many users with v3 using one matrix-matrix product per chunk of users.
+
+    Each request is a dict with ``profile``, ``current_genres``,
+    ``current_themes``, ``read_manga``, ``row_idx``, ``top_n``,
+    ``earliest_year`` and optionally ``affinities``. Returns ``(ranked, used_current)`` per request, in order.
+    """
+    catalog = precomputed["df"]
+    results = []
+    chunk_size = max(int(chunk_size or 1), 1)
+    for start in range(0, len(requests), chunk_size):
+        chunk = requests[start:start + chunk_size]
+        genre_blocks = []
+        theme_blocks = []
+        totals = []
+        for request in chunk:
+            genre_cols, theme_cols, request_totals = _relative_columns(
+                request["profile"],
+                list(request["current_genres"]),
+                list(request["current_themes"]),
+                request["read_manga"],
+                precomputed,
+                request.get("affinities"),
+            )
+            genre_blocks.append(genre_cols)
+            theme_blocks.append(theme_cols)
+            totals.append(request_totals)
+
+        # Candidate masks differ per user, so score the whole catalog once per chunk.
+        genre_products = features.matvec(precomputed["genre_matrix"], np.hstack(genre_blocks))
+        theme_products = features.matvec(precomputed["theme_matrix"], np.hstack(theme_blocks))
+
+        for offset, request in enumerate(chunk):
+            row_idx = np.asarray(request["row_idx"], dtype=np.intp)
+            cols = slice(offset * 3, offset * 3 + 3)
+            total_score, used_current = _relative_total(
+                genre_products[row_idx, cols],
+                theme_products[row_idx, cols],
+                list(request["current_genres"]),
+                list(request["current_themes"]),
+                totals[offset],
+                precomputed,
+                row_idx,
+            )
+            match_score, internal_score, combined_score, used_current = _finish_v3(
+                total_score, used_current, precomputed, row_idx, request.get("earliest_year")
+            )
+            ranked = _materialise_top(
+                catalog, row_idx, match_score, internal_score, combined_score, request.get("top_n", 20)
+            )
+            results.append((ranked, used_current))
+    return results
+
+
+
+def _score_and_rank_v3_fast(
+    filtered_df,
+    profile,
+    current_genres,
+    current_themes,
+    read_manga,
+    top_n=20,
+    earliest_year=None,
+    precomputed=None,
+    prefiltered_idx=None,
+    affinities=None,
+):
+    """Vectorized v3 scoring path used by the web app.
+
+    Scores are computed on arrays over ``prefiltered_idx``; only the winning
+    rows of the cached catalog frame are materialised.
+    """
+    if precomputed is None or prefiltered_idx is None:
+        return (filtered_df if filtered_df is not None else pd.DataFrame()).head(0), False
+    return rank_from_cache(
+        "v3",
+        profile,
+        current_genres,
+        current_themes,
+        read_manga,
+        precomputed,
+        prefiltered_idx,
+        top_n=top_n,
+        earliest_year=earliest_year,
+        affinities=affinities,
+    )
 
 
 
@@ -526,6 +1011,7 @@ def score_and_rank_v3(
     earliest_year=None,
     precomputed=None,
     prefiltered_idx=None,
+    affinities=None,
 ):
     """Compute and rank results using the balanced v3 scorer."""
     if precomputed is not None and prefiltered_idx is not None:
@@ -539,6 +1025,7 @@ def score_and_rank_v3(
             earliest_year=earliest_year,
             precomputed=precomputed,
             prefiltered_idx=prefiltered_idx,
+            affinities=affinities,
         )
 
     df = filtered_df.copy()
@@ -595,8 +1082,25 @@ def score_and_rank_v2(
     read_manga,
     top_n=20,
     earliest_year=None,
+    precomputed=None,
+    prefiltered_idx=None,
+    affinities=None,
 ):
     """Compute and rank results using the relative v2 scorer."""
+    if precomputed is not None and prefiltered_idx is not None:
+        return rank_from_cache(
+            "v2",
+            profile,
+            current_genres,
+            current_themes,
+            read_manga,
+            precomputed,
+            prefiltered_idx,
+            top_n=top_n,
+            earliest_year=earliest_year,
+            affinities=affinities,
+        )
+
     df = filtered_df.copy()
     cur_genres = set(current_genres)
     cur_themes = set(current_themes)
@@ -647,8 +1151,25 @@ def score_and_rank(
     read_manga,
     top_n=20,
     earliest_year=None,
+    precomputed=None,
+    prefiltered_idx=None,
+    affinities=None,
 ):
     """Compute and rank results using the legacy scorer."""
+    if precomputed is not None and prefiltered_idx is not None:
+        return rank_from_cache(
+            "v1",
+            profile,
+            current_genres,
+            current_themes,
+            read_manga,
+            precomputed,
+            prefiltered_idx,
+            top_n=top_n,
+            earliest_year=earliest_year,
+            affinities=affinities,
+        )
+
     df = filtered_df.copy()
     cur_genres = set(current_genres)
     cur_themes = set(current_themes)
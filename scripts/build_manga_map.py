@@ -4,6 +4,13 @@ import argparse
 import ast
 import re
 import sqlite3
+import sys
+from pathlib import Path
+
+# Allow `python scripts/build_manga_map.py` to import shared helpers from the repo root.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.fuzzy_match import build_ngram_index, fuzzy_search  # noqa: E402
 
 
 def normalize_title(value):
@@ -57,11 +64,31 @@ def extract_year(value):
     return None
 
 
+def fuzzy_candidates(fuzzy_index, titles, mal_type_map, mdex_type, min_similarity, margin):
+    """Return MAL ids whose best fuzzy title match is within `margin` of the top score."""
+    best = {}
+    for title in titles:
+        for mal_id, similarity in fuzzy_search(fuzzy_index, title, limit=5, min_similarity=min_similarity):
+            if mdex_type and mal_type_map.get(mal_id) not in (None, mdex_type):
+                continue
+            best[mal_id] = max(best.get(mal_id, 0.0), similarity)
+    if not best:
+        return set()
+    top = max(best.values())
+    return {mal_id for mal_id, similarity in best.items() if top - similarity < margin}
+
+
 def main():
     """Run the script entrypoint."""
     parser = argparse.ArgumentParser(description="Build MangaDex -> MAL map using title fallback")
     parser.add_argument("--db", default="/opt/shelf/data/db/manga.db")
     parser.add_argument("--max", type=int, default=0, help="max mappings to add (0 = all)")
+    parser.add_argument(
+        "--min-similarity",
+        type=float,
+        default=0.85,
+        help="n-gram similarity needed for a fuzzy title match (above 1 disables fuzzy matching)",
+    )
     args = parser.parse_args()
 
     conn = sqlite3.connect(args.db)
@@ -75,14 +102,18 @@ def main():
         )
         title_index = {}
         mal_year = {}
+        mal_type_map = {}
+        fuzzy_entries = []
         for row in cur.fetchall():
             mal_id = row["mal_id"]
             if mal_id is None:
                 continue
             mal_year[mal_id] = extract_year(row["publishing_date"])
             mal_type = normalize_item_type(row["item_type"])
+            mal_type_map[mal_id] = mal_type
             titles = [row["title_name"], row["english_name"], row["japanese_name"]]
             titles += parse_list(row["synonymns"])
+            fuzzy_entries.extend((title, mal_id) for title in titles if title)
             for title in titles:
                 norm = normalize_title(title)
                 if not norm:
@@ -92,6 +123,8 @@ def main():
                 if mal_type:
                     bucket.setdefault(mal_type, set()).add(mal_id)
 
+        fuzzy_index = build_ngram_index(fuzzy_entries) if args.min_similarity <= 1 else None
+
         cur = conn.execute(
             "SELECT id, title_name, english_name, japanese_name, synonymns, publishing_date, item_type FROM manga_core"
         )
@@ -129,6 +162,13 @@ def main():
                     if not bucket:
                         continue
                     candidates.update(bucket.get("_all", set()))
+            method_prefix = "title"
+            if not candidates and fuzzy_index is not None:
+                # No exact title hit: fall back to near-miss titles (typos, punctuation, subtitles).
+                candidates = fuzzy_candidates(
+                    fuzzy_index, [t for t in titles if t], mal_type_map, mdex_type, args.min_similarity, 0.05
+                )
+                method_prefix = "title_fuzzy"
             if not candidates:
                 continue
 
@@ -136,14 +176,14 @@ def main():
             method = None
             if len(candidates) == 1:
                 chosen = next(iter(candidates))
-                method = "title_exact"
+                method = "title_exact" if method_prefix == "title" else method_prefix
             else:
                 year = extract_year(row["publishing_date"])
                 if year is not None:
                     filtered = {c for c in candidates if mal_year.get(c) == year}
                     if len(filtered) == 1:
                         chosen = next(iter(filtered))
-                        method = "title_year"
+                        method = f"{method_prefix}_year"
             if chosen is None:
                 continue
             if chosen in existing_mal:
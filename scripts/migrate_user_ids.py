@@ -3,8 +3,14 @@
 import ast
 import re
 import sqlite3
+import sys
 from pathlib import Path
 
+# Allow `python scripts/migrate_user_ids.py` to import shared helpers from the repo root.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.fuzzy_match import build_ngram_index, fuzzy_search  # noqa: E402
+
 DB_PATH = "/opt/shelf/data/db/manga.db"
 UUID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.I)
 
@@ -137,6 +143,7 @@ def build_title_index(conn):
     )
     index = {}
     stats = {}
+    fuzzy_entries = []
     for row in cur.fetchall():
         mal_id = row[0]
         item_type = normalize_item_type(row[5])
@@ -146,6 +153,7 @@ def build_title_index(conn):
         stats[mal_id] = {}
         titles = [row[1], row[2], row[3]]
         titles += parse_list(row[4])
+        fuzzy_entries.extend((t, mal_id) for t in titles if t)
         normalized_titles = [normalize_title(t) for t in titles if t]
         normalized_titles = [t for t in normalized_titles if t]
         # Add concatenations of jp+en if both exist
@@ -173,7 +181,8 @@ def build_title_index(conn):
                 "popularity": popularity or 0,
                 "score": score or 0,
             }
-    return index, stats
+    # Near-miss lookups go through the n-gram index instead of scanning every title key.
+    return index, stats, build_ngram_index(fuzzy_entries)
 
 
 def pick_best(candidates, stats):
@@ -194,7 +203,7 @@ def pick_best(candidates, stats):
     return best
 
 
-def fallback_match(manga_id, index, stats):
+def fallback_match(manga_id, index, stats, fuzzy_index):
     """Handle fallback match for this module."""
     key = normalize_title(manga_id)
     if not key:
@@ -204,15 +213,9 @@ def fallback_match(manga_id, index, stats):
         if len(direct) == 1:
             return next(iter(direct))
         return pick_best(direct, stats)
-    # Substring fallback (only if a unique candidate)
-    candidates = set()
-    for title_key, mal_ids in index.items():
-        if not title_key:
-            continue
-        if title_key in key or key in title_key:
-            # Require decent overlap to avoid tiny matches
-            if len(title_key) >= max(6, int(len(key) * 0.7)) or len(key) >= max(6, int(len(title_key) * 0.7)):
-                candidates.update(mal_ids)
+    # Fuzzy fallback: keep every title within a small margin of the best similarity
+    matches = fuzzy_search(fuzzy_index, manga_id, limit=10, min_similarity=0.7)
+    candidates = {mal_id for mal_id, similarity in matches if matches[0][1] - similarity < 0.05}
     if candidates:
         if len(candidates) == 1:
             return next(iter(candidates))
@@ -220,7 +223,7 @@ def fallback_match(manga_id, index, stats):
     return None
 
 
-def backfill_table_fuzzy(conn, table, index, stats):
+def backfill_table_fuzzy(conn, table, index, stats, fuzzy_index):
     """Backfill missing table fuzzy using existing mappings."""
     cur = conn.execute(
         f"SELECT rowid, manga_id, mdex_id FROM {table} WHERE mal_id IS NULL"
@@ -232,7 +235,7 @@ def backfill_table_fuzzy(conn, table, index, stats):
             continue
         if manga_id and (manga_id.lower().startswith("mal:") or UUID_RE.match(str(manga_id).strip())):
             continue
-        mal_id = fallback_match(manga_id, index, stats)
+        mal_id = fallback_match(manga_id, index, stats, fuzzy_index)
         if mal_id:
             updates.append((mal_id, rowid))
     if updates:
@@ -567,9 +570,9 @@ def main():
             backfill_table(conn, table)
         conn.commit()
 
-        index, stats = build_title_index(conn)
+        index, stats, fuzzy_index = build_title_index(conn)
         for table in ("user_ratings", "user_dnr", "user_reading_list"):
-            backfill_table_fuzzy(conn, table, index, stats)
+            backfill_table_fuzzy(conn, table, index, stats, fuzzy_index)
         conn.commit()
 
         for table in ("user_ratings", "user_dnr", "user_reading_list"):
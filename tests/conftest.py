@@ -17,7 +17,16 @@ def app_client(tmp_path, monkeypatch):
 
     rec_service._MANGA_CACHE.clear()
     rec_service._OPTIONS_CACHE.clear()
-    rec_service._STATS_NAME_CACHE.clear()
+    rec_service._TYPEAHEAD_CACHE.clear()
+    rec_service._RESULT_CACHE.clear()
+    for key in rec_service._RESULT_CACHE_STATS:
+        rec_service._RESULT_CACHE_STATS[key] = 0
+
+    import app.services.stats_names as stats_names_service
+
+    stats_names_service.invalidate()
+    for key in stats_names_service._NAME_STATS:
+        stats_names_service._NAME_STATS[key] = 0
 
     import app.app as app_module
 
@@ -27,3 +36,9 @@ def app_client(tmp_path, monkeypatch):
 
     with app.test_client() as client:
         yield app, client, db_path
+
+    from app import write_queue
+    from app.db import close_pool
+
+    write_queue.shutdown()
+    close_pool()
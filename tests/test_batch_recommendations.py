@@ -0,0 +1,47 @@
+import sqlite3
+
+from tests.test_pr4_smoke import _insert_user
+from tests.test_recommendation_cache import _fresh_cache_module, _seed_catalog
+
+
+def _seed_users(conn):
+    _insert_user(conn, "alice")
+    _insert_user(conn, "bob")
+    conn.execute("UPDATE users SET preferred_genres = ? WHERE username = 'bob'", ("{'Drama': 3}",))
+    conn.execute(
+        "INSERT INTO user_ratings (user_id, manga_id, canonical_id, mdex_id, rating, recommended_by_us, finished_reading) "
+        "VALUES ('alice', 'mdx-1', 'mdx-1', 'mdx-1', 9, 0, 1)"
+    )
+    conn.execute(
+        "INSERT INTO user_dnr (user_id, manga_id, canonical_id, mdex_id) VALUES ('bob', 'mdx-6', 'mdx-6', 'mdx-6')"
+    )
+
+
+def test_batch_matches_single_user_recommendations(app_client, monkeypatch):
+    app, _, db_path = app_client
+    # Both result caches off, so the single-user calls score instead of reading the batch's output.
+    monkeypatch.setenv("MANGA_REC_CACHE_TTL_SEC", "0")
+    monkeypatch.setenv("MANGA_RESULT_CACHE_SIZE", "0")
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn)
+        _seed_users(conn)
+        conn.commit()
+    rec_service = _fresh_cache_module()
+
+    requests = [
+        {"user_id": "ALICE", "current_genres": ["Action"], "current_themes": ["School"]},
+        "nobody",
+        {"user_id": "bob", "current_genres": ["Romance"], "current_themes": [], "limit": 2},
+    ]
+    with app.app_context():
+        batch = rec_service.recommend_for_users(str(db_path), requests, limit=5)
+        rec_service._RESULT_CACHE.clear()
+        alice = rec_service.recommend_for_user(str(db_path), "ALICE", ["Action"], ["School"], limit=5)
+        bob = rec_service.recommend_for_user(str(db_path), "bob", ["Romance"], [], limit=2)
+
+    assert batch[1] == ([], False)
+    assert [item["id"] for item in batch[0][0]] == [item["id"] for item in alice[0]]
+    assert batch[0][1] == alice[1]
+    assert [item["id"] for item in batch[2][0]] == [item["id"] for item in bob[0]]
+    assert "mdx-1" not in [item["id"] for item in batch[0][0]]
+    assert "mdx-6" not in [item["id"] for item in batch[2][0]]
@@ -0,0 +1,47 @@
+import sqlite3
+
+from tests.test_pr4_smoke import _clear_recommendation_caches
+from tests.test_recommendation_cache import _seed_catalog
+
+
+def _reference(cache, sort_key, ascending, genres=None, status=None, min_score=None):
+    """The original DataFrame filter/sort the browse engine replaces."""
+    df = cache["df"][cache["live_mask"]]
+    if genres:
+        df = df[df["genres"].apply(lambda values: any(g in values for g in genres))]
+    if min_score is not None:
+        df = df[df["score"].fillna(0) >= min_score]
+    if status:
+        df = df[df["status"].fillna("").str.lower() == status.lower()]
+    df = df.sort_values(by=sort_key, ascending=ascending, na_position="last", kind="stable")
+    return df["id"].tolist()
+
+
+def test_browse_rows_match_dataframe_filters(app_client):
+    _, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn)
+        conn.execute("UPDATE manga_core SET status = 'Publishing' WHERE id IN ('mdx-3', 'mdx-5')")
+        conn.commit()
+    _clear_recommendation_caches()
+
+    from app.services import browse as browse_service
+    from app.services import recommendations as rec_service
+
+    cache = rec_service._get_cache(db_path)
+
+    rows = browse_service.browse_rows(db_path, sort="score")
+    assert [row["id"] for row in rows] == _reference(cache, "score", False)
+    # Unscored titles sort last and surface as None rather than NaN.
+    assert rows[-1]["id"] == "mdx-4"
+    assert rows[-1]["score"] is None
+
+    rows = browse_service.browse_rows(db_path, sort="popularity", genres=["Action"], status="publishing")
+    assert [row["id"] for row in rows] == _reference(cache, "popularity", True, ["Action"], "publishing")
+    assert [row["id"] for row in rows] == ["mdx-3", "mdx-5"]
+
+    rows = browse_service.browse_rows(db_path, sort="members", min_score=8.0, limit=2)
+    assert [row["id"] for row in rows] == _reference(cache, "members", False, min_score=8.0)[:2]
+    assert all(isinstance(row["genres"], list) for row in rows)
+
+    assert browse_service.browse_rows(db_path, genres=["Unknown"]) == []
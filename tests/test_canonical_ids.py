@@ -0,0 +1,65 @@
+import sqlite3
+
+from tests.test_batch_recommendations import _seed_users
+from tests.test_recommendation_cache import _seed_catalog
+
+
+def test_backfill_resolves_legacy_rows_for_equality_reads(app_client):
+    app, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn)
+        _seed_users(conn)
+        # Legacy rows: a title-keyed rating and a MAL-placeholder DNR entry, neither resolved.
+        conn.execute(
+            "INSERT INTO user_ratings (user_id, manga_id, rating) VALUES ('alice', 'Quiet Hearts', 8)"
+        )
+        conn.execute("INSERT INTO user_dnr (user_id, manga_id, mdex_id) VALUES ('alice', 'mal:2003', 'mal:2003')")
+        conn.commit()
+
+    from app.repos import canonical_ids as canonical_ids_repo
+    from app.repos import dnr as dnr_repo
+    from app.repos import ratings as ratings_repo
+    from app.repos import user_state as user_state_repo
+    from app.services import canonical_ids as canonical_ids_service
+
+    with app.app_context():
+        assert canonical_ids_repo.has_pending()
+        before = user_state_repo.get_ratings_version("alice")
+
+        assert canonical_ids_service.backfill(batch_size=1) == 4
+        assert not canonical_ids_repo.has_pending()
+        assert user_state_repo.get_ratings_version("alice") == before + 1
+
+        assert ratings_repo.list_ratings_map("alice") == {"mdx-1": 9, "mdx-2": 8}
+        titles = {row["canonical_id"]: row["title_name"] for row in ratings_repo.list_by_user("alice")}
+        assert titles == {"mdx-1": "Blade Road", "mdx-2": "Quiet Hearts"}
+
+        assert dnr_repo.list_manga_ids_by_user("alice") == ["mdx-3"]
+        (dnr_row,) = dnr_repo.list_by_user("alice")
+        assert dnr_row["title_name"] == "Star Harbor"
+        assert dnr_row["mal_id"] == 2003
+
+
+def test_mal_only_rows_keep_their_metadata(app_client):
+    app, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_users(conn)
+        conn.execute(
+            "INSERT INTO manga_core (id, title_name, item_type, cover_url) VALUES ('mal:2009', 'Old Moon', 'Manga', 'old-moon.jpg')"
+        )
+        for table in ("user_ratings", "user_dnr", "user_reading_list"):
+            conn.execute(
+                f"INSERT INTO {table} (user_id, manga_id, canonical_id, mdex_id, mal_id, ids_resolved) "
+                "VALUES ('alice', 'mal:2009', 'mal:2009', NULL, 2009, 1)"
+            )
+        conn.commit()
+
+    from app.repos import dnr as dnr_repo
+    from app.repos import ratings as ratings_repo
+    from app.repos import reading_list as reading_list_repo
+
+    with app.app_context():
+        for repo in (ratings_repo, dnr_repo, reading_list_repo):
+            rows = {row["canonical_id"]: row for row in repo.list_by_user("alice")}
+            assert rows["mal:2009"]["title_name"] == "Old Moon"
+            assert rows["mal:2009"]["cover_url"] == "old-moon.jpg"
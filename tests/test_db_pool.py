@@ -0,0 +1,42 @@
+from app import db as db_module
+
+
+def test_pooled_connection_is_reused_and_tuned(app_client):
+    app, _, _ = app_client
+
+    with app.app_context():
+        first = db_module.get_db()
+    with app.app_context():
+        second = db_module.get_db()
+        assert second is first
+        assert second.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        # synchronous=NORMAL reads back as 1.
+        assert second.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert second.execute("PRAGMA cache_size").fetchone()[0] == -app.config["DB_CACHE_SIZE_KB"]
+
+
+def test_pool_replaces_broken_connection_and_rolls_back(app_client):
+    app, _, _ = app_client
+
+    with app.app_context():
+        db = db_module.get_db()
+        db.execute("INSERT INTO users (username) VALUES ('left-open')")
+        assert db.in_transaction
+    # The teardown rolled back the abandoned write instead of leaking it.
+    assert not db.in_transaction
+
+    db.close()
+    with app.app_context():
+        fresh = db_module.get_db()
+        assert fresh is not db
+        assert fresh.execute("SELECT COUNT(*) FROM users WHERE username = 'left-open'").fetchone()[0] == 0
+
+
+def test_pool_can_be_disabled(app_client):
+    app, _, _ = app_client
+    app.config["DB_POOL"] = False
+
+    with app.app_context():
+        first = db_module.get_db()
+    with app.app_context():
+        assert db_module.get_db() is not first
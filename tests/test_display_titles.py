@@ -0,0 +1,53 @@
+import sqlite3
+
+import pandas as pd
+
+from app.services.display_titles import display_title_columns, pick_display_title
+from tests.test_pr4_smoke import _clear_recommendation_caches, _insert_user
+from tests.test_recommendation_cache import _seed_catalog
+
+
+def test_display_title_columns_match_row_picker():
+    df = pd.DataFrame(
+        [
+            ("a", "Blade Road", "Blade Road (Official Colored)", None, "[]", "Blade Road EN"),
+            ("b", "Hoshi no Minato", None, "星の港", "['Star Harbor', 'Hoshi no Minato']", None),
+            ("c", "Quiet Hearts", "Quiet  hearts", None, "['Silent Love (Omnibus)', 'Silent Love']", None),
+            ("d", "Iron Verse", "Steel Poem", None, None, "Iron Verse Stats"),
+            ("e", None, None, None, float("nan"), None),
+        ],
+        columns=["id", "title_name", "english_name", "japanese_name", "synonymns", "stats_english_name"],
+    )
+    english, japanese = display_title_columns(df)
+    for pos, row in enumerate(df.to_dict("records")):
+        title = row["title_name"] or row["id"]
+        args = (title, row["english_name"], row["japanese_name"], row["synonymns"], row["stats_english_name"])
+        assert english[pos] == pick_display_title(*args, "English")
+        assert japanese[pos] == pick_display_title(*args, "Japanese")
+    assert list(english) == ["Blade Road (Official Colored)", "Star Harbor", "Silent Love", "Iron Verse Stats", "e"]
+
+
+def test_list_responses_use_precomputed_titles(app_client, monkeypatch):
+    _, client, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _insert_user(conn, "reader")
+        _seed_catalog(conn)
+        conn.execute("UPDATE manga_stats SET english_name = 'Harbor of Stars' WHERE mal_id = 2003")
+        conn.execute(
+            "INSERT INTO user_ratings (user_id, manga_id, canonical_id, mdex_id, mal_id, rating, ids_resolved) "
+            "VALUES ('reader', 'mdx-3', 'mdx-3', 'mdx-3', 2003, 8, 1)"
+        )
+        conn.commit()
+    _clear_recommendation_caches()
+
+    from app.repos import manga as manga_repo
+
+    def fail_on_sql(*_args, **_kwargs):
+        raise AssertionError("display title issued a stats query")
+
+    monkeypatch.setattr(manga_repo, "get_stats_by_mal_id", fail_on_sql)
+    with client.session_transaction() as session_state:
+        session_state["user_id"] = "reader"
+
+    items = client.get("/shelf/api/ratings").get_json()["items"]
+    assert [item["display_title"] for item in items] == ["Harbor of Stars"]
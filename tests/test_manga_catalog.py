@@ -0,0 +1,96 @@
+import os
+import sqlite3
+from types import SimpleNamespace
+
+from tests.test_recommendation_cache import _seed_catalog
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "schema.sql")
+
+
+def _catalog_matches_view(conn):
+    catalog = conn.execute("SELECT * FROM manga_catalog ORDER BY mangadex_id").fetchall()
+    merged = conn.execute("SELECT * FROM manga_merged ORDER BY mangadex_id").fetchall()
+    return catalog == merged
+
+
+def test_catalog_tracks_source_table_writes(app_client):
+    _, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn)
+        assert conn.execute("SELECT COUNT(*) FROM manga_catalog").fetchone()[0] == 6
+        assert _catalog_matches_view(conn)
+
+        conn.execute("UPDATE manga_stats SET score = 6.5 WHERE mal_id = 2001")
+        conn.execute("UPDATE manga_core SET title_name = 'Blade Road Returns' WHERE id = 'mdx-1'")
+        conn.execute("UPDATE manga_map SET mal_id = 2001 WHERE mangadex_id = 'mdx-2'")
+        conn.execute("INSERT OR REPLACE INTO manga_core (id, title_name) VALUES ('mdx-9', 'Late Entry')")
+        conn.execute("DELETE FROM manga_core WHERE id = 'mdx-3'")
+        conn.execute("DELETE FROM manga_stats WHERE mal_id = 2002")
+        assert _catalog_matches_view(conn)
+        assert conn.execute(
+            "SELECT title_name, score FROM manga_catalog WHERE mangadex_id = 'mdx-2'"
+        ).fetchone() == ("Quiet Hearts", 6.5)
+
+
+def test_init_db_rebuilds_stale_catalog(app_client):
+    app, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn)
+        # Simulate rows written by an older schema without the refresh triggers.
+        conn.execute("DELETE FROM manga_catalog")
+        conn.commit()
+
+    import app.app as app_module
+
+    app_module.init_db(app)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM manga_catalog").fetchone()[0] == 6
+        assert _catalog_matches_view(conn)
+        plan = " ".join(
+            row[-1]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT mangadex_id FROM manga_catalog WHERE mal_id = ?", (2001,)
+            )
+        )
+    assert "idx_manga_catalog_mal_id" in plan
+
+
+def test_init_db_repairs_catalog_written_without_triggers(app_client):
+    app, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn)
+        # Same row count, stale content: an edit made while the trigger was missing.
+        conn.execute("DROP TRIGGER trg_manga_core_update_catalog")
+        conn.execute("UPDATE manga_core SET title_name = 'Blade Road Returns' WHERE id = 'mdx-1'")
+        conn.commit()
+        assert not _catalog_matches_view(conn)
+
+    import app.app as app_module
+
+    app_module.init_db(app)
+
+    with sqlite3.connect(db_path) as conn:
+        assert _catalog_matches_view(conn)
+        conn.execute("UPDATE manga_core SET title_name = 'Blade Road Again' WHERE id = 'mdx-1'")
+        assert _catalog_matches_view(conn)
+
+
+def test_schema_script_defers_catalog_to_init_db(app_client, tmp_path):
+    app, _, _ = app_client
+    db_path = tmp_path / "scripted.db"
+    with open(SCHEMA_PATH, encoding="utf-8") as handle:
+        schema_sql = handle.read()
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(schema_sql)
+        _seed_catalog(conn)
+        conn.commit()
+
+    import app.app as app_module
+
+    app_module.init_db(SimpleNamespace(config={**app.config, "DATABASE": str(db_path)}, logger=app.logger))
+
+    with sqlite3.connect(db_path) as conn:
+        assert _catalog_matches_view(conn)
+        conn.execute("DELETE FROM manga_core WHERE id = 'mdx-3'")
+        assert _catalog_matches_view(conn)
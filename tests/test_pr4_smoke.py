@@ -3,10 +3,12 @@ import sqlite3
 
 def _clear_recommendation_caches():
     import app.services.recommendations as rec_service
+    import app.services.stats_names as stats_names_service
 
     rec_service._MANGA_CACHE.clear()
     rec_service._OPTIONS_CACHE.clear()
-    rec_service._STATS_NAME_CACHE.clear()
+    rec_service._TYPEAHEAD_CACHE.clear()
+    stats_names_service.invalidate()
 
 
 def _insert_user(conn, username, is_admin=0):
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+import sqlite3
+import xml.etree.ElementTree as ET
+
+from tests.test_pr4_smoke import _insert_user
+from tests.test_recommendation_cache import _seed_catalog
+
+
+def _seed(db_path):
+    with sqlite3.connect(db_path) as conn:
+        _insert_user(conn, "admin", is_admin=1)
+        _insert_user(conn, "reader")
+        _seed_catalog(conn)
+        conn.executemany(
+            """
+            INSERT INTO user_ratings (user_id, manga_id, canonical_id, mdex_id, mal_id, rating, finished_reading, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                ("admin", "mdx-1", "mdx-1", "mdx-1", 2001, 8.6, 1, "2025-01-01 00:00:00"),
+                ("admin", "Unknown Title", None, None, None, 5, 0, "2025-01-03 00:00:00"),
+                ("admin", "mdx-2", "mdx-2", "mdx-2", None, None, 0, "2025-01-02 00:00:00"),
+                ("reader", "mdx-3", "mdx-3", "mdx-3", 2003, 7, 0, "2025-01-01 00:00:00"),
+                # Resolved to a MAL id only: exports keep the stored key, not `mal:<id>`.
+                ("reader", "Old Moon", "mal:2009", None, 2009, 6, 0, "2025-01-02 00:00:00"),
+            ],
+        )
+        conn.commit()
+
+
+def test_export_streams_each_format(app_client, monkeypatch):
+    _, client, db_path = app_client
+    _seed(db_path)
+    with client.session_transaction() as session_state:
+        session_state["user_id"] = "admin"
+
+    from app.services import ratings_export as ratings_export_service
+
+    monkeypatch.setattr(ratings_export_service, "BATCH_SIZE", 1)
+
+    response = client.get("/shelf/api/admin/ratings/export")
+    assert response.is_streamed
+    assert response.mimetype == "text/csv"
+    assert list(csv.reader(io.StringIO(response.get_data(as_text=True)))) == [
+        ["manga_id", "rating"],
+        ["Unknown Title", "5.0"],
+        ["mdx-2", ""],
+        ["mdx-1", "8.6"],
+    ]
+
+    response = client.get("/shelf/api/admin/ratings/export?format=jsonl")
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [(line["manga_id"], line["mal_id"], line["title"]) for line in lines] == [
+        ("Unknown Title", None, None),
+        ("mdx-2", 2002, "Quiet Hearts"),
+        ("mdx-1", 2001, "Blade Road"),
+    ]
+
+    response = client.get("/shelf/api/admin/ratings/export?format=xml")
+    root = ET.fromstring(response.get_data(as_text=True))
+    entries = [
+        (entry.findtext("manga_mangadb_id"), entry.findtext("my_score"), entry.findtext("my_status"))
+        for entry in root.findall("manga")
+    ]
+    # Titles without a MAL id are skipped; mdx-2's id comes from the map table.
+    assert entries == [("2002", "0", "Reading"), ("2001", "9", "Completed")]
+
+    assert client.get("/shelf/api/admin/ratings/export?format=pdf").status_code == 400
+
+
+def test_export_all_users(app_client):
+    _, client, db_path = app_client
+    _seed(db_path)
+    with client.session_transaction() as session_state:
+        session_state["user_id"] = "admin"
+
+    response = client.get("/shelf/api/admin/ratings/export?all=1")
+    assert "ratings-all.csv" in response.headers["Content-Disposition"]
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == ["user_id", "manga_id", "rating"]
+    assert [(row[0], row[1]) for row in rows[1:]] == [
+        ("admin", "Unknown Title"),
+        ("admin", "mdx-2"),
+        ("admin", "mdx-1"),
+        ("reader", "Old Moon"),
+        ("reader", "mdx-3"),
+    ]
@@ -0,0 +1,122 @@
+import io
+import sqlite3
+import time
+
+from tests.test_pr4_smoke import _clear_recommendation_caches, _insert_user
+from tests.test_recommendation_cache import _seed_catalog
+
+CSV = (
+    "manga_id,rating\n"
+    "mdx-1,9\n"
+    "mal:2002,7.5\n"
+    "Tidewater,6\n"
+    "Star Harbour,8\n"
+    "mdx-5,eleven\n"
+    "mdx-6,42\n"
+    "Unknown Title,5\n"
+    ",3\n"
+)
+
+
+def _ratings(db_path, user_id):
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT manga_id, canonical_id, mdex_id, mal_id, rating FROM user_ratings WHERE user_id = ? ORDER BY manga_id",
+            (user_id,),
+        ).fetchall()
+    return rows
+
+
+def _setup(app_client):
+    app, client, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _insert_user(conn, "admin", is_admin=1)
+        _insert_user(conn, "reference")
+        _seed_catalog(conn)
+        conn.execute("INSERT INTO user_dnr (user_id, manga_id, canonical_id, mdex_id) VALUES ('admin', 'mdx-1', 'mdx-1', 'mdx-1')")
+        conn.commit()
+    _clear_recommendation_caches()
+    with client.session_transaction() as session_state:
+        session_state["user_id"] = "admin"
+    return app, client, db_path
+
+
+def test_bulk_import_matches_per_row_writes_and_reports_errors(app_client):
+    app, client, db_path = _setup(app_client)
+
+    response = client.post("/shelf/api/admin/ratings/import", json={"csv": CSV})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body["count"] == 5
+    assert body["error_count"] == 2
+    assert [(error["line"], error["manga_id"]) for error in body["errors"]] == [(6, "mdx-5"), (7, "mdx-6")]
+
+    # The same rows written one at a time through the single-title path.
+    from app.repos import manga as manga_repo
+    from app.services import ratings as ratings_service
+    from app.services import title_match as title_match_service
+
+    with app.app_context():
+        for line in CSV.splitlines()[1:]:
+            manga_id, rating = line.split(",")
+            if not manga_id or not rating.replace(".", "").isdigit() or float(rating) > 10:
+                continue
+            resolved = title_match_service.fuzzy_ref(app.config["DATABASE"], manga_repo.resolve_manga_ref(manga_id))
+            canonical_id = resolved["canonical_id"]
+            assert ratings_service.set_rating("reference", canonical_id, rating) is None
+
+    assert _ratings(db_path, "admin") == _ratings(db_path, "reference")
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM user_dnr WHERE user_id = 'admin'").fetchone()[0] == 0
+
+
+def test_large_import_runs_as_background_job(app_client):
+    _, client, db_path = _setup(app_client)
+
+    response = client.post("/shelf/api/admin/ratings/import?async=1", json={"csv": CSV})
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+
+    deadline = time.time() + 10
+    while True:
+        job = client.get(f"/shelf/api/admin/ratings/import/{job_id}").get_json()
+        if job["status"] in {"done", "failed"} or time.time() > deadline:
+            break
+        time.sleep(0.05)
+
+    assert job["status"] == "done"
+    assert job["total"] == 8
+    assert job["processed"] == 8
+    assert job["count"] == 5
+    assert job["error_count"] == 2
+    assert len(_ratings(db_path, "admin")) == 5
+    assert client.get("/shelf/api/admin/ratings/import/missing").status_code == 404
+
+
+def test_resolution_runs_outside_write_transactions(app_client, monkeypatch):
+    app, _, db_path = app_client
+    _setup(app_client)
+
+    from app.db import get_db, in_unit_of_work
+    from app.services import ratings_import
+    from app.services import title_match as title_match_service
+
+    real_fuzzy_ref = title_match_service.fuzzy_ref
+
+    def fuzzy_ref(*args, **kwargs):
+        assert not in_unit_of_work() and not get_db().in_transaction
+        return real_fuzzy_ref(*args, **kwargs)
+
+    monkeypatch.setattr(title_match_service, "fuzzy_ref", fuzzy_ref)
+    monkeypatch.setattr(ratings_import, "CHUNK_SIZE", 2)
+    committed = []
+
+    def progress(processed, result):
+        committed.append((processed, len(_ratings(db_path, "admin"))))
+
+    with app.test_request_context():
+        result = ratings_import.import_ratings(str(db_path), "admin", io.StringIO(CSV), progress=progress, atomic=False)
+
+    assert result["count"] == 5
+    # Each chunk is committed before progress is reported.
+    assert committed == [(2, 2), (4, 4), (6, 4), (8, 5)]
@@ -0,0 +1,219 @@
+import sqlite3
+
+import numpy as np
+from scipy import sparse
+
+
+CATALOG = [
+    # id, title, genres, themes, score, year, mal_id
+    ("mdx-1", "Blade Road", "['Action', 'Adventure']", "['School']", 8.8, "2020", 2001),
+    ("mdx-2", "Quiet Hearts", "['Romance']", "['Drama']", 8.0, "2019", 2002),
+    ("mdx-3", "Star Harbor", "['Action', 'Sci-Fi']", "['Space']", 7.4, "2012", 2003),
+    ("mdx-4", "Lantern Club", "['Comedy', 'Romance']", "['School']", None, "2021", None),
+    ("mdx-5", "Iron Verse", "['Action']", "['Martial Arts', 'School']", 6.9, "1998", 2005),
+    ("mdx-6", "Tidewater", "['Drama', 'Mystery']", "[]", 8.1, None, 2006),
+]
+
+
+def _seed_catalog(conn, rows=CATALOG):
+    for mdx_id, title, genres, themes, score, year, mal_id in rows:
+        conn.execute(
+            """
+            INSERT INTO manga_core (id, title_name, english_name, synonymns, item_type, status,
+                                    publishing_date, genres, themes, content_rating, updated_at)
+            VALUES (?, ?, ?, '[]', 'Manga', 'Finished', ?, ?, ?, 'safe', '2025-01-01T00:00:00')
+            """,
+            (mdx_id, title, title, year, genres, themes),
+        )
+        if mal_id is not None:
+            conn.execute(
+                "INSERT INTO manga_map (mangadex_id, mal_id, match_method) VALUES (?, ?, 'test_seed')",
+                (mdx_id, mal_id),
+            )
+            conn.execute(
+                "INSERT INTO manga_stats (mal_id, title_name, english_name, score, popularity, members) VALUES (?, ?, ?, ?, ?, ?)",
+                (mal_id, title, title, score, mal_id - 2000, 1000 * (mal_id - 2000)),
+            )
+
+
+def _fresh_cache_module():
+    import app.services.recommendations as rec_service
+
+    rec_service._MANGA_CACHE.clear()
+    rec_service._OPTIONS_CACHE.clear()
+    return rec_service
+
+
+def test_cache_snapshot_round_trip(app_client, tmp_path, monkeypatch):
+    _, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn)
+        conn.commit()
+
+    monkeypatch.setenv("MANGA_CACHE_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    rec_service = _fresh_cache_module()
+    built = rec_service._get_cache(str(db_path))
+
+    rec_service._MANGA_CACHE.clear()
+
+    def fail_if_rebuilt(*_args, **_kwargs):
+        raise AssertionError("cache was rebuilt even though a matching snapshot exists")
+
+    monkeypatch.setattr(rec_service, "_build_cache", fail_if_rebuilt)
+    loaded = rec_service._get_cache(str(db_path))
+
+    assert isinstance(loaded["genre_counts"], np.memmap)
+    # CSR components are views over the mapped files rather than private copies.
+    assert not loaded["genre_matrix"].data.flags.writeable
+    assert np.array_equal(loaded["genre_matrix"].toarray(), built["genre_matrix"].toarray())
+    assert loaded["id_index"] == built["id_index"]
+    assert loaded["df"]["id"].tolist() == built["df"]["id"].tolist()
+
+
+def test_cache_snapshot_ignored_after_catalog_change(app_client, tmp_path, monkeypatch):
+    _, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn, CATALOG[:3])
+        conn.commit()
+
+    monkeypatch.setenv("MANGA_CACHE_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    rec_service = _fresh_cache_module()
+    rec_service._get_cache(str(db_path))
+
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn, CATALOG[3:])
+        conn.commit()
+    rec_service._MANGA_CACHE.clear()
+
+    cache = rec_service._get_cache(str(db_path))
+    assert "mdx-6" in cache["id_index"]
+
+
+def test_expired_cache_applies_catalog_delta(app_client, monkeypatch):
+    _, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn, CATALOG[:4])
+        conn.commit()
+
+    rec_service = _fresh_cache_module()
+    first = rec_service._get_cache(str(db_path))
+    row_count = len(first["df"])
+
+    with sqlite3.connect(db_path) as conn:
+        # Stats-less rows keep manga_stats untouched, which is what the delta path covers.
+        _seed_catalog(conn, [("mdx-7", "Paper Moon", "['Romance']", "['School']", None, "2022", None)])
+        conn.execute(
+            "UPDATE manga_core SET genres = ?, updated_at = '2026-01-01T00:00:00' WHERE id = 'mdx-2'",
+            ("['Romance', 'Comedy']",),
+        )
+        conn.execute("DELETE FROM manga_core WHERE id = 'mdx-3'")
+        conn.commit()
+
+    def fail_if_rebuilt(*_args, **_kwargs):
+        raise AssertionError("expired cache was rebuilt instead of patched")
+
+    monkeypatch.setattr(rec_service, "_build_cache", fail_if_rebuilt)
+    first["built_at"] = 0
+    cache = rec_service._get_cache(str(db_path))
+
+    assert cache is not first
+    assert len(cache["df"]) == row_count + 1
+    assert "mdx-3" not in cache["id_index"]
+    assert not cache["live_mask"][first["id_index"]["mdx-3"]]
+
+    idx = cache["id_index"]["mdx-2"]
+    assert cache["df"].at[idx, "genres"] == ["Romance", "Comedy"]
+    assert cache["genre_matrix"][idx, cache["genre_index"]["Comedy"]] == 1
+    assert cache["genre_counts"][idx] == 2
+
+    new_idx = cache["id_index"]["mdx-7"]
+    assert new_idx == row_count
+    assert cache["df"].at[new_idx, "title_name"] == "Paper Moon"
+    assert cache["theme_matrix"][new_idx, cache["theme_index"]["School"]] == 1
+    assert 2003 not in cache["mal_id_to_indices"]
+
+
+
+def test_delta_picks_up_new_title_with_older_updated_at(app_client, monkeypatch):
+    _, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn, CATALOG[:3])
+        conn.commit()
+
+    rec_service = _fresh_cache_module()
+    first = rec_service._get_cache(str(db_path))
+
+    with sqlite3.connect(db_path) as conn:
+        # Ingest stores MangaDex's own updatedAt, which can predate the cached rows.
+        _seed_catalog(conn, [("mdx-8", "Old Lighthouse", "['Romance']", "['School']", None, "2001", None)])
+        conn.execute("UPDATE manga_core SET updated_at = '2010-01-01T00:00:00' WHERE id = 'mdx-8'")
+        conn.commit()
+
+    def fail_if_rebuilt(*_args, **_kwargs):
+        raise AssertionError("expired cache was rebuilt instead of patched")
+
+    monkeypatch.setattr(rec_service, "_build_cache", fail_if_rebuilt)
+    first["built_at"] = 0
+    cache = rec_service._get_cache(str(db_path))
+
+    assert cache["df"].at[cache["id_index"]["mdx-8"], "title_name"] == "Old Lighthouse"
+
+
+def test_delta_follows_mapping_and_stats_edits(app_client):
+    _, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn, CATALOG[:3])
+        conn.commit()
+
+    rec_service = _fresh_cache_module()
+    first = rec_service._get_cache(str(db_path))
+
+    with sqlite3.connect(db_path) as conn:
+        # In-place remap (created_at unchanged) and a popularity-only stats edit.
+        conn.execute("UPDATE manga_map SET mal_id = 2003 WHERE mangadex_id = 'mdx-1'")
+        conn.execute("UPDATE manga_stats SET popularity = 1, english_name = 'Quiet Hearts EN' WHERE mal_id = 2002")
+        conn.commit()
+    first["built_at"] = 0
+    cache = rec_service._get_cache(str(db_path))
+
+    assert cache is not first
+    assert cache["df"].at[cache["id_index"]["mdx-1"], "mal_id"] == 2003
+    assert sorted(cache["mal_id_to_indices"][2003]) == sorted(
+        [cache["id_index"]["mdx-1"], cache["id_index"]["mdx-3"]]
+    )
+    assert 2001 not in cache["mal_id_to_indices"]
+    row = cache["df"].loc[cache["id_index"]["mdx-2"]]
+    assert row["popularity"] == 1
+    assert row["stats_english_name"] == "Quiet Hearts EN"
+
+
+def test_sparse_and_dense_backends_rank_identically(app_client, monkeypatch):
+    _, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn)
+        conn.commit()
+
+    from recommender.recommender import recommendation_scores
+
+    results = {}
+    for backend in ("sparse", "dense"):
+        monkeypatch.setenv("MANGA_FEATURE_BACKEND", backend)
+        rec_service = _fresh_cache_module()
+        cache = rec_service._get_cache(str(db_path))
+        assert sparse.issparse(cache["genre_matrix"]) == (backend == "sparse")
+        row_idx = np.array([2, 3, 4, 5])
+        ranked, _ = recommendation_scores(
+            cache["df"],
+            {"preferred_genres": {"Action": 2, "Romance": 1}, "preferred_themes": {"School": 1}},
+            ["Action"],
+            ["School"],
+            {"mdx-1": 9, "mdx-2": 3},
+            top_n=6,
+            prefiltered_df=cache["df"].iloc[row_idx],
+            prefiltered_idx=row_idx,
+            precomputed=cache,
+        )
+        results[backend] = ranked
+
+    assert results["sparse"]["id"].tolist() == results["dense"]["id"].tolist()
+    assert np.allclose(results["sparse"]["combined_score"], results["dense"]["combined_score"])
@@ -0,0 +1,60 @@
+import sqlite3
+
+from tests.test_batch_recommendations import _seed_users
+from tests.test_recommendation_cache import _fresh_cache_module, _seed_catalog
+
+
+def _fail_if_scored(*_args, **_kwargs):
+    raise AssertionError("recommendations were recomputed instead of read from the store")
+
+
+def test_repeat_request_is_served_from_store_until_a_write(app_client, monkeypatch):
+    app, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn)
+        _seed_users(conn)
+        conn.commit()
+    rec_service = _fresh_cache_module()
+
+    from app.repos import ratings as ratings_repo
+
+    with app.app_context():
+        first = rec_service.recommend_for_user(str(db_path), "alice", ["Action"], ["School"], limit=5)
+        real_scores = rec_service.recommendation_scores
+        monkeypatch.setattr(rec_service, "recommendation_scores", _fail_if_scored)
+        repeat = rec_service.recommend_for_user(str(db_path), "Alice", ["Action"], ["School"], limit=5)
+        assert [item["id"] for item in repeat[0]] == [item["id"] for item in first[0]]
+        assert repeat[0][0]["reasons"] == first[0][0]["reasons"]
+
+        ratings_repo.upsert_rating("alice", "mdx-5", 2, 0, 1, canonical_id="mdx-5", mdex_id="mdx-5")
+        monkeypatch.setattr(rec_service, "recommendation_scores", real_scores)
+        after_write, _ = rec_service.recommend_for_user(str(db_path), "alice", ["Action"], ["School"], limit=5)
+
+    assert "mdx-5" in [item["id"] for item in first[0]]
+    assert "mdx-5" not in [item["id"] for item in after_write]
+
+
+def test_identical_requests_hit_the_in_process_result_cache(app_client):
+    app, client, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn)
+        _seed_users(conn)
+        conn.execute("UPDATE users SET is_admin = 1 WHERE username = 'alice'")
+        conn.commit()
+    rec_service = _fresh_cache_module()
+
+    with app.app_context():
+        first = rec_service.recommend_for_user(str(db_path), "alice", ["Action"], [], limit=3)
+        second = rec_service.recommend_for_user(str(db_path), "alice", ["Action"], [], limit=3)
+        second[0][0]["display_title"] = "decorated by caller"
+        third = rec_service.recommend_for_user(str(db_path), "alice", ["Action"], [], limit=3)
+
+    assert [item["id"] for item in third[0]] == [item["id"] for item in first[0]]
+    assert "display_title" not in third[0][0]
+
+    with client.session_transaction() as sess:
+        sess["user_id"] = "Alice"
+    stats = client.get("/shelf/api/admin/cache-stats").get_json()["result_cache"]
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == round(2 / 3, 4)
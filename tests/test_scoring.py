@@ -0,0 +1,84 @@
+import sqlite3
+
+import numpy as np
+
+import pandas as pd
+
+from recommender.scoring import _finalize_ranked, score_and_rank_v3, select_top_k
+from tests.test_recommendation_cache import _fresh_cache_module, _seed_catalog
+
+
+PROFILE = {"preferred_genres": {"Action": 2, "Romance": 1}, "preferred_themes": {"School": 1}}
+
+
+def test_v3_kernel_matches_dataframe_scorer(app_client):
+    _, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn)
+        conn.commit()
+    cache = _fresh_cache_module()._get_cache(str(db_path))
+    df = cache["df"]
+    row_idx = np.array([0, 2, 3, 4, 5])
+    args = (PROFILE, ["Action"], ["School"], {"mdx-2": 3})
+
+    fast, fast_used = score_and_rank_v3(
+        None, df, *args, top_n=5, earliest_year=2010, precomputed=cache, prefiltered_idx=row_idx
+    )
+    slow, slow_used = score_and_rank_v3(df.iloc[row_idx], df, *args, top_n=5, earliest_year=2010)
+
+    assert fast_used == slow_used
+    assert fast["id"].tolist() == slow["id"].tolist()
+    assert np.allclose(fast["combined_score"], slow["combined_score"])
+
+
+def test_select_top_k_skips_repeated_titles():
+    scores = np.array([0.9, 0.8, 0.85, 0.1, 0.5])
+    titles = np.array(["A", "B", "A", "C", "B"], dtype=object)
+    assert select_top_k(scores, titles, 3).tolist() == [0, 1, 3]
+
+
+def test_select_top_k_widens_when_duplicates_fill_the_pool():
+    scores = np.linspace(1.0, 0.0, 200)
+    titles = np.array(["Same"] * 150 + [f"T{i}" for i in range(50)], dtype=object)
+    assert select_top_k(scores, titles, 4).tolist() == [0, 150, 151, 152]
+
+
+def test_finalize_ranked_matches_sort_and_drop_duplicates():
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame(
+        {
+            "id": [f"mdx-{i}" for i in range(300)],
+            "title_name": rng.choice([f"T{i}" for i in range(60)] + [None], size=300),
+            "combined_score": np.where(rng.random(300) < 0.05, np.nan, rng.random(300)),
+        }
+    )
+    expected = (
+        df.sort_values("combined_score", ascending=False, kind="stable")
+        .drop_duplicates(subset=["title_name"], keep="first")
+        .head(20)
+    )
+    assert _finalize_ranked(df, 20)["id"].tolist() == expected["id"].tolist()
+
+
+def test_v1_and_v2_array_paths_match_dataframe_scorers(app_client):
+    from recommender.scoring import score_and_rank, score_and_rank_v2
+
+    _, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn)
+        conn.commit()
+    cache = _fresh_cache_module()._get_cache(str(db_path))
+    df = cache["df"]
+    row_idx = np.array([0, 2, 3, 4, 5])
+    # "missing" is rated but not in the catalog; v1 still counts it in the mean.
+    args = (PROFILE, ["Action", "Horror"], ["School"], {"mdx-2": 3, "mdx-1": 9, "missing": 7})
+
+    for scorer in (score_and_rank, score_and_rank_v2):
+        fast, fast_used = scorer(
+            None, df, *args, top_n=5, earliest_year=2015, precomputed=cache, prefiltered_idx=row_idx
+        )
+        slow, slow_used = scorer(df.iloc[row_idx], df, *args, top_n=5, earliest_year=2015)
+        assert fast_used == slow_used
+        assert fast["id"].tolist() == slow["id"].tolist()
+        assert np.allclose(fast["combined_score"], slow["combined_score"])
+        assert np.allclose(fast["match_score"], slow["match_score"])
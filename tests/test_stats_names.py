@@ -0,0 +1,29 @@
+import sqlite3
+
+
+def test_stats_names_bulk_load_and_negative_lookups(app_client, monkeypatch):
+    _, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO manga_stats (mal_id, title_name, english_name) VALUES (?, ?, ?)",
+            [(30, "Hoshi", "Star Harbor"), (10, "Kaze", ""), (20, "Michi", "Blade Road")],
+        )
+        conn.commit()
+
+    from app.services import stats_names
+
+    assert stats_names.english_name(str(db_path), 20) == "Blade Road"
+    assert stats_names.english_name(str(db_path), "30") == "Star Harbor"
+
+    def fail_reload(*_args, **_kwargs):
+        raise AssertionError("name table reloaded for a repeated or missing id")
+
+    monkeypatch.setattr(stats_names, "_load_table", fail_reload)
+    for _ in range(3):
+        assert stats_names.english_name(str(db_path), 10) is None
+        assert stats_names.english_name(str(db_path), 99) is None
+    assert stats_names.english_name(str(db_path), None) is None
+
+    stats = stats_names.cache_stats()
+    assert (stats["loads"], stats["hits"], stats["negative_hits"], stats["entries"]) == (1, 2, 6, 2)
+    assert stats["hit_rate"] == 0.25
@@ -0,0 +1,54 @@
+import random
+import sqlite3
+
+from tests.test_pr4_smoke import _clear_recommendation_caches, _insert_user
+from tests.test_recommendation_cache import _seed_catalog
+from utils.fuzzy_match import _grams, best_match, build_ngram_index, fuzzy_search, normalize_title
+
+
+def test_fuzzy_search_matches_brute_force_jaccard():
+    rng = random.Random(7)
+    words = ["blade", "road", "star", "harbor", "quiet", "hearts", "iron", "verse", "lantern", "club"]
+    titles = [" ".join(rng.choices(words, k=rng.randint(1, 3))) for _ in range(300)]
+    index = build_ngram_index((title, pos) for pos, title in enumerate(titles))
+
+    for query in ["blade rod", "harbr star", "quiet", "lantern clubs"]:
+        query_grams = _grams(normalize_title(query), 3)
+        expected = {}
+        for pos, title in enumerate(titles):
+            grams = _grams(normalize_title(title), 3)
+            similarity = len(query_grams & grams) / len(query_grams | grams)
+            if similarity >= 0.5:
+                expected[pos] = similarity
+        assert dict(fuzzy_search(index, query, limit=len(titles))) == expected
+
+
+def test_best_match_rejects_ambiguous_titles():
+    index = build_ngram_index([("Blade Road", 1), ("Blade-Road!", 2), ("Quiet Hearts", 3), ("鬼滅の刃", 4)])
+    assert best_match(index, "quiet heart") == 3
+    assert best_match(index, "鬼滅の刃") == 4
+    assert best_match(index, "blade rod") is None
+    assert best_match(index, "unrelated") is None
+
+
+def test_search_and_import_fall_back_to_fuzzy_titles(app_client):
+    _, client, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _insert_user(conn, "admin", is_admin=1)
+        _seed_catalog(conn)
+        conn.commit()
+    _clear_recommendation_caches()
+
+    with client.session_transaction() as session_state:
+        session_state["user_id"] = "admin"
+
+    response = client.get("/shelf/api/manga/search?q=quiet%20haerts")
+    assert [item["id"] for item in response.get_json()["items"]][:1] == ["mdx-2"]
+
+    response = client.post(
+        "/shelf/api/admin/ratings/import", json={"csv": "manga_id,rating\nStar Harbour,7\nNo Such Title,5\n"}
+    )
+    assert response.get_json() == {"ok": True, "count": 2, "errors": [], "error_count": 0}
+    with sqlite3.connect(db_path) as conn:
+        rows = dict(conn.execute("SELECT manga_id, mal_id FROM user_ratings WHERE user_id = 'admin'").fetchall())
+    assert rows == {"mdx-3": 2003, "No Such Title": None}
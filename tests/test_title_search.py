@@ -0,0 +1,51 @@
+import sqlite3
+
+from tests.test_recommendation_cache import _seed_catalog
+
+
+def _search_ids(app, query):
+    from app.repos import manga as manga_repo
+
+    with app.app_context():
+        return [row["id"] for row in manga_repo.search_by_title(query, limit=10)]
+
+
+def test_search_uses_trigram_index_and_follows_ingest_writes(app_client):
+    app, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn)
+        conn.execute(
+            "UPDATE manga_core SET japanese_name = '星の港', synonymns = '[\"Harbour of Stars\"]' WHERE id = 'mdx-3'"
+        )
+        conn.commit()
+
+    assert _search_ids(app, "arbo") == ["mdx-3"]
+    assert _search_ids(app, "星の") == ["mdx-3"]
+    assert _search_ids(app, "of star") == ["mdx-3"]
+    # Short queries fall back to the LIKE scan.
+    assert "mdx-1" in _search_ids(app, "Bl")
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE manga_core SET title_name = 'Harbor Lights' WHERE id = 'mdx-2'")
+        conn.execute("DELETE FROM manga_core WHERE id = 'mdx-3'")
+        conn.commit()
+        plan = " ".join(
+            row[-1]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT rowid FROM manga_title_fts WHERE manga_title_fts MATCH ?", ('"arbo"',)
+            )
+        )
+
+    assert _search_ids(app, "harbor") == ["mdx-2"]
+    assert "VIRTUAL TABLE INDEX" in plan
+
+
+def test_search_blends_relevance_with_score(app_client):
+    app, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn)
+        conn.execute("UPDATE manga_core SET title_name = 'Road Blade', english_name = 'Road Blade' WHERE id = 'mdx-3'")
+        conn.commit()
+
+    # Equal textual relevance: the higher-scored title ranks first.
+    assert _search_ids(app, "blade")[:2] == ["mdx-1", "mdx-3"]
@@ -0,0 +1,48 @@
+import sqlite3
+
+from tests.test_pr4_smoke import _clear_recommendation_caches, _insert_user
+from tests.test_recommendation_cache import _seed_catalog
+from utils.prefix_index import build_prefix_index, prefix_search
+
+
+def test_prefix_index_orders_exact_then_rank():
+    index = build_prefix_index(
+        [
+            ("Blade Road", "a", 2),
+            ("Blade", "b", 5),
+            ("ＢＬＡＤＥ Runner", "c", 1),
+            ("Bloom", "d", 0),
+            ("Blade Road Alt", "a", 2),
+        ]
+    )
+    assert prefix_search(index, "blade") == ["b", "c", "a"]
+    assert prefix_search(index, "bl", limit=2) == ["d", "c"]
+    assert prefix_search(index, "x") == []
+
+
+def test_suggest_endpoint_serves_from_memory(app_client, monkeypatch):
+    _, client, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _insert_user(conn, "reader")
+        _seed_catalog(conn)
+        conn.execute("UPDATE manga_core SET synonymns = '[\"Harbour of Stars\"]' WHERE id = 'mdx-3'")
+        conn.commit()
+    _clear_recommendation_caches()
+
+    with client.session_transaction() as session_state:
+        session_state["user_id"] = "reader"
+
+    first = client.get("/shelf/api/manga/suggest?q=bla")
+    assert [item["id"] for item in first.get_json()["items"]] == ["mdx-1"]
+
+    from app.repos import manga as manga_repo
+
+    def fail_on_sql(*_args, **_kwargs):
+        raise AssertionError("typeahead hit the manga repository")
+
+    monkeypatch.setattr(manga_repo, "search_by_title", fail_on_sql)
+    monkeypatch.setattr(manga_repo, "get_stats_by_mal_id", fail_on_sql)
+    second = client.get("/shelf/api/manga/suggest?q=harbour")
+    items = second.get_json()["items"]
+    assert [item["id"] for item in items] == ["mdx-3"]
+    assert items[0]["display_title"] == "Star Harbor"
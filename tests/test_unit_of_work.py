@@ -0,0 +1,66 @@
+import sqlite3
+
+import pytest
+
+from app import write_queue
+from tests.test_pr4_smoke import _insert_user
+from tests.test_recommendation_cache import _seed_catalog
+
+
+def _seed(db_path):
+    with sqlite3.connect(db_path) as conn:
+        _insert_user(conn, "reader")
+        _seed_catalog(conn)
+        conn.execute(
+            "INSERT INTO user_dnr (user_id, manga_id, canonical_id, mdex_id) VALUES ('reader', 'mdx-2', 'mdx-2', 'mdx-2')"
+        )
+        conn.commit()
+
+
+def _rating_count(db_path, manga_id):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM user_ratings WHERE user_id = 'reader' AND canonical_id = ?", (manga_id,)
+        ).fetchone()[0]
+
+
+def test_set_rating_is_atomic(app_client, monkeypatch):
+    app, _, db_path = app_client
+    _seed(db_path)
+
+    from app.repos import dnr as dnr_repo
+    from app.services import ratings as ratings_service
+
+    def fail_remove(*_args, **_kwargs):
+        raise RuntimeError("dnr cleanup failed")
+
+    with app.app_context():
+        monkeypatch.setattr(dnr_repo, "remove", fail_remove)
+        with pytest.raises(RuntimeError):
+            ratings_service.set_rating("reader", "mdx-2", 7)
+    # The upsert that ran before the failure was rolled back with it.
+    assert _rating_count(db_path, "mdx-2") == 0
+
+    monkeypatch.undo()
+    with app.app_context():
+        assert ratings_service.set_rating("reader", "mdx-2", 7) is None
+    assert _rating_count(db_path, "mdx-2") == 1
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM user_dnr WHERE user_id = 'reader'").fetchone()[0] == 0
+
+
+def test_group_commit_runs_operations_on_writer_thread(app_client):
+    app, _, db_path = app_client
+    _seed(db_path)
+    app.config["DB_GROUP_COMMIT"] = True
+
+    from app.services import ratings as ratings_service
+
+    with app.app_context():
+        assert ratings_service.set_rating("reader", "mdx-1", 9) is None
+        assert ratings_service.set_rating("reader", "mdx-3", 6) is None
+
+    stats = write_queue.queue_stats()[app.config["DATABASE"]]
+    assert stats["writes"] == 2
+    assert _rating_count(db_path, "mdx-1") == 1
+    assert _rating_count(db_path, "mdx-3") == 1
@@ -0,0 +1,54 @@
+import sqlite3
+
+import numpy as np
+
+from tests.test_batch_recommendations import _seed_users
+from tests.test_recommendation_cache import _fresh_cache_module, _seed_catalog
+
+
+def _assert_sums_close(stored, expected):
+    assert stored["v1"]["rated_count"] == expected["v1"]["rated_count"]
+    for version in ("v1", "v2"):
+        for bucket in ("genres", "themes"):
+            labels = set(stored[version][bucket]) | set(expected[version][bucket])
+            for label in labels:
+                assert np.isclose(
+                    stored[version][bucket].get(label, 0.0), expected[version][bucket].get(label, 0.0)
+                ), (version, bucket, label)
+
+
+def test_rating_writes_update_cached_affinity_sums_incrementally(app_client, monkeypatch):
+    app, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn)
+        _seed_users(conn)
+        conn.commit()
+    rec_service = _fresh_cache_module()
+
+    from app.repos import ratings as ratings_repo
+    from app.repos import user_features as user_features_repo
+    from app.repos import user_state as user_state_repo
+    from recommender.scoring import rating_affinity_sums
+
+    with app.app_context():
+        first = rec_service.recommend_for_user(str(db_path), "alice", ["Action"], [], limit=3)
+        version, _, _ = user_features_repo.get_features("alice")
+
+        ratings_repo.upsert_rating("alice", "mdx-5", 9, 0, 1, canonical_id="mdx-5", mdex_id="mdx-5")
+        ratings_repo.upsert_rating("Alice", "mdx-1", 2, 0, 1, canonical_id="mdx-1", mdex_id="mdx-1")
+        ratings_repo.upsert_rating("alice", "not-in-catalog", 6, 0, 1)
+        ratings_repo.delete_rating("alice", "mdx-5")
+
+        stored_version, _, stored = user_features_repo.get_features("alice")
+        assert stored_version == version + 4 == user_state_repo.get_ratings_version("alice")
+
+        cache = rec_service._get_cache(str(db_path))
+        expected = rating_affinity_sums(ratings_repo.list_ratings_map("alice"), cache)
+        _assert_sums_close(stored, expected)
+
+        # The next request uses the incrementally maintained sums without a recompute.
+        monkeypatch.setattr(rec_service, "rating_affinity_sums", None)
+        after, _ = rec_service.recommend_for_user(str(db_path), "alice", ["Action"], [], limit=3)
+
+    assert first[0]
+    assert after
@@ -0,0 +1,68 @@
+import sqlite3
+
+from tests.test_pr4_smoke import _insert_user
+
+
+def test_init_db_lowercases_legacy_user_ids(app_client):
+    app, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _insert_user(conn, "Carol")
+        conn.execute("INSERT INTO user_ratings (user_id, manga_id, rating) VALUES ('Carol', 'mdx-1', 7)")
+        conn.execute("INSERT INTO user_ratings (user_id, manga_id, rating) VALUES ('CAROL', 'mdx-2', 5)")
+        conn.execute("INSERT INTO user_ratings (user_id, manga_id, rating) VALUES ('carol', 'mdx-2', 6)")
+        conn.execute("INSERT INTO user_requests (user_id, genres, themes) VALUES ('Carol', '[]', '[]')")
+        # A legacy database: the one-off normalisation has not run yet.
+        conn.execute("PRAGMA user_version = 0")
+        conn.commit()
+
+    import app.app as app_module
+    from app.repos import profile as profile_repo
+    from app.repos import ratings as ratings_repo
+
+    app_module.init_db(app)
+
+    with app.app_context():
+        assert profile_repo.get_profile("CAROL")["username"] == "carol"
+        assert ratings_repo.list_ratings_map("Carol") == {"mdx-1": 7, "mdx-2": 6}
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT DISTINCT user_id FROM user_requests").fetchall() == [("carol",)]
+        plan = " ".join(
+            row[-1]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT rating FROM user_ratings WHERE user_id = lower(?)", ("Carol",)
+            )
+        )
+    assert "USING INDEX" in plan
+
+
+def test_init_db_merges_user_ids_that_differ_only_in_case(app_client):
+    app, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _insert_user(conn, "dave")
+        _insert_user(conn, "Dave")
+        conn.execute("INSERT INTO user_ratings (user_id, manga_id, rating) VALUES ('dave', 'mdx-1', 8)")
+        conn.execute("INSERT INTO user_ratings (user_id, manga_id, rating) VALUES ('Dave', 'mdx-1', 3)")
+        conn.execute("INSERT INTO user_ratings (user_id, manga_id, rating) VALUES ('Dave', 'mdx-2', 9)")
+        conn.execute("PRAGMA user_version = 0")
+        conn.commit()
+
+    import app.app as app_module
+    from app.repos import ratings as ratings_repo
+
+    app_module.init_db(app)
+
+    with app.app_context():
+        assert ratings_repo.list_ratings_map("DAVE") == {"mdx-1": 8, "mdx-2": 9}
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT username FROM users WHERE lower(username) = 'dave'").fetchall() == [("dave",)]
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 1
+
+        # Already normalised: later startups leave even new mixed-case rows alone.
+        conn.execute("INSERT INTO user_ratings (user_id, manga_id, rating) VALUES ('Erin', 'mdx-1', 5)")
+        conn.commit()
+    app_module.init_db(app)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT user_id FROM user_ratings WHERE manga_id = 'mdx-1' AND rating = 5").fetchall() == [
+            ("Erin",)
+        ]
@@ -0,0 +1,39 @@
+import sqlite3
+
+from tests.test_batch_recommendations import _seed_users
+from tests.test_recommendation_cache import _seed_catalog
+
+
+def test_write_paths_bump_user_state_versions(app_client):
+    app, _, db_path = app_client
+    with sqlite3.connect(db_path) as conn:
+        _seed_catalog(conn)
+        _seed_users(conn)
+        conn.commit()
+
+    from app.repos import user_state as user_state_repo
+    from app.services import dnr as dnr_service
+    from app.services import profile as profile_service
+    from app.services import ratings as ratings_service
+    from app.services import reading_list as reading_list_service
+
+    with app.app_context():
+        assert user_state_repo.get_versions("alice") == (0, 0)
+
+        ratings_service.set_rating("Alice", "mdx-2", 7)
+        after_rating = user_state_repo.get_versions("ALICE")
+        assert after_rating[0] > 0
+
+        dnr_service.add_item("alice", "mdx-3")
+        after_dnr = user_state_repo.get_versions("alice")
+        assert after_dnr[0] > after_rating[0]
+
+        reading_list_service.add_item("alice", "mdx-4")
+        after_reading = user_state_repo.get_versions("alice")
+        assert after_reading[0] > after_dnr[0]
+
+        profile_service.record_request_history("alice", ["Action"], [], [], [])
+        after_history = user_state_repo.get_versions("alice")
+        assert after_history == (after_reading[0], 1)
+
+        assert user_state_repo.get_versions_many(["Alice", "bob"]) == {"alice": after_history, "bob": (0, 0)}
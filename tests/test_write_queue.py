@@ -0,0 +1,47 @@
+import sqlite3
+
+import pytest
+
+from app import db as db_module
+from app import write_queue
+
+
+def _insert_user(db, username):
+    db.execute("INSERT INTO users (username) VALUES (?)", (username,))
+    return username
+
+
+def test_queued_writes_share_one_commit_and_fail_independently(app_client):
+    app, _, db_path = app_client
+    app.config["DB_WRITE_BATCH_WINDOW_MS"] = 200
+    write_queue.shutdown()
+
+    with app.app_context():
+        futures = [write_queue.run_write(_insert_user, f"user-{i}", wait=False) for i in range(4)]
+        # Duplicate primary key: only this write is rolled back.
+        futures.append(write_queue.run_write(_insert_user, "user-0", wait=False))
+        assert [future.result(timeout=5) for future in futures[:4]] == ["user-0", "user-1", "user-2", "user-3"]
+        with pytest.raises(sqlite3.IntegrityError):
+            futures[4].result(timeout=5)
+
+    stats = write_queue.queue_stats()[app.config["DATABASE"]]
+    assert stats["batches"] == 1
+    assert stats["failed"] == 1
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM users WHERE username LIKE 'user-%'").fetchone()[0] == 4
+
+
+def test_reads_use_read_only_connection_outside_transactions(app_client):
+    app, _, _ = app_client
+
+    with app.app_context():
+        reader = db_module.get_read_db()
+        assert reader is not db_module.get_db()
+        with pytest.raises(sqlite3.OperationalError):
+            reader.execute("INSERT INTO users (username) VALUES ('nope')")
+
+        writer = db_module.get_db()
+        writer.execute("INSERT INTO users (username) VALUES ('pending')")
+        # Inside an open transaction reads must see the request's own rows.
+        assert db_module.get_read_db() is writer
+        writer.rollback()
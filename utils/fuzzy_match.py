@@ -0,0 +1,96 @@
+"""Character n-gram inverted index for typo-tolerant title matching.
+
+Shared by the web app (search/ID resolution) and the offline mapping scripts.
+Lookups only touch postings of the query's rarest n-grams (prefix filtering),
+so cost grows with the number of similar titles rather than the catalog size.
+"""
+
+import math
+import re
+import unicodedata
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def normalize_title(value):
+    """NFKC-normalize, case-fold and reduce punctuation runs to single spaces."""
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFKC", str(value)).casefold()
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+
+def _grams(key, n):
+    # Pad so short titles and word boundaries still produce n-grams.
+    padded = f" {key} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i : i + n] for i in range(len(padded) - n + 1)}
+
+
+def build_ngram_index(entries, n=3):
+    """Index `(text, item)` entries; one item may carry several title variants."""
+    keys = []
+    items = []
+    gram_sets = []
+    postings = {}
+    seen = set()
+    for text, item in entries:
+        key = normalize_title(text)
+        if not key or (key, item) in seen:
+            continue
+        seen.add((key, item))
+        grams = frozenset(_grams(key, n))
+        pos = len(keys)
+        keys.append(key)
+        items.append(item)
+        gram_sets.append(grams)
+        for gram in grams:
+            postings.setdefault(gram, []).append(pos)
+    return {"n": n, "keys": keys, "items": items, "gram_sets": gram_sets, "postings": postings}
+
+
+def fuzzy_search(index, query, limit=5, min_similarity=0.5):
+    """Return up to `limit` `(item, similarity)` pairs, best first.
+
+    Similarity is the Jaccard index of the two n-gram sets; each item is
+    reported once with the score of its best-matching title variant.
+    """
+    key = normalize_title(query)
+    if not key or limit <= 0:
+        return []
+    query_grams = _grams(key, index["n"])
+    postings = index["postings"]
+    # Any key with Jaccard >= t shares at least ceil(t * |Q|) grams with the query,
+    # so it must contain one of the |Q| - ceil(t * |Q|) + 1 rarest query grams.
+    required = max(1, math.ceil(min_similarity * len(query_grams)))
+    probe = sorted(query_grams, key=lambda gram: len(postings.get(gram, ())))
+    probe = probe[: len(query_grams) - required + 1]
+
+    candidates = set()
+    for gram in probe:
+        candidates.update(postings.get(gram, ()))
+
+    best = {}
+    gram_sets = index["gram_sets"]
+    for pos in candidates:
+        grams = gram_sets[pos]
+        shared = len(query_grams & grams)
+        similarity = shared / (len(query_grams) + len(grams) - shared)
+        if similarity < min_similarity:
+            continue
+        item = index["items"][pos]
+        if similarity > best.get(item, 0.0):
+            best[item] = similarity
+    ranked = sorted(best.items(), key=lambda pair: (-pair[1], str(pair[0])))
+    return ranked[:limit]
+
+
+def best_match(index, query, min_similarity=0.6, margin=0.1):
+    """Return the single confident item for `query`, or None when absent or ambiguous."""
+    matches = fuzzy_search(index, query, limit=2, min_similarity=min_similarity)
+    if not matches:
+        return None
+    if len(matches) > 1 and matches[0][1] - matches[1][1] < margin:
+        return None
+    return matches[0][0]
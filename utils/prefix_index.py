@@ -0,0 +1,78 @@
+"""Sorted-array prefix index used for in-process title typeahead."""
+
+import bisect
+import re
+import unicodedata
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_key(value):
+    """Case-fold and NFKC-normalize text so prefixes match across width/case variants."""
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFKC", str(value)).casefold()
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def build_prefix_index(entries, short_prefix_length=2, short_prefix_size=50):
+    """Build an index from `(text, item, rank)` entries; lower rank sorts first.
+
+    Longer prefixes bisect into the sorted key array. Very short prefixes match
+    a large slice of the catalog, so their best-ranked items are precomputed.
+    """
+    rows = sorted(
+        {(key, item, rank) for text, item, rank in entries for key in [normalize_key(text)] if key},
+        key=lambda row: (row[0], row[2]),
+    )
+    short = {}
+    seen = {}
+    for key, item, rank in sorted(rows, key=lambda row: row[2]):
+        for length in range(1, min(short_prefix_length, len(key)) + 1):
+            prefix = key[:length]
+            bucket = short.setdefault(prefix, [])
+            items = seen.setdefault(prefix, set())
+            if len(bucket) < short_prefix_size and item not in items:
+                items.add(item)
+                bucket.append((key, item, rank))
+    return {
+        "keys": [row[0] for row in rows],
+        "items": [row[1] for row in rows],
+        "ranks": [row[2] for row in rows],
+        "short": short,
+        "short_prefix_length": short_prefix_length,
+    }
+
+
+def prefix_search(index, query, limit=10, max_scan=5000):
+    """Return up to `limit` distinct items whose key starts with `query`.
+
+    Exact key matches come first, then ascending rank. At most `max_scan`
+    keys are examined for long prefixes, which bounds worst-case latency.
+    """
+    prefix = normalize_key(query)
+    if not prefix or limit <= 0:
+        return []
+    if len(prefix) <= index["short_prefix_length"]:
+        candidates = index["short"].get(prefix, [])
+    else:
+        keys = index["keys"]
+        start = bisect.bisect_left(keys, prefix)
+        stop = min(len(keys), start + max_scan)
+        candidates = []
+        for pos in range(start, stop):
+            key = keys[pos]
+            if not key.startswith(prefix):
+                break
+            candidates.append((key, index["items"][pos], index["ranks"][pos]))
+    ordered = sorted(candidates, key=lambda row: (row[0] != prefix, row[2]))
+    results = []
+    seen = set()
+    for _, item, _ in ordered:
+        if item in seen:
+            continue
+        seen.add(item)
+        results.append(item)
+        if len(results) >= limit:
+            break
+    return results